@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import date
-from typing import Iterable, List, Optional
+from typing import Callable, Iterable, List, Optional, Tuple
 
 import pandas as pd
+from tenacity import Retrying, stop_after_attempt, wait_exponential
+
+from app.datasource.sqlite_meta import enqueue_fail, record_fetch_run
+from app.settings import settings
+
+from .ratelimit import TokenBucket
 
 try:
     import akshare as ak
@@ -30,6 +40,11 @@ def ts_code_to_ak_symbol(ts_code: str) -> str:
     return ("sz" if ex.upper() == "SZ" else "sh") + code
 
 
+def ts_code_to_hist_symbol(ts_code: str) -> str:
+    # stock_zh_a_hist (东财) takes the bare 6-digit code: 000001.SZ -> 000001
+    return ts_code.split(".")[0]
+
+
 def _normalize_ak_df(raw: pd.DataFrame) -> pd.DataFrame:
     """Normalize akshare daily df to have columns: trade_date, open_raw, high_raw, low_raw, close_raw, volume, amount.
 
@@ -84,43 +99,148 @@ def _normalize_ak_df(raw: pd.DataFrame) -> pd.DataFrame:
     return df[[c for c in ["trade_date", "open_raw", "high_raw", "low_raw", "close_raw", "volume", "amount"] if c in df.columns]]
 
 
+PRICE_COLUMNS = ["ts_code","trade_date","open_raw","high_raw","low_raw","close_raw","pre_close","volume","amount"]
+BASIC_COLUMNS = ["ts_code", "trade_date", "turnover_rate", "pe", "pe_ttm", "pb", "ps", "total_mv", "circ_mv"]
+
+
+@dataclass
+class FetchStats:
+    endpoint: str
+    symbols: int = 0
+    ok: int = 0
+    empty: int = 0
+    failed: int = 0
+    requests: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def symbols_per_s(self) -> float:
+        return self.symbols / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+_BUCKET: Optional[TokenBucket] = None
+_BUCKET_LOCK = threading.Lock()
+
+
+def _bucket() -> TokenBucket:
+    global _BUCKET
+    with _BUCKET_LOCK:
+        if _BUCKET is None:
+            _BUCKET = TokenBucket(settings.ak_rate_per_sec, settings.ak_burst)
+        return _BUCKET
+
+
+def configure_rate_limit(rate: float, burst: int = 1) -> None:
+    """Replace the process-wide AkShare token bucket (e.g. for backfills or tests)."""
+    global _BUCKET
+    with _BUCKET_LOCK:
+        _BUCKET = TokenBucket(rate, burst)
+
+
+def fetch_symbols(
+    ts_codes: List[str],
+    fetch_one: Callable[[str], Optional[pd.DataFrame]],
+    endpoint: str,
+    params: dict,
+) -> Tuple[List[pd.DataFrame], FetchStats]:
+    """Run ``fetch_one(ts_code)`` for every code on a bounded thread pool.
+
+    Every request takes a token from the shared bucket; each symbol is retried
+    with exponential backoff, and symbols that still fail are recorded in
+    ``fail_queue``. Frames come back in ``ts_codes`` order; the run's throughput
+    is written to ``fetch_runs``.
+    """
+    stats = FetchStats(endpoint=endpoint, symbols=len(ts_codes))
+
+    def _run(code: str) -> Tuple[Optional[pd.DataFrame], int, Optional[Exception]]:
+        calls = 0
+        try:
+            for attempt in Retrying(
+                wait=wait_exponential(multiplier=0.5, min=0.5, max=8),
+                stop=stop_after_attempt(max(1, settings.ak_max_retries)),
+                reraise=True,
+            ):
+                with attempt:
+                    _bucket().acquire()
+                    calls += 1
+                    return fetch_one(code), calls, None
+        except Exception as e:
+            return None, calls, e
+        return None, calls, None  # pragma: no cover - Retrying either returns or raises
+
+    t0 = time.perf_counter()
+    results: List[Optional[pd.DataFrame]] = [None] * len(ts_codes)
+    workers = max(1, min(settings.ak_max_workers, len(ts_codes) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="akshare") as pool:
+        futures = {pool.submit(_run, code): i for i, code in enumerate(ts_codes)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            df, calls, error = fut.result()
+            stats.requests += calls
+            if error is not None:
+                stats.failed += 1
+                enqueue_fail(
+                    endpoint=endpoint,
+                    params=json.dumps({**params, "ts_code": ts_codes[i]}),
+                    last_error=str(error),
+                )
+            elif df is None or df.empty:
+                stats.empty += 1
+            else:
+                stats.ok += 1
+                results[i] = df
+    stats.elapsed_s = time.perf_counter() - t0
+    record_fetch_run(
+        endpoint=endpoint,
+        params=json.dumps(params),
+        symbols=stats.symbols,
+        ok=stats.ok,
+        empty=stats.empty,
+        failed=stats.failed,
+        requests=stats.requests,
+        elapsed_s=stats.elapsed_s,
+    )
+    return [df for df in results if df is not None], stats
+
+
+def _daily_one(code: str, start: str, end: str) -> Optional[pd.DataFrame]:
+    raw = ak.stock_zh_a_daily(symbol=ts_code_to_ak_symbol(code), start_date=start, end_date=end, adjust="")
+    df = _normalize_ak_df(raw)
+    if df is None or df.empty:
+        return None
+    df = df.sort_values("trade_date", kind="mergesort").reset_index(drop=True)
+    return pd.DataFrame(
+        {
+            "ts_code": code,
+            "trade_date": df["trade_date"],
+            "open_raw": df.get("open_raw"),
+            "high_raw": df.get("high_raw"),
+            "low_raw": df.get("low_raw"),
+            "close_raw": df.get("close_raw"),
+            # 未提供 pre_close：区间内取上一行收盘，首行由写入前的 enrich 从历史分区补齐
+            "pre_close": pd.to_numeric(df["close_raw"], errors="coerce").shift(1) if "close_raw" in df.columns else pd.NA,
+            # 成交量/额单位由数据源决定，后续可做单位校准；此处保持数值
+            "volume": df.get("volume"),
+            "amount": df.get("amount"),
+        }
+    )
+
+
 def fetch_daily_for_codes(trade_date: date, ts_codes: List[str]) -> FetchResult:
     """Fetch daily OHLCV/amount for given codes on a specific date using AkShare.
 
     Note: We request per-symbol within [date,date] to avoid full-history download.
     """
     _ensure_ak()
-    frames: List[pd.DataFrame] = []
-    start = end = trade_date.strftime("%Y%m%d")
-    for code in ts_codes:
-        symbol = ts_code_to_ak_symbol(code)
-        try:
-            raw = ak.stock_zh_a_daily(symbol=symbol, start_date=start, end_date=end, adjust="")
-        except Exception:
-            continue
-        df = _normalize_ak_df(raw)
-        if df is None or df.empty:
-            continue
-        out = pd.DataFrame(
-            {
-                "ts_code": code,
-                "trade_date": df["trade_date"],
-                "open_raw": df.get("open_raw"),
-                "high_raw": df.get("high_raw"),
-                "low_raw": df.get("low_raw"),
-                "close_raw": df.get("close_raw"),
-                # 未提供 pre_close，置为 NaN（后续可通过历史补充）
-                "pre_close": pd.NA,
-                # 成交量/额单位由数据源决定，后续可做单位校准；此处保持数值
-                "volume": df.get("volume"),
-                "amount": df.get("amount"),
-            }
-        )
-        frames.append(out)
+    day = trade_date.strftime("%Y%m%d")
+    frames, _ = fetch_symbols(
+        ts_codes,
+        lambda code: _daily_one(code, day, day),
+        endpoint="ak.stock_zh_a_daily",
+        params={"date": trade_date.isoformat()},
+    )
     if not frames:
-        return FetchResult("prices_daily", trade_date, pd.DataFrame(columns=[
-            "ts_code","trade_date","open_raw","high_raw","low_raw","close_raw","pre_close","volume","amount"
-        ]))
+        return FetchResult("prices_daily", trade_date, pd.DataFrame(columns=PRICE_COLUMNS))
     res = pd.concat(frames, ignore_index=True)
     return FetchResult("prices_daily", trade_date, res)
 
@@ -131,38 +251,49 @@ def fetch_daily_range_for_codes(start: date, end: date, ts_codes: List[str]) ->
     Columns: ts_code, trade_date, open_raw, high_raw, low_raw, close_raw, pre_close, volume, amount
     """
     _ensure_ak()
-    frames: List[pd.DataFrame] = []
     s = start.strftime("%Y%m%d")
     e = end.strftime("%Y%m%d")
-    for code in ts_codes:
-        symbol = ts_code_to_ak_symbol(code)
-        try:
-            raw = ak.stock_zh_a_daily(symbol=symbol, start_date=s, end_date=e, adjust="")
-        except Exception:
-            continue
-        df = _normalize_ak_df(raw)
-        if df is None or df.empty:
-            continue
-        out = pd.DataFrame(
-            {
-                "ts_code": code,
-                "trade_date": df["trade_date"],
-                "open_raw": df.get("open_raw"),
-                "high_raw": df.get("high_raw"),
-                "low_raw": df.get("low_raw"),
-                "close_raw": df.get("close_raw"),
-                "pre_close": pd.NA,
-                "volume": df.get("volume"),
-                "amount": df.get("amount"),
-            }
-        )
-        frames.append(out)
+    frames, _ = fetch_symbols(
+        ts_codes,
+        lambda code: _daily_one(code, s, e),
+        endpoint="ak.stock_zh_a_daily",
+        params={"start": start.isoformat(), "end": end.isoformat()},
+    )
     if not frames:
-        return pd.DataFrame(columns=[
-            "ts_code","trade_date","open_raw","high_raw","low_raw","close_raw","pre_close","volume","amount"
-        ])
+        return pd.DataFrame(columns=PRICE_COLUMNS)
     return pd.concat(frames, ignore_index=True)
 
+
+def _basic_one(code: str, start: str, end: str) -> Optional[pd.DataFrame]:
+    raw = ak.stock_zh_a_hist(symbol=ts_code_to_hist_symbol(code), period="daily", start_date=start, end_date=end, adjust="")
+    if raw is None or raw.empty:
+        return None
+    df = raw.copy()
+    # normalize date
+    if "日期" in df.columns:
+        df.rename(columns={"日期": "trade_date"}, inplace=True)
+    df["trade_date"] = pd.to_datetime(df["trade_date"]).dt.date
+    # turnover rate column names across versions: "换手率" or "换手率(%)"
+    tr_col = "换手率" if "换手率" in df.columns else ("换手率(%)" if "换手率(%)" in df.columns else None)
+    if tr_col is None:
+        return None
+    return pd.DataFrame(
+        {
+            "ts_code": code,
+            "trade_date": df["trade_date"],
+            # AkShare turnover is in percent; convert to % number consistent with spec
+            "turnover_rate": pd.to_numeric(df[tr_col], errors="coerce").astype(float),
+            # placeholders for valuation fields
+            "pe": pd.NA,
+            "pe_ttm": pd.NA,
+            "pb": pd.NA,
+            "ps": pd.NA,
+            "total_mv": pd.NA,
+            "circ_mv": pd.NA,
+        }
+    )
+
+
 def fetch_daily_basic_for_codes(trade_date: date, ts_codes: List[str]) -> FetchResult:
     """Fetch daily_basic minimal fields using ak.stock_zh_a_hist to get turnover rate.
 
@@ -170,45 +301,163 @@ def fetch_daily_basic_for_codes(trade_date: date, ts_codes: List[str]) -> FetchR
     columns 包含 换手率. 我们取单日 trade_date 的记录。
     """
     _ensure_ak()
-    frames: List[pd.DataFrame] = []
-    s = e = trade_date.strftime("%Y%m%d")
-    for code in ts_codes:
-        symbol = ts_code_to_ak_symbol(code)
-        try:
-            raw = ak.stock_zh_a_hist(symbol=symbol, period="daily", start_date=s, end_date=e, adjust="")
-        except Exception:
-            continue
-        if raw is None or raw.empty:
-            continue
-        df = raw.copy()
-        # normalize date
-        if "日期" in df.columns:
-            df.rename(columns={"日期": "trade_date"}, inplace=True)
-        df["trade_date"] = pd.to_datetime(df["trade_date"]).dt.date
-        # turnover rate column names across versions: "换手率" or "换手率(%)"
-        tr_col = "换手率" if "换手率" in df.columns else ("换手率(%)" if "换手率(%)" in df.columns else None)
-        if tr_col is None:
-            continue
+    day = trade_date.strftime("%Y%m%d")
+    frames, _ = fetch_symbols(
+        ts_codes,
+        lambda code: _basic_one(code, day, day),
+        endpoint="ak.stock_zh_a_hist",
+        params={"date": trade_date.isoformat()},
+    )
+    if not frames:
+        return FetchResult("daily_basic", trade_date, pd.DataFrame(columns=BASIC_COLUMNS))
+    return FetchResult("daily_basic", trade_date, pd.concat(frames, ignore_index=True)[BASIC_COLUMNS])
+
+
+_HIST_RENAME = {
+    "日期": "trade_date",
+    "开盘": "open_raw",
+    "最高": "high_raw",
+    "最低": "low_raw",
+    "收盘": "close_raw",
+    "成交量": "volume",
+    "成交额": "amount",
+    "涨跌额": "change",
+    "换手率": "turnover_rate",
+    "换手率(%)": "turnover_rate",
+}
+
+
+def _daily_fallback(code: str, start: str, end: str) -> Optional[pd.DataFrame]:
+    # a second request for the same symbol: it takes its own token from the shared bucket
+    _bucket().acquire()
+    return _daily_one(code, start, end)
+
+
+def _hist_one(code: str, start: str, end: str) -> Optional[pd.DataFrame]:
+    """One stock_zh_a_hist request → frame with price and turnover columns.
+
+    An empty response is a valid "no rows" answer (suspended symbol, no
+    trading in the range). Falls back to stock_zh_a_daily for the price
+    columns only when the hist response lacks OHLC; a missing 换手率 just
+    leaves turnover_rate empty.
+    """
+    raw = ak.stock_zh_a_hist(symbol=ts_code_to_hist_symbol(code), period="daily", start_date=start, end_date=end, adjust="")
+    if raw is None or raw.empty:
+        return None
+    df = raw.rename(columns={k: v for k, v in _HIST_RENAME.items() if k in raw.columns})
+    if "trade_date" not in df.columns:
+        return _daily_fallback(code, start, end)
+    df["trade_date"] = pd.to_datetime(df["trade_date"]).dt.date
+    for c in ("open_raw", "high_raw", "low_raw", "close_raw", "amount", "change", "turnover_rate"):
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    if all(c in df.columns for c in ("open_raw", "high_raw", "low_raw", "close_raw")):
         out = pd.DataFrame(
             {
                 "ts_code": code,
                 "trade_date": df["trade_date"],
-                # AkShare turnover is in percent; convert to % number consistent with spec
-                "turnover_rate": pd.to_numeric(df[tr_col], errors="coerce").astype(float),
-                # placeholders for valuation fields
-                "pe": pd.NA,
-                "pe_ttm": pd.NA,
-                "pb": pd.NA,
-                "ps": pd.NA,
-                "total_mv": pd.NA,
-                "circ_mv": pd.NA,
+                "open_raw": df["open_raw"],
+                "high_raw": df["high_raw"],
+                "low_raw": df["low_raw"],
+                "close_raw": df["close_raw"],
+                # 昨收 = 收盘 - 涨跌额
+                "pre_close": df["close_raw"] - df["change"] if "change" in df.columns else pd.NA,
+                # 东财成交量单位为手 → 股
+                "volume": (pd.to_numeric(df["volume"], errors="coerce") * 100).astype("Int64") if "volume" in df.columns else pd.NA,
+                "amount": df.get("amount"),
             }
         )
-        frames.append(out)
-    cols = ["ts_code", "trade_date", "turnover_rate", "pe", "pe_ttm", "pb", "ps", "total_mv", "circ_mv"]
+    else:
+        out = _daily_fallback(code, start, end)
+        if out is None:
+            out = pd.DataFrame({"ts_code": code, "trade_date": df["trade_date"]})
+    turnover = df.set_index("trade_date")["turnover_rate"] if "turnover_rate" in df.columns else None
+    out["turnover_rate"] = out["trade_date"].map(turnover).astype(float) if turnover is not None else float("nan")
+    return out
+
+
+def _split_hist(frames: List[pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Combined hist frames -> (prices_daily rows, daily_basic rows)."""
     if not frames:
-        return FetchResult("daily_basic", trade_date, pd.DataFrame(columns=cols))
-    return FetchResult("daily_basic", trade_date, pd.concat(frames, ignore_index=True)[cols])
+        return pd.DataFrame(columns=PRICE_COLUMNS), pd.DataFrame(columns=BASIC_COLUMNS)
+    merged = pd.concat(frames, ignore_index=True)
+    prices = merged[merged["close_raw"].notna()] if "close_raw" in merged.columns else merged.iloc[0:0]
+    prices = prices.reindex(columns=PRICE_COLUMNS).reset_index(drop=True)
+    basic = merged.loc[merged["turnover_rate"].notna(), ["ts_code", "trade_date", "turnover_rate"]]
+    for col in BASIC_COLUMNS[3:]:
+        # placeholders for valuation fields
+        basic[col] = pd.NA
+    return prices, basic[BASIC_COLUMNS].reset_index(drop=True)
+
+
+def fetch_daily_and_basic_for_codes(trade_date: date, ts_codes: List[str]) -> List[FetchResult]:
+    """Single-pass fetch: one stock_zh_a_hist request per symbol, split into
+    ``prices_daily`` and ``daily_basic`` results.
+    """
+    _ensure_ak()
+    day = trade_date.strftime("%Y%m%d")
+    frames, _ = fetch_symbols(
+        ts_codes,
+        lambda code: _hist_one(code, day, day),
+        endpoint="ak.stock_zh_a_hist",
+        params={"date": trade_date.isoformat()},
+    )
+    prices, basic = _split_hist(frames)
+    return [FetchResult("prices_daily", trade_date, prices), FetchResult("daily_basic", trade_date, basic)]
+
+
+def fetch_daily_and_basic_range_for_codes(
+    start: date, end: date, ts_codes: List[str]
+) -> Tuple[pd.DataFrame, pd.DataFrame, FetchStats]:
+    """Range variant of :func:`fetch_daily_and_basic_for_codes`: one request per
+    symbol for the whole [start, end] window; returns (prices, basic) frames and
+    the run's stats (``failed`` symbols are missing from both frames).
+    """
+    _ensure_ak()
+    s = start.strftime("%Y%m%d")
+    e = end.strftime("%Y%m%d")
+    frames, stats = fetch_symbols(
+        ts_codes,
+        lambda code: _hist_one(code, s, e),
+        endpoint="ak.stock_zh_a_hist",
+        params={"start": start.isoformat(), "end": end.isoformat()},
+    )
+    prices, basic = _split_hist(frames)
+    return prices, basic, stats
+
+
+def fetch_trade_dates(start: date, end: date) -> List[date]:
+    """SSE/SZSE trading days in [start, end] from AkShare's Sina calendar."""
+    _ensure_ak()
+    raw = ak.tool_trade_date_hist_sina()
+    days = pd.to_datetime(raw["trade_date"]).dt.date
+    return sorted(d for d in days if start <= d <= end)
+
+
+def _code_to_ts_code(code: str) -> str:
+    # 6xxxxx -> SH, 8xxxxx/4xxxxx -> BJ, else SZ
+    code = str(code).zfill(6)
+    if code.startswith("6"):
+        return f"{code}.SH"
+    if code.startswith(("8", "4")):
+        return f"{code}.BJ"
+    return f"{code}.SZ"
+
+
+def fetch_stock_basic() -> pd.DataFrame:
+    """Listed A-shares from ``stock_info_a_code_name``: ts_code and name only
+    (AkShare has no bulk industry / list_date here; both stay null)."""
+    _ensure_ak()
+    raw = ak.stock_info_a_code_name()
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=["ts_code", "name", "industry", "list_date"])
+    return pd.DataFrame({
+        "ts_code": raw["code"].map(_code_to_ts_code),
+        "name": raw["name"].astype(str),
+        "industry": None,
+        "list_date": None,
+    })
 
 
 def fetch_adj_factor_for_codes(trade_date: date, ts_codes: List[str]) -> FetchResult:
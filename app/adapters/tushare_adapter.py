@@ -118,3 +118,12 @@ def fetch_daily_basic(trade_date: date) -> FetchResult:
     )
 
 
+@retry(wait=wait_exponential(multiplier=0.5, min=0.5, max=8), stop=stop_after_attempt(5), reraise=True)
+def fetch_stock_basic() -> pd.DataFrame:
+    """Listed A-shares: ts_code, name, industry, list_date (for ST / new-listing filters)."""
+    pro = _ensure_ts()
+    df = pd.DataFrame(pro.stock_basic(exchange="", list_status="L", fields="ts_code,name,industry,list_date"))
+    if df.empty:
+        return pd.DataFrame(columns=["ts_code", "name", "industry", "list_date"])
+    df["list_date"] = pd.to_datetime(df["list_date"], format="%Y%m%d", errors="coerce").dt.date
+    return df[["ts_code", "name", "industry", "list_date"]]
@@ -0,0 +1,71 @@
+"""Bounded executor for dataset reads and single-flight request coalescing.
+
+Async handlers hand blocking work (Parquet/DuckDB scans, pandas, serialization)
+to :func:`run_io`, which uses a dedicated pool of ``settings.api_io_workers``
+threads instead of Starlette's shared threadpool, so a burst of heavy queries
+cannot starve cheap endpoints. :class:`SingleFlight` lets concurrent identical
+requests (same ETag) await one execution instead of repeating it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from app.settings import settings
+
+
+T = TypeVar("T")
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def io_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=max(1, settings.api_io_workers), thread_name_prefix="api-io")
+        return _EXECUTOR
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``fn(*args, **kwargs)`` on the API I/O pool and await the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor(), functools.partial(fn, *args, **kwargs))
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller (leader) runs the coroutine; callers arriving while it is in
+    flight await the same future. The key is dropped once the call settles, so
+    later requests go through the response cache as usual. A follower that is
+    cancelled (client went away) does not cancel the leader's work.
+    """
+
+    def __init__(self) -> None:
+        # keyed by (loop, key): a future can only be awaited on its own loop
+        self._inflight: dict[tuple[int, str], asyncio.Future] = {}
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        slot = (id(asyncio.get_running_loop()), key)
+        fut = self._inflight.get(slot)
+        if fut is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(fut)
+        self._stats["leaders"] += 1
+        fut = asyncio.ensure_future(fn())
+        self._inflight[slot] = fut
+        fut.add_done_callback(lambda _f: self._inflight.pop(slot, None))
+        return await asyncio.shield(fut)
+
+    def stats(self) -> dict[str, int]:
+        return {**self._stats, "inflight": len(self._inflight)}
+
+
+single_flight = SingleFlight()
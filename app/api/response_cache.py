@@ -0,0 +1,150 @@
+"""Server-side cache of serialized API responses.
+
+Entries are keyed by the response ETag (normalized query + snapshot id) and
+scoped to one data snapshot: when the snapshot id changes every entry is
+dropped. The in-process tier is an LRU bounded by total body bytes; the
+optional disk tier (``data/cache/api/<snapshot>/``) survives restarts and is
+shared by all uvicorn workers on the host.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from fastapi import Response
+
+from app.datasource.paths import API_CACHE_DIR
+from app.settings import settings
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    media_type: str
+
+    def to_response(self, headers: dict[str, str]) -> Response:
+        return Response(content=self.body, media_type=self.media_type, headers=headers)
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, disk_dir: Optional[Path] = None) -> None:
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._snapshot: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _roll_snapshot(self, snapshot_id: str) -> None:
+        # caller holds the lock
+        if self._snapshot == snapshot_id:
+            return
+        if self._snapshot is not None:
+            self._entries.clear()
+            self._bytes = 0
+            self._stats["invalidations"] += 1
+            self._prune_disk(keep=snapshot_id)
+        self._snapshot = snapshot_id
+
+    def get(self, snapshot_id: str, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            self._roll_snapshot(snapshot_id)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry
+        entry = self._disk_get(snapshot_id, key)
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._insert(key, entry)
+        return entry
+
+    def put(self, snapshot_id: str, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._roll_snapshot(snapshot_id)
+            if self._snapshot != snapshot_id:
+                return
+            self._insert(key, entry)
+        self._disk_put(snapshot_id, key, entry)
+
+    def _insert(self, key: str, entry: CachedResponse) -> None:
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old.body)
+        self._entries[key] = entry
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+            self._stats["evictions"] += 1
+
+    # -- disk tier -----------------------------------------------------------------
+
+    def _disk_path(self, snapshot_id: str, key: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / snapshot_id / key
+
+    def _disk_get(self, snapshot_id: str, key: str) -> Optional[CachedResponse]:
+        path = self._disk_path(snapshot_id, key)
+        if path is None:
+            return None
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        media_type, _, body = raw.partition(b"\n")
+        return CachedResponse(body=body, media_type=media_type.decode("ascii"))
+
+    def _disk_put(self, snapshot_id: str, key: str, entry: CachedResponse) -> None:
+        path = self._disk_path(snapshot_id, key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{key}.{os.getpid()}.tmp")
+            tmp.write_bytes(entry.media_type.encode("ascii") + b"\n" + entry.body)
+            tmp.replace(path)
+        except OSError:
+            # the disk tier is best-effort; memory tier already holds the entry
+            pass
+
+    def _prune_disk(self, keep: str) -> None:
+        if self.disk_dir is None or not self.disk_dir.exists():
+            return
+        for child in self.disk_dir.iterdir():
+            if child.is_dir() and child.name != keep:
+                shutil.rmtree(child, ignore_errors=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hit_ratio = (self._stats["hits"] + self._stats["disk_hits"]) / lookups if lookups else 0.0
+            return {
+                **self._stats,
+                "hit_ratio": round(hit_ratio, 4),
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk": self.disk_dir is not None,
+            }
+
+
+response_cache = ResponseCache(
+    max_bytes=settings.api_cache_max_bytes,
+    disk_dir=API_CACHE_DIR if settings.api_cache_disk else None,
+)
@@ -1,17 +1,61 @@
 from fastapi import APIRouter
 
-from datetime import date
-from typing import Optional
+import asyncio
+import json
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Optional
 
-from fastapi import Query, Response
+from fastapi import Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from app.backtest.engine import BacktestConfig
+from app.backtest.runner import get_run as bt_get_run, parse_sweep as bt_parse_sweep, submit as bt_submit
+from app.datasource.panel_cache import open_panel_cache, panel_cache_stats
 from app.datasource.watermark import read_watermarks
-from app.datasource.readers import read_prices_and_adj, read_daily_basic
-from app.metrics.core import adjust_ohlc, compute_ma, compute_vol_ann
+from app.datasource.readers import (
+    count_rows,
+    dataset_cache_stats,
+    join_prices,
+    read_adj_factor,
+    read_daily_basic,
+    read_market_summary,
+    read_prices,
+    read_prices_and_adj,
+    read_rankings,
+    read_signals,
+    read_universe,
+    universe_months,
+)
+from app.rankings.core import evidence as ranking_evidence
+from app.rankings.history import score_history
+from app.metrics.core import adjust_ohlc, compute_grouped_metrics, compute_ma, compute_vol_ann
+from app.settings import settings
+from app.signals.core import MA_WINDOWS, VOL_WINDOW
 import pandas as pd
-from .watchlist_store import get_watchlist as wl_get, set_watchlist as wl_set
-from .utils import normalize_ts_codes, compute_etag
-from app.datasource.sqlite_meta import list_jobs
+import pyarrow as pa
+from .serialize import (
+    ARROW_STREAM_MEDIA_TYPE,
+    FORMATS,
+    drop_null_columns,
+    frame_to_table,
+    to_arrow_ipc,
+    to_columnar,
+    to_rows,
+)
+from .stream import NDJSON_MEDIA_TYPE, iterate_io, price_chunks
+from .watchlist_store import (
+    DEFAULT_LIST as wl_default,
+    add_items as wl_add,
+    get_watchlist as wl_get,
+    list_watchlists as wl_lists,
+    remove_items as wl_remove,
+    set_watchlist as wl_set,
+)
+from .executor import run_io, single_flight
+from .response_cache import CachedResponse, response_cache
+from .utils import normalize_ts_codes, compute_data_snapshot_id, compute_etag, etag_matches
+from app.datasource.sqlite_meta import list_fetch_runs, list_jobs
 
 router = APIRouter()
 
@@ -22,7 +66,7 @@ def healthcheck() -> dict[str, bool]:
 
 
 @router.get("/api/status")
-def get_status() -> dict[str, list]:
+def get_status() -> dict:
     # 返回当前水位线与作业列表（作业留空直到接入 APScheduler）
     wms = [
         {
@@ -33,53 +77,124 @@ def get_status() -> dict[str, list]:
         }
         for r in read_watermarks()
     ]
-    return {"watermarks": wms, "jobs": list_jobs()}
+    return {
+        "watermarks": wms,
+        "jobs": list_jobs(),
+        "fetch_runs": list_fetch_runs(limit=5),
+        "cache": {
+            "datasets": dataset_cache_stats(),
+            "responses": response_cache.stats(),
+            "single_flight": single_flight.stats(),
+            "panel": panel_cache_stats(),
+        },
+    }
+
+
+_PRICE_FIELDS = ["ts_code", "trade_date", "open", "high", "low", "close", "volume", "amount"]
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "max-age=300"}
+
+
+def _serialize(table: pa.Table, fmt: str, envelope: dict) -> CachedResponse:
+    """Serialize ``table`` in the requested format around the ``envelope`` fields."""
+    if fmt == "arrow":
+        meta = {k: str(v) for k, v in envelope.items()}
+        return CachedResponse(body=to_arrow_ipc(table, meta), media_type=ARROW_STREAM_MEDIA_TYPE)
+    if fmt == "columnar":
+        payload = {**envelope, "columns": to_columnar(table)}
+    else:
+        payload = {**envelope, "rows": to_rows(table)}
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return CachedResponse(body=body, media_type="application/json")
+
+
+def _cached(request: Optional[Request], snapshot_id: str, etag: str) -> Optional[Response]:
+    """304 if the client already holds ``etag``, else a server-side cache hit, else None.
+
+    Checked before any dataset read.
+    """
+    if request is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    entry = response_cache.get(snapshot_id, etag)
+    if entry is not None:
+        return entry.to_response(_cache_headers(etag))
+    return None
+
+
+def _error(status_code: int, code: str, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"error": {"code": code, "message": message}})
+
+
+class _BuildError(Exception):
+    """Raised by a response build to answer with an error status instead of a body."""
+
+    def __init__(self, status_code: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+
+async def _respond(snapshot_id: str, etag: str, build: Callable[[], Awaitable[CachedResponse]]) -> Response:
+    """Build (once per in-flight ETag), cache and return the response.
+
+    Concurrent requests for the same normalized query and snapshot share one
+    execution; only the leader writes the response cache. A build that raises
+    :class:`_BuildError` is answered with that status, uncached and without an ETag.
+    """
+
+    async def _build_and_store() -> CachedResponse:
+        entry = await build()
+        await run_io(response_cache.put, snapshot_id, etag, entry)
+        return entry
+
+    try:
+        entry = await single_flight.do(etag, _build_and_store)
+    except _BuildError as e:
+        return _error(e.status_code, e.code, e.message)
+    return entry.to_response(_cache_headers(etag))
+
+
+async def _load_prices(
+    ts_codes: list[str], start: Optional[date], end: Optional[date], include_basic: bool = False
+) -> pd.DataFrame:
+    """``read_prices_and_adj`` with the prices/adj_factor/daily_basic scans run concurrently."""
+    if settings.query_engine.lower() == "duckdb":
+        # one joined query; DuckDB parallelizes the scans itself
+        return await run_io(read_prices_and_adj, ts_codes, start, end, include_basic=include_basic)
+    reads = [run_io(read_prices, ts_codes, start, end), run_io(read_adj_factor, ts_codes, start, end)]
+    if include_basic:
+        reads.append(run_io(read_daily_basic, ts_codes, start, end))
+    prices, adj, *basic = await asyncio.gather(*reads)
+    return await run_io(join_prices, prices, adj, basic[0] if basic else None)
+
+
+def _invalid_format() -> dict:
+    return {"error": {"code": "InvalidParam", "message": "format 仅支持 " + "|".join(FORMATS)}}
 
 
 @router.get("/api/prices")
-def get_prices(
+async def get_prices(
     ts_code: str = Query(..., description="逗号分隔可多值"),
     start: Optional[date] = None,
     end: Optional[date] = None,
     adj: str = "backward",
     include_basic: bool = False,
-    response: Response = None,
-) -> dict:
+    format: str = Query("json", description="json|columnar|arrow|ndjson（ndjson 为分批流式输出）"),
+    request: Request = None,
+):
     ts_codes = normalize_ts_codes(ts_code)
     if not ts_codes:
         return {"error": {"code": "InvalidParam", "message": "ts_code 必填"}}
     if adj not in ("none", "forward", "backward"):
         return {"error": {"code": "InvalidParam", "message": "adj 仅支持 none|forward|backward"}}
+    if format not in FORMATS and format != "ndjson":
+        return {"error": {"code": "InvalidParam", "message": "format 仅支持 " + "|".join(FORMATS + ("ndjson",))}}
 
-    prices = read_prices_and_adj(ts_codes, start, end)
-    if prices.empty:
-        return {"adj": adj, "rows": []}
-    prices = adjust_ohlc(prices, adj=adj)
-
-    if include_basic:
-        basic = read_daily_basic(ts_codes, start, end)[["ts_code", "trade_date", "turnover_rate"]]
-        prices = prices.merge(basic, on=["ts_code", "trade_date"], how="left")
-
-    prices = prices.sort_values(["ts_code", "trade_date"])  # ensure order
-    def to_float(v):
-        return float(v) if pd.notna(v) else None
-    result_rows = []
-    for rec in prices.to_dict(orient="records"):
-        row = {
-            "ts_code": rec["ts_code"],
-            "trade_date": rec["trade_date"].isoformat() if rec.get("trade_date") else None,
-            "open": to_float(rec.get("open")),
-            "high": to_float(rec.get("high")),
-            "low": to_float(rec.get("low")),
-            "close": to_float(rec.get("close")),
-            "volume": int(rec["volume"]) if rec.get("volume") is not None and pd.notna(rec.get("volume")) else None,
-            "amount": to_float(rec.get("amount")),
-        }
-        if include_basic and "turnover_rate" in rec:
-            row["turnover_rate"] = to_float(rec.get("turnover_rate"))
-        result_rows.append(row)
-    resp = {"adj": adj, "rows": result_rows}
-    # Cache headers
+    # Cache headers: the ETag depends only on the query and snapshot id
+    snapshot_id = compute_data_snapshot_id()
     etag = compute_etag({
         "path": "/api/prices",
         "ts_code": ts_codes,
@@ -87,46 +202,114 @@ def get_prices(
         "end": end.isoformat() if end else None,
         "adj": adj,
         "include_basic": include_basic,
-    })
-    if response is not None:
-        response.headers["ETag"] = etag
-        response.headers["Cache-Control"] = "max-age=300"
-    return resp
+        "format": format,
+    }, snapshot_id)
+    cached = _cached(request, snapshot_id, etag)
+    if cached is not None:
+        return cached
+
+    fields = _PRICE_FIELDS + (["turnover_rate"] if include_basic else [])
+
+    if format == "ndjson":
+        # streamed as it is read: no response cache, no single-flight
+        chunks = price_chunks(ts_codes, start, end, adj, fields, include_basic, settings.api_stream_batch_rows)
+        return StreamingResponse(iterate_io(chunks), media_type=NDJSON_MEDIA_TYPE, headers=_cache_headers(etag))
+
+    def _finish(prices: pd.DataFrame) -> CachedResponse:
+        if prices.empty:
+            prices = pd.DataFrame(columns=fields)
+        else:
+            prices = adjust_ohlc(prices, adj=adj)
+            prices = prices.sort_values(["ts_code", "trade_date"])  # ensure order
+        table = frame_to_table(prices, fields, int_columns=("volume",))
+        return _serialize(table, format, {"adj": adj})
+
+    async def _build() -> CachedResponse:
+        prices = await _load_prices(ts_codes, start, end, include_basic=include_basic)
+        return await run_io(_finish, prices)
+
+    return await _respond(snapshot_id, etag, _build)
+
+
+def _metrics_from_signals(
+    ts_code: str, window: int, wanted: set[str], start: Optional[date], end: Optional[date]
+) -> Optional[pd.DataFrame]:
+    """Serve ma/vol_ann from the precomputed signals_daily rows when they cover the query.
+
+    Persisted MAs are in close_raw * adj_factor units; dividing by the last factor
+    in the window gives the backward-adjusted values. Returns None to fall back.
+    """
+    want_ma = any(m.startswith("ma") for m in wanted)
+    if want_ma and window not in MA_WINDOWS:
+        return None
+    if "vol_ann" in wanted and window != VOL_WINDOW:
+        return None
+    signals = read_signals([ts_code], start, end)
+    if signals.empty or len(signals) != count_rows("prices_daily", [ts_code], start, end):
+        return None
+    signals = signals.sort_values("trade_date")
+    out = pd.DataFrame({"trade_date": signals["trade_date"]})
+    if want_ma:
+        base = pd.to_numeric(signals["adj_factor"], errors="coerce").ffill().iloc[-1]
+        out[f"ma{window}"] = signals[f"ma{window}"] / base
+    if "vol_ann" in wanted:
+        out["vol_ann"] = signals["vol_ann"]
+    return out
+
+
+def _read_with_warmup(
+    ts_codes: list[str], window: int, start: Optional[date], end: Optional[date], include_basic: bool = False
+) -> pd.DataFrame:
+    """Prices over [start, end] plus the ``window`` earlier rows of each code
+    (vol_ann needs ``window`` returns before its first value)."""
+    if start is None:
+        return read_prices_and_adj(ts_codes, None, end, include_basic=include_basic)
+    prices = read_prices_and_adj(ts_codes, _lookback_start(start - timedelta(days=1), window), end, include_basic=include_basic)
+    before = prices.loc[pd.to_datetime(prices["trade_date"]) < pd.Timestamp(start), "ts_code"].astype(str).value_counts()
+    short = [c for c in ts_codes if before.get(c, 0) < window]
+    if short:
+        # suspended within the lookback (or history starts late): those codes' full history
+        full = read_prices_and_adj(short, None, end, include_basic=include_basic)
+        prices = pd.concat([prices[~prices["ts_code"].isin(short)], full], ignore_index=True)
+    return prices
+
+
+def _metrics_on_the_fly(
+    ts_code: str, window: int, wanted: set[str], start: Optional[date], end: Optional[date]
+) -> pd.DataFrame:
+    """ma/vol_ann from prices. Rows before ``start`` warm the rolling windows up,
+    as they do in signals_daily, so both paths return the same values."""
+    prices = _read_with_warmup([ts_code], window, start, end)
+    if prices.empty:
+        return pd.DataFrame(columns=["trade_date"])
+    prices = adjust_ohlc(prices, adj="backward").sort_values("trade_date")
+    out = pd.DataFrame({"trade_date": prices["trade_date"]})
+    if any(m.startswith("ma") for m in wanted) or "ma" in wanted:
+        out[f"ma{window}"] = compute_ma(prices, window)
+    if "vol_ann" in wanted:
+        out["vol_ann"] = compute_vol_ann(prices, window)
+    if start is not None:
+        out = out[pd.to_datetime(out["trade_date"]) >= pd.Timestamp(start)]
+    return out
 
 
 @router.get("/api/metrics")
-def get_metrics(
+async def get_metrics(
     ts_code: str,
     window: int = 20,
     metrics: str = "ma,vol_ann,turnover",
     start: Optional[date] = None,
     end: Optional[date] = None,
-    response: Response = None,
-) -> dict:
+    format: str = Query("json", description="json|columnar|arrow"),
+    request: Request = None,
+):
     ts_code = ts_code.strip()
     if not ts_code:
         return {"error": {"code": "InvalidParam", "message": "ts_code 必填"}}
+    if format not in FORMATS:
+        return _invalid_format()
     wanted = {m.strip() for m in metrics.split(",") if m.strip()}
-    prices = read_prices_and_adj([ts_code], start, end)
-    if prices.empty:
-        return {"ts_code": ts_code, "rows": []}
-    prices = adjust_ohlc(prices, adj="backward").sort_values("trade_date")
-
-    out = pd.DataFrame({"trade_date": prices["trade_date"].apply(lambda d: d.isoformat())})
-    if any(m.startswith("ma") for m in wanted) or "ma" in wanted:
-        out[f"ma{window}"] = compute_ma(prices, window)
-    if "vol_ann" in wanted:
-        out["vol_ann"] = compute_vol_ann(prices, window)
-    if "turnover" in wanted:
-        basic = read_daily_basic([ts_code], start, end)[["trade_date", "turnover_rate"]].sort_values("trade_date")
-        out = out.merge(basic.assign(trade_date=basic["trade_date"].apply(lambda d: d.isoformat())), on="trade_date", how="left")
-        out.rename(columns={"turnover_rate": "turnover"}, inplace=True)
-
-    # drop all-NaN columns except trade_date
-    cols = [c for c in out.columns if c == "trade_date" or out[c].notna().any()]
-    out = out[cols]
-    rows = out.to_dict(orient="records")
-    resp = {"ts_code": ts_code, "rows": rows}
+    snapshot_id = compute_data_snapshot_id()
     etag = compute_etag({
         "path": "/api/metrics",
         "ts_code": ts_code,
@@ -134,24 +317,352 @@ def get_metrics(
         "metrics": sorted(list(wanted)),
         "start": start.isoformat() if start else None,
         "end": end.isoformat() if end else None,
-    })
-    if response is not None:
-        response.headers["ETag"] = etag
-        response.headers["Cache-Control"] = "max-age=300"
-    return resp
+        "format": format,
+    }, snapshot_id)
+    cached = _cached(request, snapshot_id, etag)
+    if cached is not None:
+        return cached
+
+    def _series() -> pd.DataFrame:
+        out = _metrics_from_signals(ts_code, window, wanted, start, end)
+        return out if out is not None else _metrics_on_the_fly(ts_code, window, wanted, start, end)
+
+    def _finish(out: pd.DataFrame, basic: Optional[pd.DataFrame]) -> CachedResponse:
+        if basic is not None and not out.empty:
+            out = out.merge(basic[["trade_date", "turnover_rate"]], on="trade_date", how="left")
+            out.rename(columns={"turnover_rate": "turnover"}, inplace=True)
+        # drop all-null columns except trade_date
+        table = drop_null_columns(frame_to_table(out, list(out.columns)), keep=("trade_date",))
+        return _serialize(table, format, {"ts_code": ts_code})
+
+    async def _build() -> CachedResponse:
+        # the daily_basic scan does not depend on the metrics path taken
+        reads = [run_io(_series)]
+        if "turnover" in wanted:
+            reads.append(run_io(read_daily_basic, [ts_code], start, end))
+        out, *basic = await asyncio.gather(*reads)
+        return await run_io(_finish, out, basic[0] if basic else None)
+
+    return await _respond(snapshot_id, etag, _build)
+
+
+_MAX_WINDOW = 250
+
+
+def _parse_windows(value: str) -> Optional[list[int]]:
+    try:
+        windows = sorted({int(w) for w in value.split(",") if w.strip()})
+    except ValueError:
+        return None
+    if not windows or windows[0] < 1 or windows[-1] > _MAX_WINDOW:
+        return None
+    return windows
+
+
+def _latest_date(table: str) -> Optional[date]:
+    for wm in read_watermarks():
+        if wm.table == table:
+            return wm.last_dt
+    return None
+
+
+def _latest_price_date() -> Optional[date]:
+    return _latest_date("prices_daily")
+
+
+def _lookback_start(anchor: date, sessions: int) -> date:
+    """First day of the last ``sessions`` trading days up to ``anchor``.
+
+    Counted on the panel cache's date axis when it reaches back far enough;
+    otherwise padded in calendar days for years with long holidays (about
+    242 sessions a year with Spring Festival and National Day).
+    """
+    view = open_panel_cache()
+    if view is not None:
+        hi = bisect_right(view.dates, anchor)
+        if hi >= sessions:
+            return view.dates[hi - sessions]
+    return anchor - timedelta(days=sessions * 8 // 5 + 30)
+
+
+@router.get("/api/metrics/batch")
+async def get_metrics_batch(
+    ts_code: str = Query(..., description="逗号分隔可多值"),
+    windows: str = Query("5,10,20", description="MA 窗口，逗号分隔"),
+    window: int = Query(20, description="vol_ann 窗口"),
+    metrics: str = "ma,vol_ann,turnover",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    latest: bool = Query(False, description="每个 ts_code 仅返回最新一行"),
+    format: str = Query("json", description="json|columnar|arrow"),
+    request: Request = None,
+):
+    """Metrics for many codes and MA windows from one read and one adjustment.
+
+    Rows carry ts_code, trade_date, close, pct_chg, volume, amount plus the
+    requested metrics. Rows before ``start`` warm the windows up, as in
+    ``/api/metrics``. With ``latest=true`` and no ``start``, only the tail needed
+    by the largest window is read; a code with fewer sessions there (suspended)
+    falls back to its full history, so it still has a latest row.
+    """
+    ts_codes = normalize_ts_codes(ts_code)
+    if not ts_codes:
+        return {"error": {"code": "InvalidParam", "message": "ts_code 必填"}}
+    ma_windows = _parse_windows(windows)
+    if ma_windows is None or not 1 <= window <= _MAX_WINDOW:
+        return {"error": {"code": "InvalidParam", "message": f"窗口须为 1..{_MAX_WINDOW} 的整数"}}
+    if format not in FORMATS:
+        return _invalid_format()
+    wanted = {m.strip() for m in metrics.split(",") if m.strip()}
+    snapshot_id = compute_data_snapshot_id()
+    etag = compute_etag({
+        "path": "/api/metrics/batch",
+        "ts_code": ts_codes,
+        "windows": ma_windows,
+        "window": window,
+        "metrics": sorted(wanted),
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "latest": latest,
+        "format": format,
+    }, snapshot_id)
+    cached = _cached(request, snapshot_id, etag)
+    if cached is not None:
+        return cached
+
+    want_ma = any(m.startswith("ma") for m in wanted)
+    # vol_ann needs one more row than its window (the first return)
+    longest = max(ma_windows + [window]) + 1
+
+    def _finish(prices: pd.DataFrame) -> CachedResponse:
+        fields = ["ts_code", "trade_date", "close", "pct_chg", "volume", "amount"]
+        if prices.empty:
+            out = pd.DataFrame(columns=fields)
+        else:
+            prices = adjust_ohlc(prices, adj="backward")
+            prices = prices.sort_values(["ts_code", "trade_date"], kind="mergesort")
+            computed = compute_grouped_metrics(
+                prices,
+                windows=ma_windows if want_ma else (),
+                vol_window=window if "vol_ann" in wanted else None,
+            )
+            out = pd.concat([prices[["ts_code", "trade_date", "close", "volume", "amount"]], computed], axis=1)
+            if "turnover" in wanted:
+                out["turnover"] = prices["turnover_rate"]
+            if start is not None:
+                # drop the warm-up rows
+                out = out[pd.to_datetime(out["trade_date"]) >= pd.Timestamp(start)]
+            if latest:
+                out = out.groupby("ts_code", sort=False).tail(1)
+            fields += [c for c in computed.columns if c != "pct_chg"] + (["turnover"] if "turnover" in wanted else [])
+        table = frame_to_table(out, fields, int_columns=("volume",))
+        return _serialize(table, format, {"latest": latest})
+
+    async def _build() -> CachedResponse:
+        warm_from = start
+        if latest and start is None:
+            # the last ``longest`` sessions of each code up to the anchor
+            warm_from = (end or _latest_price_date() or date.today()) + timedelta(days=1)
+        prices = await run_io(_read_with_warmup, ts_codes, longest, warm_from, end, "turnover" in wanted)
+        return await run_io(_finish, prices)
+
+    return await _respond(snapshot_id, etag, _build)
+
+
+@router.get("/api/universe")
+async def get_universe(
+    month: Optional[str] = Query(None, description="YYYY-MM，缺省为最新一期"),
+    format: str = Query("json", description="json|columnar|arrow"),
+    request: Request = None,
+):
+    """Monthly universe snapshot (rank, avg_turnover) as written by the universe builder."""
+    if format not in FORMATS:
+        return _error(400, "InvalidParam", "format 仅支持 " + "|".join(FORMATS))
+    if month is None:
+        months = await run_io(universe_months)
+        month = months[-1] if months else None
+        if month is None:
+            return _error(404, "NotFound", "宇宙快照尚未生成")
+    try:
+        year, mon = (int(x) for x in month.split("-"))
+        date(year, mon, 1)
+    except ValueError:
+        return _error(400, "InvalidParam", "month 格式须为 YYYY-MM")
+
+    snapshot_id = compute_data_snapshot_id()
+    etag = compute_etag({"path": "/api/universe", "month": f"{year:04d}-{mon:02d}", "format": format}, snapshot_id)
+    cached = _cached(request, snapshot_id, etag)
+    if cached is not None:
+        return cached
+
+    def _build_sync() -> CachedResponse:
+        universe = read_universe(year, mon)
+        if universe.empty:
+            raise _BuildError(404, "NotFound", f"{year:04d}-{mon:02d} 无宇宙快照")
+        table = frame_to_table(universe, ["ts_code", "rank", "avg_turnover"], int_columns=("rank",))
+        return _serialize(table, format, {"month": f"{year:04d}-{mon:02d}", "size": len(universe)})
+
+    async def _build() -> CachedResponse:
+        return await run_io(_build_sync)
+
+    return await _respond(snapshot_id, etag, _build)
+
+
+@router.get("/api/market/summary")
+async def get_market_summary(
+    date_: Optional[date] = Query(None, alias="date", description="YYYY-MM-DD，缺省为最新交易日"),
+    request: Request = None,
+):
+    """Precomputed market_summary row for one day (adv/decl/unch, movers, industries)."""
+    dt = date_ or _latest_date("market_summary")
+    if dt is None:
+        return _error(404, "NotFound", "市场总览尚未生成")
+
+    snapshot_id = compute_data_snapshot_id()
+    etag = compute_etag({"path": "/api/market/summary", "date": dt.isoformat()}, snapshot_id)
+    cached = _cached(request, snapshot_id, etag)
+    if cached is not None:
+        return cached
+
+    def _build_sync() -> CachedResponse:
+        summary = read_market_summary(dt)
+        if summary is None:
+            raise _BuildError(404, "NotFound", "该日无市场总览")
+        body = json.dumps(summary, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return CachedResponse(body=body, media_type="application/json")
+
+    async def _build() -> CachedResponse:
+        return await run_io(_build_sync)
+
+    return await _respond(snapshot_id, etag, _build)
+
+
+@router.get("/api/rankings/p_score")
+async def get_rankings_p_score(
+    date_: Optional[date] = Query(None, alias="date", description="YYYY-MM-DD，缺省为最新交易日"),
+    top: int = Query(20, description="返回前 N 名"),
+    with_history: bool = Query(False, description="附带每支的 p_score 轨迹"),
+    request: Request = None,
+):
+    """Top-N of the day's p_score ranking, read from rankings_daily; history from the panel cache."""
+    if top < 1 or top > settings.rankings_top_k:
+        return _error(400, "InvalidParam", f"top 须在 1..{settings.rankings_top_k} 之间")
+    dt = date_ or _latest_date("rankings_daily")
+    if dt is None:
+        return _error(404, "NotFound", "排行尚未生成")
+
+    snapshot_id = compute_data_snapshot_id()
+    etag = compute_etag({"path": "/api/rankings/p_score", "date": dt.isoformat(), "top": top, "with_history": with_history}, snapshot_id)
+    cached = _cached(request, snapshot_id, etag)
+    if cached is not None:
+        return cached
+
+    def _build_sync() -> CachedResponse:
+        ranked = read_rankings(dt, top)
+        if ranked.empty:
+            raise _BuildError(404, "NotFound", "该日无排行")
+        tags = ranking_evidence(ranked, universe_label=f"universe∈Top{settings.universe_size}")
+        payload = {
+            "date": dt.isoformat(),
+            "top": [
+                {"ts_code": code, "rank": int(rank), "p_score": float(score), "pct": float(pct), "evidence": ev}
+                for code, rank, score, pct, ev in zip(ranked["ts_code"], ranked["rank"], ranked["p_score"], ranked["pct_score"], tags)
+            ],
+        }
+        if with_history:
+            payload["history"] = score_history(ranked["ts_code"].astype(str).tolist(), dt, settings.rankings_history_days)
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return CachedResponse(body=body, media_type="application/json")
+
+    async def _build() -> CachedResponse:
+        return await run_io(_build_sync)
+
+    return await _respond(snapshot_id, etag, _build)
+
+
+@router.post("/api/backtest")
+async def create_backtest(body: dict):
+    """Queue a backtest; poll ``GET /api/backtest/{run_id}`` for the result."""
+    try:
+        config = BacktestConfig.from_body(body)
+        sweep = bt_parse_sweep(body.get("sweep"))
+    except (TypeError, ValueError) as e:
+        return _error(400, "InvalidParam", str(e))
+    snapshot_id = await run_io(compute_data_snapshot_id)
+    run_id = await run_io(bt_submit, config, snapshot_id, sweep)
+    return JSONResponse(status_code=202, content={"run_id": run_id})
+
+
+@router.get("/api/backtest/{run_id}")
+def get_backtest(run_id: str):
+    run = bt_get_run(run_id)
+    if run is None:
+        return _error(404, "NotFound", f"回测不存在: {run_id}")
+    return run
+
+
+_WATCHLIST_NAME_MAX = 64
+_WATCHLIST_LIMIT_MAX = 1000
+
+
+def _watchlist_name(name: Optional[str]) -> Optional[str]:
+    name = (name or wl_default).strip()
+    return name if 0 < len(name) <= _WATCHLIST_NAME_MAX else None
+
+
+def _body_codes(body: dict) -> Optional[list[str]]:
+    codes = body.get("ts_codes", [])
+    if isinstance(codes, str):
+        codes = normalize_ts_codes(codes)
+    return codes if isinstance(codes, list) else None
+
+
+@router.get("/api/watchlists")
+def get_watchlists() -> dict:
+    return {"watchlists": wl_lists()}
 
 
 @router.get("/api/watchlist")
-def list_watchlist(page: int = 1, limit: int = 50) -> dict:
-    return wl_get(page=page, limit=limit)
+def list_watchlist(
+    page: int = 1,
+    limit: int = 50,
+    after: Optional[int] = Query(None, description="上一页返回的 next_cursor（keyset 分页）"),
+    name: Optional[str] = None,
+) -> dict:
+    list_name = _watchlist_name(name)
+    if list_name is None:
+        return {"error": {"code": "InvalidParam", "message": "name 长度需在 1-64 之间"}}
+    if page < 1 or not (1 <= limit <= _WATCHLIST_LIMIT_MAX):
+        return {"error": {"code": "InvalidParam", "message": f"page 需 >= 1，limit 需在 1-{_WATCHLIST_LIMIT_MAX} 之间"}}
+    return wl_get(page=page, limit=limit, after=after, name=list_name)
 
 
 @router.post("/api/watchlist")
 def update_watchlist(body: dict) -> dict:
-    codes = body.get("ts_codes", [])
-    if not isinstance(codes, list):
+    codes = _body_codes(body)
+    if codes is None:
         return {"error": {"code": "InvalidParam", "message": "ts_codes 必须为数组"}}
-    wl_set(codes)
+    list_name = _watchlist_name(body.get("name"))
+    if list_name is None:
+        return {"error": {"code": "InvalidParam", "message": "name 长度需在 1-64 之间"}}
+    wl_set(codes, name=list_name)
     return {"ok": True}
 
 
+@router.post("/api/watchlist/items")
+def add_watchlist_items(body: dict) -> dict:
+    codes = _body_codes(body)
+    if codes is None:
+        return {"error": {"code": "InvalidParam", "message": "ts_codes 必须为数组"}}
+    list_name = _watchlist_name(body.get("name"))
+    if list_name is None:
+        return {"error": {"code": "InvalidParam", "message": "name 长度需在 1-64 之间"}}
+    return {"ok": True, "name": list_name, "added": wl_add(codes, name=list_name)}
+
+
+@router.delete("/api/watchlist/items")
+def remove_watchlist_items(ts_code: str = Query(..., description="逗号分隔可多值"), name: Optional[str] = None) -> dict:
+    list_name = _watchlist_name(name)
+    if list_name is None:
+        return {"error": {"code": "InvalidParam", "message": "name 长度需在 1-64 之间"}}
+    return {"ok": True, "name": list_name, "removed": wl_remove(normalize_ts_codes(ts_code), name=list_name)}
@@ -0,0 +1,70 @@
+"""Response serialization straight from pyarrow tables.
+
+Frames are converted to Arrow once (NaN → null happens there, vectorized), and
+the three wire formats are produced from that table without per-row pandas
+work:
+
+- ``json``: list of row objects (the original contract)
+- ``columnar``: one array per field
+- ``arrow``: Arrow IPC stream (``application/vnd.apache.arrow.stream``)
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+FORMATS = ("json", "columnar", "arrow")
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def frame_to_table(df: pd.DataFrame, columns: list[str], int_columns: tuple[str, ...] = ()) -> pa.Table:
+    """Project ``columns`` (those present) into an Arrow table.
+
+    Float NaN becomes null; ``int_columns`` are cast to int64 when they came in
+    as float because of missing values.
+    """
+    cols = [c for c in columns if c in df.columns]
+    table = pa.Table.from_pandas(df[cols], preserve_index=False).replace_schema_metadata(None)
+    for name in int_columns:
+        if name not in table.column_names:
+            continue
+        i = table.schema.get_field_index(name)
+        if not pa.types.is_integer(table.schema.field(i).type):
+            table = table.set_column(i, name, pc.cast(table.column(i), pa.int64()))
+    return table
+
+
+def drop_null_columns(table: pa.Table, keep: tuple[str, ...] = ()) -> pa.Table:
+    names = [n for n in table.column_names if n in keep or table.column(n).null_count < table.num_rows]
+    return table.select(names)
+
+
+def _json_ready(table: pa.Table) -> pa.Table:
+    # dates → ISO strings in one cast instead of isoformat() per value
+    for i, field in enumerate(table.schema):
+        if pa.types.is_date(field.type):
+            table = table.set_column(i, field.name, pc.cast(table.column(i), pa.string()))
+    return table
+
+
+def to_rows(table: pa.Table) -> list[dict[str, Any]]:
+    return _json_ready(table).to_pylist()
+
+
+def to_columnar(table: pa.Table) -> dict[str, list]:
+    t = _json_ready(table)
+    return {name: t.column(name).to_pylist() for name in t.column_names}
+
+
+def to_arrow_ipc(table: pa.Table, metadata: Optional[dict[str, str]] = None) -> bytes:
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,106 @@
+"""``/api/prices?format=ndjson``: prices streamed batch by batch.
+
+The buffered formats hold the Arrow table, the pandas frame, the row list and
+the JSON body of the whole query at once. Here the per-code adjustment bases
+come first from one pass over adj_factor (kept as change points only, see
+:class:`~app.metrics.core.FactorSteps`); prices_daily is then scanned in
+record batches of ``settings.api_stream_batch_rows`` rows, and each batch is
+adjusted, serialized as one JSON object per line and handed to the socket
+before the next is read. ``include_basic`` joins turnover_rate from one
+daily_basic read per calendar month (:class:`MonthlyBasic`), not per batch.
+Peak memory follows the batch size and one month, not the query.
+
+Rows come in storage order (by partition date, then ts_code within a
+partition) rather than sorted by (ts_code, trade_date) as in ``format=json``.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date
+from typing import AsyncIterator, Iterator, Optional
+
+import pandas as pd
+
+from app.datasource.readers import ADJ_COLUMNS, PRICE_COLUMNS, iter_batches, read_adj_factor, read_daily_basic
+from app.metrics.core import FactorSteps, adjust_with_steps
+
+from .executor import run_io
+from .serialize import frame_to_table, to_rows
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def factor_steps(ts_codes: list[str], start: Optional[date], end: Optional[date], batch_rows: int) -> FactorSteps:
+    steps = FactorSteps.from_batches(iter_batches("adj_factor", ADJ_COLUMNS, ts_codes, start, end, batch_rows))
+    if steps is None:
+        # partitions out of date order (a late day file next to its compacted month)
+        steps = FactorSteps.from_frame(read_adj_factor(ts_codes, start, end))
+    return steps
+
+
+class MonthlyBasic:
+    """``turnover_rate`` for the streamed batches, read one calendar month at a time.
+
+    Batches arrive in partition order, so each month of daily_basic (one file
+    once compacted) is scanned once and dropped when the batches move past it.
+    """
+
+    def __init__(self, ts_codes: list[str], start: Optional[date], end: Optional[date]) -> None:
+        self.ts_codes = ts_codes
+        self.start = start
+        self.end = end
+        self._months: dict[pd.Period, pd.DataFrame] = {}
+
+    def _load(self, month: pd.Period) -> pd.DataFrame:
+        lo, hi = month.start_time.date(), month.end_time.date()
+        if self.start is not None:
+            lo = max(lo, self.start)
+        if self.end is not None:
+            hi = min(hi, self.end)
+        basic = read_daily_basic(self.ts_codes, lo, hi)
+        return basic[["ts_code", "trade_date", "turnover_rate"]]
+
+    def join(self, batch: pd.DataFrame) -> pd.DataFrame:
+        months = pd.to_datetime(batch["trade_date"]).dt.to_period("M").unique()
+        for month in months:
+            if month not in self._months:
+                self._months[month] = self._load(month)
+        first = min(months)
+        for month in [m for m in self._months if m < first]:
+            del self._months[month]
+        basic = pd.concat([self._months[m] for m in months], ignore_index=True)
+        if basic.empty:
+            return batch.assign(turnover_rate=pd.NA)
+        return batch.merge(basic, on=["ts_code", "trade_date"], how="left")
+
+
+def price_chunks(
+    ts_codes: list[str],
+    start: Optional[date],
+    end: Optional[date],
+    adj: str,
+    fields: list[str],
+    include_basic: bool,
+    batch_rows: int,
+) -> Iterator[bytes]:
+    """NDJSON bytes, one chunk per prices_daily record batch."""
+    steps = factor_steps(ts_codes, start, end, batch_rows) if adj != "none" else None
+    basic = MonthlyBasic(ts_codes, start, end) if include_basic else None
+    for batch in iter_batches("prices_daily", PRICE_COLUMNS, ts_codes, start, end, batch_rows):
+        batch = adjust_with_steps(batch, steps, adj=adj)
+        if basic is not None:
+            batch = basic.join(batch)
+        rows = to_rows(frame_to_table(batch, fields, int_columns=("volume",)))
+        yield ("\n".join(map(_ENCODER.encode, rows)) + "\n").encode("utf-8")
+
+
+async def iterate_io(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Pull each chunk on the API I/O pool so scans never block the event loop."""
+    while True:
+        chunk = await run_io(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
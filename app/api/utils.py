@@ -2,17 +2,44 @@ from __future__ import annotations
 
 import hashlib
 import json
-from typing import Iterable
+import threading
+from typing import Any, Iterable, Optional
 
-from app.datasource.watermark import read_watermarks
+from app.datasource.watermark import read_watermarks, watermark_version
+
+
+_SNAPSHOT: dict[str, Any] = {"version": None, "id": None}
+_SNAPSHOT_LOCK = threading.Lock()
 
 
 def compute_data_snapshot_id() -> str:
+    """Snapshot id of the current data, recomputed only when the watermark changes.
+
+    The hash covers the watermark rows and watermark_version() itself: writes
+    that leave the rows as they were (a backfill behind ``last_dt``, a
+    compaction touch) still move the id. It is cached against the version, so
+    the steady-state cost is one indexed read of the version counter.
+    """
+    version = watermark_version()
+    with _SNAPSHOT_LOCK:
+        if _SNAPSHOT["id"] is not None and _SNAPSHOT["version"] == version:
+            return _SNAPSHOT["id"]
+    snapshot_id = _hash_watermarks(version)
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT["version"] = version
+        _SNAPSHOT["id"] = snapshot_id
+    return snapshot_id
+
+
+def _hash_watermarks(version: Optional[int]) -> str:
     wms = read_watermarks()
-    payload = [
-        {"table": w.table, "last_dt": w.last_dt.isoformat(), "rowcount": w.rowcount, "hash": w.hash}
-        for w in sorted(wms, key=lambda x: x.table)
-    ]
+    payload = {
+        "version": version,
+        "watermarks": [
+            {"table": w.table, "last_dt": w.last_dt.isoformat(), "rowcount": w.rowcount, "hash": w.hash}
+            for w in sorted(wms, key=lambda x: x.table)
+        ],
+    }
     s = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
     return hashlib.sha1(s.encode("utf-8")).hexdigest()
 
@@ -21,9 +48,26 @@ def normalize_ts_codes(value: str) -> list[str]:
     return sorted({c.strip() for c in value.split(",") if c.strip()})
 
 
-def compute_etag(normalized_query: dict) -> str:
-    snapshot = compute_data_snapshot_id()
+def compute_etag(normalized_query: dict, snapshot_id: str) -> str:
+    """ETag of ``normalized_query`` under ``snapshot_id``.
+
+    Handlers pass the id they also scope the response cache with: recomputing
+    it here could pair an ETag with a body from a different snapshot.
+    """
     nq = json.dumps(normalized_query, ensure_ascii=False, separators=(",", ":"))
-    return hashlib.sha1((snapshot + nq).encode("utf-8")).hexdigest()
+    return hashlib.sha1((snapshot_id + nq).encode("utf-8")).hexdigest()
 
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value covers ``etag`` (weak compare, ``*``)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
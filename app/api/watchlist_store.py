@@ -1,53 +1,125 @@
+"""Named watchlists in ``meta.sqlite`` (``watchlists`` / ``watchlist_items``).
+
+Items keep an insertion ``position``; pages are read with a keyset predicate on
+the ``(list_id, position)`` index, so any page of a 5,000-code list costs the
+same. The legacy single comma-joined row is migrated into the ``default`` list
+by :func:`app.datasource.meta_db.migrate`.
+"""
+
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, List, Tuple
+from typing import Any, List, Optional
+
+from app.datasource.meta_db import connect, transaction
+
+
+DEFAULT_LIST = "default"
+
+
+def _normalize(codes: list[str]) -> list[str]:
+    # strip + dedupe, first occurrence wins
+    seen: dict[str, None] = {}
+    for c in codes:
+        c = str(c).strip()
+        if c:
+            seen.setdefault(c, None)
+    return list(seen)
+
 
-from app.datasource.paths import META_SQLITE
+def _list_id(conn: sqlite3.Connection, name: str) -> Optional[int]:
+    row = conn.execute("SELECT list_id FROM watchlists WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
 
 
-def _conn() -> sqlite3.Connection:
-    META_SQLITE.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(META_SQLITE)
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS watchlist (
-            id INTEGER PRIMARY KEY CHECK (id = 1),
-            ts_codes TEXT NOT NULL DEFAULT ''
+def _ensure_list(conn: sqlite3.Connection, name: str) -> int:
+    conn.execute("INSERT OR IGNORE INTO watchlists(name) VALUES (?)", (name,))
+    return _list_id(conn, name)  # type: ignore[return-value]
+
+
+def get_watchlist(
+    page: int,
+    limit: int,
+    after: Optional[int] = None,
+    name: str = DEFAULT_LIST,
+) -> dict[str, Any]:
+    """One page of ``name``: keyset by ``after`` (a ``next_cursor``), else ``page``."""
+    conn = connect()
+    list_id = _list_id(conn, name)
+    total = 0
+    rows: list[tuple[str, int]] = []
+    if list_id is not None:
+        total = conn.execute("SELECT COUNT(*) FROM watchlist_items WHERE list_id = ?", (list_id,)).fetchone()[0]
+        if after is not None:
+            cur = conn.execute(
+                "SELECT ts_code, position FROM watchlist_items WHERE list_id = ? AND position > ? ORDER BY position LIMIT ?",
+                (list_id, after, limit),
+            )
+        else:
+            cur = conn.execute(
+                "SELECT ts_code, position FROM watchlist_items WHERE list_id = ? ORDER BY position LIMIT ? OFFSET ?",
+                (list_id, limit, max(0, (page - 1) * limit)),
+            )
+        rows = cur.fetchall()
+    items: List[str] = [r[0] for r in rows]
+    next_cursor = rows[-1][1] if len(rows) == limit else None
+    return {"name": name, "page": page, "limit": limit, "total": total, "items": items, "next_cursor": next_cursor}
+
+
+def set_watchlist(codes: list[str], name: str = DEFAULT_LIST) -> None:
+    """Replace the whole list (legacy POST semantics: sorted, deduplicated)."""
+    dedup_sorted = sorted(_normalize(codes))
+    with transaction() as conn:
+        list_id = _ensure_list(conn, name)
+        conn.execute("DELETE FROM watchlist_items WHERE list_id = ?", (list_id,))
+        conn.executemany(
+            "INSERT INTO watchlist_items(list_id, ts_code, position) VALUES (?, ?, ?)",
+            [(list_id, code, i) for i, code in enumerate(dedup_sorted, start=1)],
         )
-        """
-    )
-    return conn
 
 
-def get_watchlist(page: int, limit: int) -> dict[str, Any]:
-    conn = _conn()
-    cur = conn.execute("SELECT ts_codes FROM watchlist WHERE id=1")
-    row = cur.fetchone()
-    all_codes: List[str] = []
-    if row and row[0]:
-        all_codes = [c for c in row[0].split(",") if c]
-    total = len(all_codes)
-    start = max(0, (page - 1) * limit)
-    end = min(total, start + limit)
-    items = all_codes[start:end]
-    return {"page": page, "limit": limit, "total": total, "items": items}
+def add_items(codes: list[str], name: str = DEFAULT_LIST) -> int:
+    """Append codes not yet in the list; returns how many were added."""
+    codes = _normalize(codes)
+    with transaction() as conn:
+        list_id = _ensure_list(conn, name)
+        last = conn.execute("SELECT COALESCE(MAX(position), 0) FROM watchlist_items WHERE list_id = ?", (list_id,)).fetchone()[0]
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO watchlist_items(list_id, ts_code, position) VALUES (?, ?, ?)",
+            [(list_id, code, last + i) for i, code in enumerate(codes, start=1)],
+        )
+        return conn.total_changes - before
 
 
-def set_watchlist(codes: list[str]) -> None:
-    dedup_sorted = ",".join(sorted({c.strip() for c in codes if c.strip()}))
-    conn = _conn()
-    with conn:
-        # upsert single row id=1
-        conn.execute("INSERT INTO watchlist(id, ts_codes) VALUES(1, ?) ON CONFLICT(id) DO UPDATE SET ts_codes=excluded.ts_codes", (dedup_sorted,))
+def remove_items(codes: list[str], name: str = DEFAULT_LIST) -> int:
+    """Remove codes from the list; returns how many were removed."""
+    codes = _normalize(codes)
+    with transaction() as conn:
+        list_id = _list_id(conn, name)
+        if list_id is None or not codes:
+            return 0
+        before = conn.total_changes
+        conn.executemany("DELETE FROM watchlist_items WHERE list_id = ? AND ts_code = ?", [(list_id, c) for c in codes])
+        return conn.total_changes - before
 
 
-def list_all_codes() -> list[str]:
-    conn = _conn()
-    cur = conn.execute("SELECT ts_codes FROM watchlist WHERE id=1")
-    row = cur.fetchone()
-    if not row or not row[0]:
-        return []
-    return [c for c in row[0].split(",") if c]
+def list_watchlists() -> list[dict[str, Any]]:
+    conn = connect()
+    cur = conn.execute(
+        "SELECT w.name, COUNT(i.ts_code) FROM watchlists w LEFT JOIN watchlist_items i ON i.list_id = w.list_id GROUP BY w.list_id ORDER BY w.list_id"
+    )
+    return [{"name": r[0], "size": r[1]} for r in cur.fetchall()]
 
 
+def list_all_codes(name: Optional[str] = None) -> list[str]:
+    """Codes of one list, or of every list (deduplicated) when ``name`` is None."""
+    conn = connect()
+    if name is None:
+        cur = conn.execute("SELECT DISTINCT ts_code FROM watchlist_items ORDER BY ts_code")
+    else:
+        cur = conn.execute(
+            "SELECT i.ts_code FROM watchlist_items i JOIN watchlists w ON w.list_id = i.list_id WHERE w.name = ? ORDER BY i.position",
+            (name,),
+        )
+    return [r[0] for r in cur.fetchall()]
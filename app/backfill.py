@@ -0,0 +1,243 @@
+"""Historical backfill engine.
+
+Dates come from the trade calendar (non-trading days are never fetched) and
+are fanned out across a worker pool: TuShare works one date per unit under its
+own token bucket, AkShare works chunks of ``backfill_chunk_days`` with one
+range request per symbol (under the shared AkShare bucket). Finished dates are
+checkpointed in ``backfill_progress`` so an interrupted run resumes where it
+stopped; a unit with symbols that still failed after retries (see
+``fail_queue``) is written but not checkpointed, so the next run fetches it
+again. Watermarks are written once at the end.
+
+Usage: ``python -m app.backfill --start 2020-01-01 --end 2024-12-31``
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.adapters.akshare_adapter import (
+    FetchResult,
+    fetch_adj_factor_for_codes as ak_fetch_adj,
+    fetch_daily_and_basic_range_for_codes as ak_fetch_daily_and_basic_range,
+    fetch_trade_dates as ak_fetch_trade_dates,
+)
+from app.adapters.ratelimit import TokenBucket
+from app.adapters.tushare_adapter import fetch_trade_cal
+from app.datasource.panel_cache import update_panel_cache
+from app.datasource.readers import invalidate_datasets
+from app.datasource.sqlite_meta import backfilled_dates, enqueue_fail, mark_backfilled
+from app.datasource.watermark import WatermarkRow, upsert_watermarks
+from app.scheduler import akshare_codes, day_fetchers, write_results
+from app.settings import settings
+from app.market.daily import rebuild_market_summary
+from app.rankings.daily import rebuild_rankings
+from app.signals.daily import rebuild_signals
+from app.universe.monthly import rebuild_universe
+
+
+@dataclass
+class BackfillReport:
+    provider: str
+    start: date
+    end: date
+    trading_days: int = 0
+    skipped: int = 0  # already checkpointed
+    done: int = 0
+    failed: int = 0
+    rows: int = 0
+    elapsed_s: float = 0.0
+    latencies: list[float] = field(default_factory=list)  # seconds per date
+
+    def to_dict(self) -> dict[str, Any]:
+        lat = np.asarray(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            "provider": self.provider,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "trading_days": self.trading_days,
+            "skipped": self.skipped,
+            "done": self.done,
+            "failed": self.failed,
+            "rows": self.rows,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "rows_per_s": round(self.rows / self.elapsed_s, 1) if self.elapsed_s > 0 else 0.0,
+            "date_latency_s": {
+                "p50": round(float(np.percentile(lat, 50)), 3),
+                "p95": round(float(np.percentile(lat, 95)), 3),
+                "max": round(float(lat.max()), 3),
+            },
+        }
+
+
+def trading_days(start: date, end: date, provider: str) -> list[date]:
+    """Trading days in [start, end]; falls back to weekdays when no calendar is reachable."""
+    try:
+        if provider == "tushare":
+            cal = fetch_trade_cal(start, end)
+            return sorted(cal["cal_date"].tolist()) if not cal.empty else []
+        return ak_fetch_trade_dates(start, end)
+    except Exception:
+        days = []
+        current = start
+        while current <= end:
+            if current.weekday() < 5:
+                days.append(current)
+            current += timedelta(days=1)
+        return days
+
+
+def _chunks(days: list[date], size: int) -> list[list[date]]:
+    return [days[i : i + size] for i in range(0, len(days), size)]
+
+
+# per-date watermark rows of a unit, and the number of symbols that failed in it
+UnitResult = tuple[list[tuple[date, list[WatermarkRow]]], int]
+
+
+def _tushare_unit(bucket: TokenBucket) -> Callable[[list[date]], UnitResult]:
+    fetchers = day_fetchers("tushare")
+
+    def _run(unit: list[date]) -> UnitResult:
+        # unlike daily_job, a failing stage fails the date so it is not checkpointed
+        out = []
+        for d in unit:
+            results: list[Any] = []
+            for fetch in fetchers:
+                bucket.acquire()
+                results.extend(fetch(d))
+            out.append((d, write_results(d, results)))
+        return out, 0
+
+    return _run
+
+
+def _akshare_unit(codes: list[str]) -> Callable[[list[date]], UnitResult]:
+    def _run(unit: list[date]) -> UnitResult:
+        prices, basic, stats = ak_fetch_daily_and_basic_range(unit[0], unit[-1], codes)
+        by_day = {
+            "prices_daily": dict(tuple(prices.groupby("trade_date"))) if not prices.empty else {},
+            "daily_basic": dict(tuple(basic.groupby("trade_date"))) if not basic.empty else {},
+        }
+        out = []
+        for d in unit:
+            results = [ak_fetch_adj(d, codes)]
+            for table, frames in by_day.items():
+                if d in frames:
+                    results.append(FetchResult(table, d, frames[d].reset_index(drop=True)))
+            out.append((d, write_results(d, results)))
+        return out, stats.failed
+
+    return _run
+
+
+def run_backfill(
+    start: date,
+    end: date,
+    provider: Optional[str] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> BackfillReport:
+    """Backfill every trading day in [start, end]; ``force`` ignores checkpoints."""
+    provider = (provider or settings.data_provider).lower()
+    report = BackfillReport(provider=provider, start=start, end=end)
+    t0 = time.perf_counter()
+
+    days = trading_days(start, end, provider)
+    done = set() if force else backfilled_dates(provider, start, end)
+    pending = [d for d in days if d not in done]
+    report.trading_days = len(days)
+    report.skipped = len(days) - len(pending)
+
+    if provider == "tushare":
+        run_unit = _tushare_unit(TokenBucket(settings.ts_rate_per_sec, burst=1))
+        units = _chunks(pending, 1)
+    else:
+        run_unit = _akshare_unit(akshare_codes())
+        units = _chunks(pending, max(1, settings.backfill_chunk_days))
+
+    def _timed(unit: list[date]) -> tuple[UnitResult, float]:
+        t = time.perf_counter()
+        result = run_unit(unit)
+        return result, time.perf_counter() - t
+
+    marks: list[WatermarkRow] = []
+    written: list[date] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers or settings.backfill_workers)) as pool:
+        futures = {pool.submit(_timed, unit): unit for unit in units}
+        for fut in as_completed(futures):
+            unit = futures[fut]
+            try:
+                (out, failed_symbols), elapsed = fut.result()
+            except Exception as e:
+                report.failed += len(unit)
+                enqueue_fail(
+                    endpoint="backfill",
+                    params=json.dumps({"provider": provider, "start": unit[0].isoformat(), "end": unit[-1].isoformat()}),
+                    last_error=str(e),
+                )
+                continue
+            # chunked units share one request per symbol; spread the time evenly
+            per_date = elapsed / len(unit)
+            checkpoints = []
+            for d, day_marks in out:
+                rows = sum(m.rowcount for m in day_marks if m.table == "prices_daily")
+                marks.extend(day_marks)
+                checkpoints.append((d, rows, per_date))
+                report.rows += rows
+                report.latencies.append(per_date)
+                if day_marks:
+                    written.append(d)
+            if failed_symbols:
+                # partial data stays written, but the dates remain pending for the next run
+                report.failed += len(unit)
+                continue
+            mark_backfilled(provider, checkpoints)
+            report.done += len(unit)
+
+    upsert_watermarks(marks)
+    invalidate_datasets()
+    if written:
+        for name, rebuild in (
+            ("rebuild_signals", rebuild_signals),
+            ("rebuild_universe", rebuild_universe),
+            ("rebuild_market_summary", rebuild_market_summary),
+            ("update_panel_cache", update_panel_cache),
+            ("rebuild_rankings", rebuild_rankings),
+        ):
+            try:
+                rebuild(min(written), max(written))
+            except Exception as e:
+                enqueue_fail(
+                    endpoint=name,
+                    params=json.dumps({"start": min(written).isoformat(), "end": max(written).isoformat()}),
+                    last_error=str(e),
+                )
+    report.elapsed_s = time.perf_counter() - t0
+    return report
+
+
+def main() -> None:
+    load_dotenv(override=False)
+    parser = argparse.ArgumentParser(description="Backfill partitions for a date range")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    parser.add_argument("--provider", choices=("akshare", "tushare"))
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--force", action="store_true", help="refetch dates already checkpointed")
+    args = parser.parse_args()
+    report = run_backfill(args.start, args.end, provider=args.provider, workers=args.workers, force=args.force)
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
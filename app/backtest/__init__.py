@@ -0,0 +1,3 @@
+"""Backtests: vectorized T+1 engine over a dense price panel, run asynchronously via the API."""
+
+__all__ = []
@@ -0,0 +1,297 @@
+"""Vectorized T+1 backtest over a (dates x codes) panel.
+
+Follows the spec's VectorbtEngine recipe with plain NumPy array operations:
+
+1. signals are formed on day ``D`` (top ``top_n`` by score inside the
+   universe, every ``rebalance_days``) and become orders for ``D+1``'s open
+   (``open.shift(-1)``, T+1);
+2. on an untradable day (mask_untradable / no price) the order waits and is
+   filled at the next tradable open: the held position is the order
+   forward-filled over tradable days only, the array form of the
+   "NaN + bfill" deferral;
+3. open-to-open returns of the held book are charged two-sided
+   ``fees_bps`` + ``slippage_bps`` on each weight change; the last day, whose
+   next open is unknown, is dropped.
+
+Positions are equal weight (1 / top_n, cash for unfilled slots) and are
+re-weighted only when membership changes.
+"""
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import asdict, dataclass, field, replace
+from datetime import date
+from typing import Any, Iterable, Optional, Union
+
+import numpy as np
+
+from app.signals.core import SIGNAL_COLUMNS
+
+
+TRADING_DAYS = 252
+# signals_daily columns a run can rank by (keys, adj_factor and flags excluded)
+SCORE_SIGNALS = tuple(c for c in SIGNAL_COLUMNS if c not in ("ts_code", "trade_date", "adj_factor", "mask_untradable", "notes"))
+
+
+@dataclass
+class Panel:
+    """Dense daily arrays shared by every run over the same range and universe."""
+
+    dates: list[date]
+    codes: list[str]
+    open: np.ndarray  # float32, open_raw * adj_factor (scale-free for returns)
+    untradable: np.ndarray  # bool
+    universe: np.ndarray  # bool: code is in that day's universe
+    scores: dict[str, np.ndarray] = field(default_factory=dict)  # float32 per signal
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.open.shape
+
+    def nbytes(self) -> int:
+        arrays = [self.open, self.untradable, self.universe, *self.scores.values()]
+        return int(sum(a.nbytes for a in arrays))
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    start: date
+    end: date
+    universe_id: str = "top200"  # top200 (universe_monthly) | all
+    signal: str = "p_score"
+    ranking: str = "desc"
+    top_n: int = 20
+    rebalance_days: int = 5  # trading days between signal dates
+    fees_buy_bps: float = 15.0
+    fees_sell_bps: float = 15.0
+    slippage_bps: float = 5.0
+    t_plus_one: bool = True
+    quantiles: int = 5
+    seed: int = 0
+
+    @classmethod
+    def from_body(cls, body: dict[str, Any]) -> "BacktestConfig":
+        """Parse a ``POST /api/backtest`` body; raises ValueError with a user-facing message."""
+        try:
+            start = date.fromisoformat(str(body["start"]))
+            end = date.fromisoformat(str(body["end"]))
+        except (KeyError, ValueError):
+            raise ValueError("start/end 必填，格式 YYYY-MM-DD") from None
+        if start > end:
+            raise ValueError("start 不能晚于 end")
+        signals = body.get("signals") or ["p_score"]
+        signal = signals[0] if isinstance(signals, list) else str(signals)
+        fees_buy, fees_sell = parse_fees(body.get("fees_bps", 15))
+        config = cls(
+            start=start,
+            end=end,
+            universe_id=str(body.get("universe_id", "top200")),
+            signal=str(signal),
+            ranking=str(body.get("ranking", "desc")),
+            top_n=int(body.get("topN", body.get("top_n", 20))),
+            rebalance_days=int(body.get("rebalance_days", 5)),
+            fees_buy_bps=fees_buy,
+            fees_sell_bps=fees_sell,
+            slippage_bps=float(body.get("slippage_bps", 5)),
+            t_plus_one=bool(body.get("t_plus_one", True)),
+            quantiles=int(body.get("quantiles", 5)),
+            seed=int(body.get("seed", 0)),
+        )
+        config.validate()
+        return config
+
+    def validate(self) -> None:
+        if self.signal not in SCORE_SIGNALS:
+            raise ValueError(f"signal 仅支持 {'|'.join(SCORE_SIGNALS)}")
+        if self.universe_id not in ("top200", "all"):
+            raise ValueError("universe_id 仅支持 top200|all")
+        if self.ranking not in ("desc", "asc"):
+            raise ValueError("ranking 仅支持 desc|asc")
+        if self.top_n < 1 or self.rebalance_days < 1 or not 2 <= self.quantiles <= 10:
+            raise ValueError("topN/rebalance_days 须 >= 1，quantiles 须在 2-10 之间")
+        if not self.t_plus_one:
+            # D signal, D+1 open fill is the only supported price ("open_next")
+            raise ValueError("仅支持 t_plus_one=true")
+
+    def to_dict(self) -> dict[str, Any]:
+        out = asdict(self)
+        out["start"], out["end"] = self.start.isoformat(), self.end.isoformat()
+        return out
+
+
+def parse_fees(value: Union[float, int, dict[str, Any]]) -> tuple[float, float]:
+    """``{"buy":15,"sell":15}`` or a single value applied to both sides."""
+    if isinstance(value, dict):
+        return float(value.get("buy", 0)), float(value.get("sell", 0))
+    return float(value), float(value)
+
+
+def ffill(a: np.ndarray) -> np.ndarray:
+    """Forward-fill NaN down axis 0 (per column) without a Python loop."""
+    rows = np.where(np.isnan(a), 0, np.arange(a.shape[0])[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return a[rows, np.arange(a.shape[1])[None, :]]
+
+
+def _shift_down(a: np.ndarray, fill: float = 0.0) -> np.ndarray:
+    out = np.empty_like(a)
+    out[0] = fill
+    out[1:] = a[:-1]
+    return out
+
+
+def _signal_rows(n_dates: int, every: int) -> np.ndarray:
+    rows = np.zeros(n_dates, dtype=bool)
+    rows[::every] = True
+    return rows
+
+
+def _ranked_score(panel: Panel, config: BacktestConfig) -> np.ndarray:
+    """Score oriented so that larger is better; -inf where not eligible."""
+    score = panel.scores[config.signal].astype(np.float64)
+    if config.ranking == "asc":
+        score = -score
+    eligible = panel.universe & ~np.isnan(score)
+    return np.where(eligible, score, -np.inf)
+
+
+def target_book(panel: Panel, config: BacktestConfig) -> np.ndarray:
+    """1.0 where a code is in the top ``top_n`` as of the latest signal date, else 0."""
+    ranked = _ranked_score(panel, config)
+    n_dates, n_codes = ranked.shape
+    k = min(config.top_n, n_codes)
+    rows = _signal_rows(n_dates, config.rebalance_days)
+    top = np.argpartition(-ranked[rows], k - 1, axis=1)[:, :k]
+    picked = np.zeros((int(rows.sum()), n_codes), dtype=np.float32)
+    np.put_along_axis(picked, top, 1.0, axis=1)
+    picked[np.isneginf(ranked[rows])] = 0.0
+    book = np.full((n_dates, n_codes), np.nan, dtype=np.float32)
+    book[rows] = picked
+    return ffill(book)
+
+
+def _open_returns(panel: Panel) -> np.ndarray:
+    """Open-to-next-open returns; suspended codes carry their last price (0 return)."""
+    px = ffill(panel.open.astype(np.float64))
+    ret = np.zeros_like(px)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret[:-1] = px[1:] / px[:-1] - 1.0
+    ret[~np.isfinite(ret)] = 0.0
+    return ret
+
+
+def _quantile_returns(panel: Panel, config: BacktestConfig, ret: np.ndarray) -> list[dict[str, Any]]:
+    """Layered ("分层") annualized returns; Q1 holds the best-ranked scores, no costs."""
+    ranked = _ranked_score(panel, config)
+    rows = _signal_rows(ranked.shape[0], config.rebalance_days)
+    sub = ranked[rows]
+    valid = np.isfinite(sub)
+    order = np.argsort(-sub, axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(sub.shape[1])[None, :], axis=1)
+    n_valid = np.maximum(valid.sum(axis=1, keepdims=True), 1)
+    bucket = np.where(valid, np.minimum(rank * config.quantiles // n_valid, config.quantiles - 1), -1).astype(np.float32)
+    buckets = np.full(ranked.shape, np.nan, dtype=np.float32)
+    buckets[rows] = bucket
+    held = _shift_down(ffill(buckets), fill=-1)[:-1]
+    out = []
+    for q in range(config.quantiles):
+        member = held == q
+        count = member.sum(axis=1)
+        daily = np.where(count > 0, (ret[:-1] * member).sum(axis=1) / np.maximum(count, 1), 0.0)
+        out.append({"bucket": f"Q{q + 1}", "ret_ann": _annualize(daily)})
+    return out
+
+
+def _annualize(daily: np.ndarray) -> Optional[float]:
+    if daily.size == 0:
+        return None
+    growth = float(np.prod(1.0 + daily))
+    return growth ** (TRADING_DAYS / daily.size) - 1.0 if growth > 0 else -1.0
+
+
+def _metrics(net: np.ndarray, nav: np.ndarray, dd: np.ndarray, turnover: np.ndarray) -> dict[str, Any]:
+    std = float(net.std(ddof=0)) if net.size else 0.0
+    return {
+        "ret_total": float(nav[-1] - 1.0) if nav.size else 0.0,
+        "ret_ann": _annualize(net),
+        "vol_ann": std * np.sqrt(TRADING_DAYS),
+        "sharpe": float(net.mean() / std * np.sqrt(TRADING_DAYS)) if std > 0 else None,
+        "max_dd": float(dd.min()) if dd.size else 0.0,
+        "turnover_avg": float(turnover.mean()) if turnover.size else 0.0,
+    }
+
+
+def _simulate(panel: Panel, config: BacktestConfig, ret: np.ndarray) -> dict[str, Any]:
+    book = target_book(panel, config)
+    # T+1: the book decided on D is what D+1's open should hold
+    orders = _shift_down(book)
+    tradable = ~panel.untradable & ~np.isnan(panel.open)
+    held = ffill(np.where(tradable, orders, np.nan).astype(np.float32))
+    held[np.isnan(held)] = 0.0
+
+    # deferral statistics: an order is pending while the held position lags it
+    pending = held != orders
+    started = pending & ~_shift_down(pending.astype(np.float32)).astype(bool)
+    weights = held / np.maximum(held.sum(axis=1, keepdims=True), config.top_n)
+    dw = np.diff(weights, axis=0, prepend=np.zeros((1, weights.shape[1]), dtype=weights.dtype)).astype(np.float64)
+    buys = np.clip(dw, 0, None).sum(axis=1)
+    sells = np.clip(-dw, 0, None).sum(axis=1)
+    cost = (buys * (config.fees_buy_bps + config.slippage_bps) + sells * (config.fees_sell_bps + config.slippage_bps)) / 1e4
+
+    # the last open has no next open: drop it
+    net = ((weights[:-1] * ret[:-1]).sum(axis=1) - cost[:-1]).astype(np.float64)
+    nav = np.cumprod(1.0 + net)
+    dd = nav / np.maximum.accumulate(nav) - 1.0 if nav.size else nav
+    return {
+        "net": net,
+        "nav": nav,
+        "dd": dd,
+        "metrics": _metrics(net, nav, dd, buys[:-1] + sells[:-1]),
+        "executions": {
+            "trades": int((dw != 0).sum()),
+            "rejected": int(started.sum()),
+            "deferred_days": int(pending.sum()),
+        },
+    }
+
+
+def run_backtest(panel: Panel, config: BacktestConfig) -> dict[str, Any]:
+    """One run: equity/drawdown series, layered returns, execution stats and metrics."""
+    if config.signal not in panel.scores:
+        raise ValueError(f"未知信号: {config.signal}")
+    if len(panel.dates) < 2:
+        raise ValueError("区间内交易日不足")
+    ret = _open_returns(panel)
+    sim = _simulate(panel, config, ret)
+    days = [d.isoformat() for d in panel.dates[1:]]
+    return {
+        "equity": [{"trade_date": d, "nav": round(float(v), 6)} for d, v in zip(days, sim["nav"])],
+        "drawdown": [{"trade_date": d, "dd": round(float(v), 6)} for d, v in zip(days, sim["dd"])],
+        "by_quantile": _quantile_returns(panel, config, ret),
+        "executions": sim["executions"],
+        "metrics": sim["metrics"],
+        "config": config.to_dict(),
+    }
+
+
+def run_sweep(panel: Panel, base: BacktestConfig, grid: dict[str, Iterable[Any]]) -> list[dict[str, Any]]:
+    """Metrics for every combination in ``grid`` over one shared panel.
+
+    Keys are BacktestConfig fields, plus ``fees_bps`` (single value or
+    ``{"buy", "sell"}``, see :func:`parse_fees`).
+    """
+    ret = _open_returns(panel)
+    keys = list(grid)
+    out = []
+    for values in itertools.product(*(list(grid[k]) for k in keys)):
+        params = dict(zip(keys, values))
+        overrides = dict(params)
+        if "fees_bps" in overrides:
+            overrides["fees_buy_bps"], overrides["fees_sell_bps"] = parse_fees(overrides.pop("fees_bps"))
+        config = replace(base, **overrides)
+        config.validate()
+        sim = _simulate(panel, config, ret)
+        out.append({"params": params, **sim["metrics"], **sim["executions"]})
+    return out
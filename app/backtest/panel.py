@@ -0,0 +1,131 @@
+"""Load a backtest :class:`~app.backtest.engine.Panel` from the Parquet store.
+
+Prices, adj_factor and the signal columns are read once for the codes that
+appear in the range's universe snapshots and scattered into dense
+(dates x codes) float32 arrays; every run and sweep over the same range then
+works on those arrays only. When the memory-mapped panel cache covers the
+range, adjusted opens and ``is_trading`` are sliced from it instead of
+scanning prices_daily/adj_factor.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.datasource.panel_cache import open_panel_cache
+from app.datasource.readers import read_prices_and_adj, read_signals, read_universe
+
+from .engine import Panel, ffill
+
+
+def _months(start: date, end: date) -> list[tuple[int, int]]:
+    out, y, m = [], start.year, start.month
+    while (y, m) <= (end.year, end.month):
+        out.append((y, m))
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+def universe_members(start: date, end: date) -> dict[tuple[int, int], list[str]]:
+    """universe_monthly codes per (year, month) in range; months without a snapshot are absent."""
+    out = {}
+    for y, m in _months(start, end):
+        snap = read_universe(y, m)
+        if not snap.empty:
+            out[(y, m)] = snap["ts_code"].astype(str).tolist()
+    return out
+
+
+def _scatter(frame: pd.DataFrame, column: str, date_idx: np.ndarray, code_idx: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    out = np.full(shape, np.nan, dtype=np.float32)
+    out[date_idx, code_idx] = pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+    return out
+
+
+def _from_cache(start: date, end: date, codes: Optional[list[str]]):
+    view = open_panel_cache()
+    if view is None or not view.covers(start, end):
+        return None
+    rows = view.date_slice(start, end)
+    dates = view.dates[rows]
+    codes = codes or sorted(view.codes)
+    open_ = view.window("open", start, end, codes)
+    # codes missing from the panel read as 0 there; they have no opens either
+    untradable = view.window("mask_untradable", start, end, codes) > 0
+    return dates, codes, np.ascontiguousarray(open_), untradable
+
+
+def _from_store(start: date, end: date, codes: Optional[list[str]]):
+    prices = read_prices_and_adj(codes, start, end)
+    if prices.empty:
+        raise ValueError("区间内没有行情数据")
+    dates = sorted(prices["trade_date"].unique())
+    codes = codes or sorted(prices["ts_code"].astype(str).unique())
+    shape = (len(dates), len(codes))
+    di = pd.Index(dates).get_indexer(prices["trade_date"])
+    ci = pd.Index(codes).get_indexer(prices["ts_code"].astype(str))
+    factor = _scatter(prices, "adj_factor", di, ci, shape)
+    factor = ffill(factor)
+    factor[np.isnan(factor)] = 1.0
+    open_ = _scatter(prices, "open_raw", di, ci, shape) * factor
+    volume = _scatter(prices, "volume", di, ci, shape)
+    untradable = ~(volume > 0)
+    if "mask_untradable" in prices.columns:
+        stored = _scatter(prices, "mask_untradable", di, ci, shape)
+        untradable = np.where(np.isnan(stored), untradable, stored > 0)
+    return dates, codes, open_, untradable
+
+
+def load_panel(
+    start: date,
+    end: date,
+    universe_id: str = "top200",
+    signals: Iterable[str] = ("p_score",),
+) -> Panel:
+    members: Optional[dict[tuple[int, int], list[str]]] = None
+    codes: Optional[list[str]] = None
+    if universe_id == "top200":
+        members = universe_members(start, end)
+        if not members:
+            raise ValueError("区间内没有 universe_monthly 快照")
+        codes = sorted({c for month in members.values() for c in month})
+
+    cached = _from_cache(start, end, codes)
+    if cached is not None:
+        dates, codes, open_, untradable = cached
+    else:
+        dates, codes, open_, untradable = _from_store(start, end, codes)
+    shape = (len(dates), len(codes))
+    date_index, code_index = pd.Index(dates), pd.Index(codes)
+
+    scores: dict[str, np.ndarray] = {}
+    wanted = list(signals)
+    sig = read_signals(codes, start, end)
+    if not sig.empty:
+        si = date_index.get_indexer(sig["trade_date"])
+        sc = code_index.get_indexer(sig["ts_code"].astype(str))
+        keep = (si >= 0) & (sc >= 0)
+        sig, si, sc = sig[keep], si[keep], sc[keep]
+        for name in wanted:
+            if name in sig.columns:
+                scores[name] = _scatter(sig, name, si, sc, shape)
+        if "mask_untradable" in sig.columns:
+            mask = np.zeros(shape, dtype=bool)
+            mask[si, sc] = sig["mask_untradable"].fillna(False).astype(bool).to_numpy()
+            untradable |= mask
+    for name in wanted:
+        scores.setdefault(name, np.full(shape, np.nan, dtype=np.float32))
+
+    if members is None:
+        universe = np.ones(shape, dtype=bool)
+    else:
+        universe = np.zeros(shape, dtype=bool)
+        month_of = np.array([d.year * 12 + d.month for d in dates])
+        for (y, m), month_codes in members.items():
+            universe[np.ix_(month_of == y * 12 + m, code_index.get_indexer(month_codes))] = True
+
+    return Panel(dates=list(dates), codes=list(codes), open=open_, untradable=untradable, universe=universe, scores=scores)
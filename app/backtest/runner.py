@@ -0,0 +1,149 @@
+"""Asynchronous backtest runs behind ``POST /api/backtest``.
+
+``submit`` records the run as ``queued`` in ``meta.sqlite.backtest_runs`` and
+hands it to a small dedicated pool (``settings.backtest_workers``); the result
+JSON is stored on the same row for ``GET /api/backtest/{run_id}``. The last
+few loaded panels are kept in-process (keyed by range, universe, signals and
+data snapshot), so repeated runs and sweeps from the UI skip the load.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from app.datasource.sqlite_meta import create_backtest_run, get_backtest_run, update_backtest_run
+from app.settings import settings
+
+from .engine import BacktestConfig, Panel, run_backtest, run_sweep
+from .panel import load_panel
+
+
+_PANELS: "OrderedDict[tuple, Panel]" = OrderedDict()
+_PANELS_MAX = 2
+_PANEL_LOCK = threading.Lock()
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+# request aliases for BacktestConfig fields
+_SWEEP_ALIASES = {"topN": "top_n"}
+_SWEEP_MAX = 256
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=max(1, settings.backtest_workers), thread_name_prefix="backtest")
+        return _EXECUTOR
+
+
+def parse_sweep(value: Any) -> dict[str, list[Any]]:
+    """``{"topN": [10, 20], "fees_bps": [10, {"buy": 15, "sell": 20}]}`` -> :func:`run_sweep` grid."""
+    if not value:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError("sweep 须为 {参数: [取值...]}")
+    names = {f.name for f in fields(BacktestConfig)} - {"start", "end", "universe_id", "signal"} | {"fees_bps"}
+    grid: dict[str, list[Any]] = {}
+    combos = 1
+    for key, values in value.items():
+        key = _SWEEP_ALIASES.get(key, key)
+        if key not in names:
+            raise ValueError(f"sweep 不支持参数: {key}")
+        grid[key] = values if isinstance(values, list) else [values]
+        combos *= len(grid[key])
+    if combos > _SWEEP_MAX:
+        raise ValueError(f"sweep 组合数不能超过 {_SWEEP_MAX}")
+    return grid
+
+
+def _code_hash() -> str:
+    sha = hashlib.sha1()
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        sha.update(path.read_bytes())
+    return sha.hexdigest()
+
+
+def panel_for(config: BacktestConfig, snapshot_id: str, signals: tuple[str, ...]) -> Panel:
+    key = (config.start, config.end, config.universe_id, signals, snapshot_id)
+    with _PANEL_LOCK:
+        panel = _PANELS.get(key)
+        if panel is not None:
+            _PANELS.move_to_end(key)
+            return panel
+    panel = load_panel(config.start, config.end, config.universe_id, signals)
+    with _PANEL_LOCK:
+        _PANELS[key] = panel
+        while len(_PANELS) > _PANELS_MAX:
+            _PANELS.popitem(last=False)
+    return panel
+
+
+def execute(config: BacktestConfig, snapshot_id: str, sweep: Optional[dict[str, list[Any]]] = None) -> dict[str, Any]:
+    """Load (or reuse) the panel and run ``config`` plus its sweep; synchronous."""
+    t0 = time.perf_counter()
+    panel = panel_for(config, snapshot_id, (config.signal,))
+    load_s = time.perf_counter() - t0
+    result = run_backtest(panel, config)
+    if sweep:
+        result["sweep"] = run_sweep(panel, config, sweep)
+    result["fingerprint"] = {
+        "data_snapshot_id": snapshot_id,
+        "code_hash": _code_hash(),
+        "config_hash": hashlib.sha1(json.dumps(config.to_dict(), sort_keys=True).encode("utf-8")).hexdigest(),
+        "seed": config.seed,
+    }
+    result["timing"] = {
+        "panel_load_s": round(load_s, 3),
+        "total_s": round(time.perf_counter() - t0, 3),
+        "panel_shape": list(panel.shape),
+        "panel_mb": round(panel.nbytes() / 2**20, 1),
+    }
+    return result
+
+
+def _run(run_id: str, config: BacktestConfig, snapshot_id: str, sweep: dict[str, list[Any]]) -> None:
+    t0 = time.perf_counter()
+    update_backtest_run(run_id, "running")
+    try:
+        result = execute(config, snapshot_id, sweep)
+    except Exception as e:
+        update_backtest_run(run_id, "error", error=str(e), elapsed_s=time.perf_counter() - t0)
+        return
+    update_backtest_run(
+        run_id,
+        "done",
+        result=json.dumps(result, ensure_ascii=False, separators=(",", ":")),
+        elapsed_s=time.perf_counter() - t0,
+    )
+
+
+def submit(config: BacktestConfig, snapshot_id: str, sweep: Optional[dict[str, list[Any]]] = None) -> str:
+    run_id = f"bt_{datetime.now():%Y%m%d}_{uuid.uuid4().hex[:8]}"
+    create_backtest_run(run_id, json.dumps({**config.to_dict(), "sweep": sweep or {}}, ensure_ascii=False))
+    _executor().submit(_run, run_id, config, snapshot_id, sweep or {})
+    return run_id
+
+
+def get_run(run_id: str) -> Optional[dict[str, Any]]:
+    """Stored run as the API shape: state, plus the result once done."""
+    row = get_backtest_run(run_id)
+    if row is None:
+        return None
+    out: dict[str, Any] = {"run_id": run_id, "state": row["state"], "elapsed_s": row["elapsed_s"]}
+    if row["state"] == "done" and row["result"]:
+        out.update(json.loads(row["result"]))
+    elif row["state"] == "error":
+        out["error"] = {"code": "BacktestFailed", "message": row["error"]}
+    return out
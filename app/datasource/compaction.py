@@ -0,0 +1,156 @@
+"""Monthly compaction of day partitions.
+
+``compact_month`` merges ``<table>/year=YYYY/month=MM/day=DD/part-0000.parquet``
+into a single ``year=YYYY/month=MM/part-0000.parquet`` sorted by
+(``ts_code``, ``trade_date``). The new month is staged under
+``<table>/_compaction/`` (ignored by both readers) and swapped in by directory
+rename under the table's exclusive layout lock (:func:`.locks.layout_lock`).
+Every scan and every partition write holds that lock shared, so no reader sees
+the month missing between the two renames, and before swapping the month's
+inputs are re-listed: a day written or rewritten after they were read makes
+the merge start over instead of being deleted with the old month directory.
+The watermark is touched before the lock is released: cached datasets
+re-discover and the data snapshot id (ETags, response caches) moves.
+
+A day partition written into an already compacted month (late backfill) simply
+sits next to the month file until the next run folds it in, replacing rows with
+the same (``ts_code``, ``trade_date``).
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .locks import layout_lock
+from .parquet_io import write_table
+from .paths import PARQUET_DIR
+from .watermark import touch_watermark
+
+
+SORT_KEYS = ("ts_code", "trade_date")
+# one month of the full market (~5k codes x 22 days) fits in a single row group
+ROW_GROUP_ROWS = 1 << 20
+STAGING_DIR = "_compaction"
+# merges redone when days keep landing in the month while it is staged
+MAX_ATTEMPTS = 3
+
+
+@dataclass
+class CompactionResult:
+    table: str
+    month: str
+    files_in: int
+    rows: int
+    bytes_before: int
+    bytes_after: int
+    elapsed_s: float
+
+
+def _month_dir(table: str, year: int, month: int) -> Path:
+    return PARQUET_DIR / table / f"year={year:04d}" / f"month={month:02d}"
+
+
+def _read_month(month_file: Path, day_files: list[Path]) -> pa.Table:
+    parts = [pq.read_table(f).replace_schema_metadata(None) for f in ([month_file] if month_file.exists() else []) + day_files]
+    merged = pa.concat_tables(parts, promote_options="permissive")
+    keys = [k for k in SORT_KEYS if k in merged.column_names]
+    if not keys:
+        return merged
+    if month_file.exists():
+        # day files come last, so keep the last occurrence of each key
+        dup = merged.select(keys).to_pandas().duplicated(keep="last").to_numpy()
+        merged = merged.filter(pa.array(~dup))
+    return merged.sort_by([(k, "ascending") for k in keys])
+
+
+def _inputs(month_dir: Path) -> list[Path]:
+    """The month file (if any) followed by the day files, in merge order."""
+    month_file = month_dir / "part-0000.parquet"
+    return ([month_file] if month_file.exists() else []) + sorted(month_dir.glob("day=*/*.parquet"))
+
+
+def _signature(files: list[Path]) -> list[tuple[str, int, int]]:
+    out = []
+    for f in files:
+        st = f.stat()
+        out.append((str(f), st.st_mtime_ns, st.st_size))
+    return out
+
+
+def compact_month(table: str, year: int, month: int) -> Optional[CompactionResult]:
+    """Merge one month's day partitions; returns None when there is nothing to do.
+
+    The inputs are read without the lock; if a day was written or rewritten
+    meanwhile, the signature check under the exclusive lock fails and the merge
+    is redone (up to ``MAX_ATTEMPTS``, then the month is left for the next run).
+    """
+    month_dir = _month_dir(table, year, month)
+    t0 = time.perf_counter()
+    month_file = month_dir / "part-0000.parquet"
+    staging = PARQUET_DIR / table / STAGING_DIR
+    for _ in range(MAX_ATTEMPTS):
+        inputs = _inputs(month_dir)
+        day_files = [f for f in inputs if f != month_file]
+        if not day_files:
+            return None
+        signature = _signature(inputs)
+        bytes_before = sum(size for _, _, size in signature)
+        merged = _read_month(month_file, day_files)
+
+        staged = staging / f"{year:04d}-{month:02d}.{os.getpid()}"
+        shutil.rmtree(staged, ignore_errors=True)
+        staged.mkdir(parents=True)
+        write_table(merged, staged / "part-0000.parquet", row_group_size=ROW_GROUP_ROWS)
+
+        # swap: two renames on the same filesystem; scans and writers wait on the lock meanwhile
+        replaced = staging / f"replaced-{year:04d}-{month:02d}.{time.time_ns()}"
+        with layout_lock(table):
+            swapped = _signature(_inputs(month_dir)) == signature
+            if swapped:
+                month_dir.rename(replaced)
+                staged.rename(month_dir)
+                touch_watermark()
+        if swapped:
+            shutil.rmtree(replaced, ignore_errors=True)
+            break
+        shutil.rmtree(staged, ignore_errors=True)
+    else:
+        return None
+
+    return CompactionResult(
+        table=table,
+        month=f"{year:04d}-{month:02d}",
+        files_in=len(inputs),
+        rows=merged.num_rows,
+        bytes_before=bytes_before,
+        bytes_after=(month_dir / "part-0000.parquet").stat().st_size,
+        elapsed_s=time.perf_counter() - t0,
+    )
+
+
+def compact_closed_months(today: Optional[date] = None, tables: Optional[list[str]] = None) -> list[CompactionResult]:
+    """Compact every month before ``today``'s month; the current month stays writable."""
+    today = today or date.today()
+    current = (today.year, today.month)
+    if tables is None:
+        tables = sorted(p.name for p in PARQUET_DIR.glob("*") if p.is_dir() and not p.name.startswith(("_", ".")))
+    results: list[CompactionResult] = []
+    for table in tables:
+        for month_dir in sorted((PARQUET_DIR / table).glob("year=*/month=*")):
+            year = int(month_dir.parent.name.split("=", 1)[1])
+            month = int(month_dir.name.split("=", 1)[1])
+            if (year, month) >= current:
+                continue
+            result = compact_month(table, year, month)
+            if result is not None:
+                results.append(result)
+    return results
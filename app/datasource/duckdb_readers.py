@@ -0,0 +1,184 @@
+"""DuckDB implementation of the reader API.
+
+Same contract as :mod:`app.datasource.readers`, but the prices ⋈ adj_factor
+(⋈ daily_basic) join, the date/ts_code pruning and the column projection run
+inside one SQL query over the cached ``pyarrow`` datasets. Selected with
+``settings.query_engine = "duckdb"``.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import ExitStack
+from datetime import date
+from typing import Optional
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from .locks import layout_lock
+from .readers import (
+    ADJ_COLUMNS,
+    BASIC_COLUMNS,
+    PRICE_COLUMNS,
+    TRADABILITY_COLUMNS,
+    _dataset,
+    _to_pandas,
+)
+
+
+_DB: Optional[duckdb.DuckDBPyConnection] = None
+_DB_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+def _cursor() -> duckdb.DuckDBPyConnection:
+    """Per-thread cursor on one process-wide in-memory database.
+
+    Cursors share the database (and DuckDB's metadata/object cache) but are safe
+    to use concurrently from the API threadpool.
+    """
+    global _DB
+    cur = getattr(_LOCAL, "cursor", None)
+    if cur is not None:
+        return cur
+    with _DB_LOCK:
+        if _DB is None:
+            _DB = duckdb.connect(database=":memory:")
+            _DB.execute("SET enable_object_cache=true")
+    cur = _DB.cursor()
+    _LOCAL.cursor = cur
+    return cur
+
+
+def _layout_locks(*tables: str) -> ExitStack:
+    """Shared layout locks on ``tables`` (see :func:`.locks.layout_lock`), held for one query."""
+    stack = ExitStack()
+    for table in tables:
+        stack.enter_context(layout_lock(table, shared=True))
+    return stack
+
+
+def _source(table: str) -> Optional[ds.Dataset]:
+    """Cached dataset of ``table`` (see :func:`.readers._dataset`), ``None`` if missing.
+
+    Registered with DuckDB as a view, so a query reuses the watermark-keyed
+    fragment list and unified schema instead of re-globbing the tree and
+    reading every footer; projection and filters are pushed into the scan.
+    """
+    try:
+        return _dataset(table)
+    except FileNotFoundError:
+        return None
+
+
+def _where(alias: str, ts_codes: Optional[list[str]], start: Optional[date], end: Optional[date]) -> tuple[str, list]:
+    clauses: list[str] = []
+    params: list = []
+    if start is not None:
+        # the hive ``year`` key prunes whole directories before any footer is opened
+        clauses += [f"{alias}.year >= ?", f"{alias}.trade_date >= ?"]
+        params += [start.year, start]
+    if end is not None:
+        clauses += [f"{alias}.year <= ?", f"{alias}.trade_date <= ?"]
+        params += [end.year, end]
+    if ts_codes:
+        codes = sorted(set(ts_codes))
+        clauses.append(f"{alias}.ts_code IN ({','.join('?' * len(codes))})")
+        params.extend(codes)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _scan_sql(table: str, alias: str, columns: list[str], ts_codes, start, end) -> tuple[str, list]:
+    where, params = _where(alias, ts_codes, start, end)
+    cols = ", ".join(f"{alias}.{c}" for c in columns)
+    return f"SELECT {cols} FROM {table} {alias}{where}", params
+
+
+def _query(sql: str, params: list, sources: dict[str, ds.Dataset]) -> pa.Table:
+    """Run ``sql`` with each dataset registered under its table name."""
+    cur = _cursor()
+    try:
+        for name, dataset in sources.items():
+            cur.register(name, dataset)
+        return cur.execute(sql, params).fetch_arrow_table()
+    finally:
+        for name in sources:
+            cur.unregister(name)
+
+
+def read_prices_and_adj(
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+    include_basic: bool = False,
+    tradable_only: bool = False,
+) -> pd.DataFrame:
+    with _layout_locks("prices_daily", "adj_factor", *(["daily_basic"] if include_basic else [])):
+        return _read_prices_and_adj(ts_codes, start, end, include_basic, tradable_only)
+
+
+def _read_prices_and_adj(
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+    include_basic: bool,
+    tradable_only: bool,
+) -> pd.DataFrame:
+    columns = PRICE_COLUMNS + ["adj_factor"] + (["turnover_rate"] if include_basic else [])
+    prices = _source("prices_daily")
+    if prices is None:
+        return pd.DataFrame(columns=columns)
+    # the tradability columns only exist in partitions written since they were introduced
+    stored = [c for c in TRADABILITY_COLUMNS if c in prices.schema.names]
+    prices_sql, params = _scan_sql("prices_daily", "p", PRICE_COLUMNS + stored, ts_codes, start, end)
+    if tradable_only:
+        cond = "COALESCE(NOT p.mask_untradable, p.volume > 0)" if "mask_untradable" in stored else "p.volume > 0"
+        prices_sql += (" AND " if " WHERE " in prices_sql else " WHERE ") + cond
+
+    sources = {"prices_daily": prices}
+    ctes = [f"p AS ({prices_sql})"]
+    select = ["p.*"]
+    joins = []
+    adj = _source("adj_factor")
+    if adj is not None:
+        adj_sql, adj_params = _scan_sql("adj_factor", "a", ADJ_COLUMNS, ts_codes, start, end)
+        sources["adj_factor"] = adj
+        ctes.append(f"a AS ({adj_sql})")
+        params += adj_params
+        select.append("a.adj_factor")
+        joins.append("LEFT JOIN a USING (ts_code, trade_date)")
+    else:
+        select.append("CAST(NULL AS DOUBLE) AS adj_factor")
+    if include_basic:
+        basic = _source("daily_basic")
+        if basic is not None:
+            basic_sql, basic_params = _scan_sql("daily_basic", "b", ["ts_code", "trade_date", "turnover_rate"], ts_codes, start, end)
+            sources["daily_basic"] = basic
+            ctes.append(f"b AS ({basic_sql})")
+            params += basic_params
+            select.append("b.turnover_rate")
+            joins.append("LEFT JOIN b USING (ts_code, trade_date)")
+        else:
+            select.append("CAST(NULL AS DOUBLE) AS turnover_rate")
+
+    sql = f"WITH {', '.join(ctes)} SELECT {', '.join(select)} FROM p {' '.join(joins)}"
+    df = _to_pandas(_query(sql, params, sources))
+    if adj is None:
+        df["adj_factor"] = pd.NA
+    return df
+
+
+def read_daily_basic(
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+) -> pd.DataFrame:
+    with _layout_locks("daily_basic"):
+        basic = _source("daily_basic")
+        if basic is None:
+            return pd.DataFrame(columns=BASIC_COLUMNS)
+        sql, params = _scan_sql("daily_basic", "b", BASIC_COLUMNS, ts_codes, start, end)
+        return _to_pandas(_query(sql, params, {"daily_basic": basic}))
@@ -0,0 +1,129 @@
+"""Write-time derived columns for ``prices_daily``.
+
+``enrich_prices`` runs in the ingest path just before the Parquet write and
+adds, as column operations over the whole day (or range) frame:
+
+* ``pre_close`` where the source left it empty: the code's previous close in
+  the same frame, else its last close in earlier partitions;
+* ``is_trading``: ``volume > 0`` (spec §0);
+* ``mask_untradable``: no volume (which covers the spec's suspension rule,
+  ``volume = 0`` with the close unchanged within ``max(tick_size, 0.0005 *
+  pre_close)``), or closing within half a tick of the board's
+  limit-up/limit-down price computed from ``pre_close``.
+
+Board limits: main board ``limit_pct_main``, ChiNext (300/301.SZ, from the
+2020-08-24 registration reform) and STAR (688/689.SH) ``limit_pct_growth``,
+Beijing ``limit_pct_bse``, main-board ST names ``limit_pct_st``. ST status is
+taken from the current stock_basic names, so historical ST periods are an
+approximation.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.settings import settings
+
+from .readers import TRADABILITY_COLUMNS, read_prices, read_stock_basic
+
+
+GROWTH_REFORM_DATE = date(2020, 8, 24)
+# calendar days searched back for a pre_close the source did not send
+PRE_CLOSE_LOOKBACK_DAYS = 30
+
+
+def st_codes() -> set[str]:
+    basic = read_stock_basic()
+    if basic.empty:
+        return set()
+    names = basic["name"].astype(str)
+    return set(basic.loc[names.str.contains("ST", regex=False), "ts_code"].astype(str))
+
+
+def limit_pct(ts_code: pd.Series, trade_date: pd.Series, st: set[str]) -> np.ndarray:
+    """Daily price-limit fraction per row by board (and ST status on the main board)."""
+    code = ts_code.astype(str)
+    prefix = code.str[:3]
+    exchange = code.str[-2:]
+    after_reform = pd.to_datetime(trade_date).dt.date >= GROWTH_REFORM_DATE
+    growth = ((exchange == "SZ") & prefix.isin(["300", "301"]) & after_reform) | ((exchange == "SH") & prefix.isin(["688", "689"]))
+    bse = exchange == "BJ"
+    out = np.full(len(code), settings.limit_pct_main)
+    out[code.isin(st).to_numpy()] = settings.limit_pct_st
+    out[growth.to_numpy()] = settings.limit_pct_growth
+    out[bse.to_numpy()] = settings.limit_pct_bse
+    return out
+
+
+def previous_close(dt: date, ts_codes: list[str]) -> pd.Series:
+    """Last ``close_raw`` before ``dt`` per code (from stored partitions), indexed by ts_code."""
+    if not ts_codes:
+        return pd.Series(dtype=float)
+    prior = read_prices(ts_codes, dt - timedelta(days=PRE_CLOSE_LOOKBACK_DAYS), dt - timedelta(days=1), columns=["ts_code", "trade_date", "close_raw"])
+    if prior.empty:
+        return pd.Series(dtype=float)
+    prior = prior.sort_values(["ts_code", "trade_date"], kind="mergesort").groupby("ts_code", sort=False).tail(1)
+    return pd.Series(pd.to_numeric(prior["close_raw"], errors="coerce").to_numpy(), index=prior["ts_code"].astype(str).to_numpy())
+
+
+def fill_pre_close(df: pd.DataFrame) -> pd.Series:
+    """``pre_close`` with gaps filled from the previous row of the same code, then from storage."""
+    pre = pd.to_numeric(df["pre_close"], errors="coerce") if "pre_close" in df.columns else pd.Series(np.nan, index=df.index)
+    missing = pre.isna()
+    if not missing.any():
+        return pre
+    order = df.sort_values(["ts_code", "trade_date"], kind="mergesort").index
+    close = pd.to_numeric(df["close_raw"], errors="coerce")
+    prev_in_frame = close.loc[order].groupby(df.loc[order, "ts_code"], sort=False).shift(1).reindex(df.index)
+    pre = pre.fillna(prev_in_frame)
+    missing = pre.isna()
+    if missing.any():
+        first_day = pd.to_datetime(df["trade_date"]).dt.date.min()
+        codes = sorted(df.loc[missing, "ts_code"].astype(str).unique())
+        stored = previous_close(first_day, codes)
+        pre = pre.fillna(df["ts_code"].astype(str).map(stored))
+    return pre
+
+
+def limit_price(pre_close: np.ndarray, pct: np.ndarray) -> np.ndarray:
+    """``pre_close * (1 + pct)`` rounded half-up to the cent, as the exchanges price limits.
+
+    ``np.round`` rounds the binary product half to even, which lands a cent low
+    on halves such as 1.15 * 1.1 = 1.265 (limit 1.27); the epsilon absorbs
+    that representation error.
+    """
+    return np.floor(pre_close * (1 + pct) * 100 + 0.5 + 1e-9) / 100
+
+
+def derive_tradability(df: pd.DataFrame, st: set[str], tick_size: Optional[float] = None) -> pd.DataFrame:
+    """``is_trading`` and ``mask_untradable`` from close_raw, pre_close and volume (pure, vectorized)."""
+    tick = settings.tick_size if tick_size is None else tick_size
+    close = pd.to_numeric(df["close_raw"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    pre = pd.to_numeric(df["pre_close"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    volume = pd.to_numeric(df["volume"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+    is_trading = volume > 0
+    pct = limit_pct(df["ts_code"], df["trade_date"], st)
+    up = limit_price(pre, pct)
+    down = limit_price(pre, -pct)
+    at_limit = (close >= up - tick / 2) | (close <= down + tick / 2)
+    # comparisons with NaN are False, so rows without pre_close only get the volume rule
+    return pd.DataFrame(
+        {"is_trading": is_trading, "mask_untradable": ~is_trading | at_limit},
+        index=df.index,
+    )
+
+
+def enrich_prices(df: pd.DataFrame, st: Optional[set[str]] = None) -> pd.DataFrame:
+    """``df`` with pre_close filled and the tradability columns added; empty frames pass through."""
+    if df.empty:
+        return df
+    out = df.copy()
+    out["pre_close"] = fill_pre_close(out).astype(float)
+    flags = derive_tradability(out, st_codes() if st is None else st)
+    out[TRADABILITY_COLUMNS] = flags[TRADABILITY_COLUMNS]
+    return out
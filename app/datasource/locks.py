@@ -0,0 +1,60 @@
+"""Inter-process file locks (``fcntl.flock``).
+
+The scheduler, CLI jobs (backfill, rebuilds) and the API run as separate
+processes over the same ``data/``; a ``threading.Lock`` only orders threads of
+one of them. Locks are advisory and released when the descriptor closes, so a
+crashed holder never leaves one behind.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import ContextManager, Iterator
+
+from .paths import PARQUET_DIR
+
+
+# inside the table directory; the leading underscore keeps it out of dataset discovery
+LAYOUT_LOCK = "_layout.lock"
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False) -> Iterator[None]:
+    """Hold ``flock`` on ``path`` (created if missing): shared, or exclusive."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def layout_lock(table: str, shared: bool = False) -> ContextManager[None]:
+    """Per-table file layout lock: scans hold it shared, compaction's swap exclusively.
+
+    Taking it shared on a table that does not exist yet is a no-op, so readers
+    never create table directories.
+    """
+    table_dir = PARQUET_DIR / table
+    if shared and not table_dir.is_dir():
+        return nullcontext()
+    return file_lock(table_dir / LAYOUT_LOCK, shared=shared)
+
+
+def partition_write_lock(path: Path) -> ContextManager[None]:
+    """Shared layout lock of the table ``path`` is written into; no-op outside ``PARQUET_DIR``.
+
+    Partition writers hold it so compaction's swap, which takes it exclusively,
+    never runs in the middle of a write and sees every day written before it.
+    """
+    try:
+        rel = path.absolute().relative_to(PARQUET_DIR.absolute())
+    except ValueError:
+        return nullcontext()
+    if len(rel.parts) < 2:
+        return nullcontext()
+    return layout_lock(rel.parts[0], shared=True)
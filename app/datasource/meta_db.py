@@ -0,0 +1,203 @@
+"""Shared access to ``meta.sqlite``.
+
+The schema is created once per process (``migrate()``, called at API/scheduler
+startup and lazily on first use). Connections are thread-local and long-lived,
+so sqlite3's per-connection statement cache keeps queries prepared; the
+database runs in WAL mode with a busy timeout, and writes go through
+``transaction()`` which takes the write lock up front (``BEGIN IMMEDIATE``) so
+the busy handler applies instead of failing with "database is locked" on a
+read-to-write upgrade.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from app.settings import settings
+
+from .paths import META_SQLITE
+
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS fail_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        endpoint TEXT NOT NULL,
+        params TEXT NOT NULL,
+        retries INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        last_run TIMESTAMP,
+        state TEXT,
+        next_run TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fetch_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        endpoint TEXT NOT NULL,
+        params TEXT,
+        symbols INTEGER NOT NULL,
+        ok INTEGER NOT NULL,
+        empty INTEGER NOT NULL,
+        failed INTEGER NOT NULL,
+        requests INTEGER NOT NULL,
+        elapsed_s REAL NOT NULL,
+        symbols_per_s REAL NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS watermarks (
+        table_name TEXT PRIMARY KEY,
+        last_dt TEXT NOT NULL,
+        rowcount INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS watermark_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO watermark_meta(id, version) VALUES (1, 0)",
+    """
+    CREATE TABLE IF NOT EXISTS backfill_progress (
+        provider TEXT NOT NULL,
+        trade_date TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        elapsed_s REAL NOT NULL,
+        done_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (provider, trade_date)
+    )
+    """,
+    # legacy single-row watchlist; migrated into watchlist_items by migrate()
+    """
+    CREATE TABLE IF NOT EXISTS watchlist (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        ts_codes TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS watchlists (
+        list_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "INSERT OR IGNORE INTO watchlists(list_id, name) VALUES (1, 'default')",
+    """
+    CREATE TABLE IF NOT EXISTS watchlist_items (
+        list_id INTEGER NOT NULL,
+        ts_code TEXT NOT NULL,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        position INTEGER NOT NULL,
+        PRIMARY KEY (list_id, ts_code)
+    )
+    """,
+    # keyset pagination: WHERE list_id = ? AND position > ? ORDER BY position
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_watchlist_items_position ON watchlist_items(list_id, position)",
+    """
+    CREATE TABLE IF NOT EXISTS backtest_runs (
+        run_id TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        config TEXT NOT NULL,
+        result TEXT,
+        error TEXT,
+        elapsed_s REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    """,
+]
+
+
+def _migrate_legacy_watchlist(conn: sqlite3.Connection) -> None:
+    # the comma-joined row becomes the 'default' list, in its (sorted) order
+    row = conn.execute("SELECT ts_codes FROM watchlist WHERE id = 1").fetchone()
+    if not row or not row[0]:
+        return
+    if conn.execute("SELECT 1 FROM watchlist_items WHERE list_id = 1 LIMIT 1").fetchone() is None:
+        codes = [c for c in row[0].split(",") if c]
+        conn.executemany(
+            "INSERT OR IGNORE INTO watchlist_items(list_id, ts_code, position) VALUES (1, ?, ?)",
+            [(code, i) for i, code in enumerate(codes, start=1)],
+        )
+    conn.execute("DELETE FROM watchlist WHERE id = 1")
+
+
+_MIGRATED: set[str] = set()
+_MIGRATE_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+def _db_path() -> str:
+    # absolute, so a chdir (benchmarks, tests) opens the right database
+    return os.path.abspath(META_SQLITE)
+
+
+def _open(path: str) -> sqlite3.Connection:
+    timeout_ms = settings.meta_busy_timeout_ms
+    # isolation_level=None: autocommit reads, explicit transactions for writes
+    conn = sqlite3.connect(path, timeout=timeout_ms / 1000, isolation_level=None, cached_statements=256)
+    conn.execute(f"PRAGMA busy_timeout = {int(timeout_ms)}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def migrate() -> None:
+    """Create the schema and switch to WAL; runs once per process per database."""
+    path = _db_path()
+    with _MIGRATE_LOCK:
+        if path in _MIGRATED:
+            return
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = _open(path)
+        try:
+            # persistent in the database file; readers no longer block the writer
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            for ddl in SCHEMA:
+                conn.execute(ddl)
+            _migrate_legacy_watchlist(conn)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        _MIGRATED.add(path)
+
+
+def connect() -> sqlite3.Connection:
+    """This thread's connection to meta.sqlite (opened on first use)."""
+    path = _db_path()
+    cached = getattr(_LOCAL, "conn", None)
+    if cached is not None and cached[0] == path:
+        return cached[1]
+    migrate()
+    conn = _open(path)
+    _LOCAL.conn = (path, conn)
+    return conn
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """Write transaction on this thread's connection (``BEGIN IMMEDIATE``)."""
+    conn = connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
@@ -0,0 +1,420 @@
+"""Memory-mapped (trade_date x ts_code) panel of back-adjusted prices.
+
+Layout under ``data/panel_cache/``::
+
+    meta.json          dates, codes, capacities, generation
+    g0001/<column>.bin one C-order array per column, shape
+                       (date_capacity, code_capacity), row = trade date
+
+Prices are stored back-adjusted (``raw * adj_factor``, the factor carried
+forward per code), which never changes for a day once written, so a new day
+is a single appended row. Forward-adjusted values are ``hfq / latest factor``
+per code; ``adj_factor`` is kept as its own column for that. ``p_score`` is
+filled from signals_daily by :func:`put_scores` once a day's rankings are
+computed, giving every code's score history as one column slice.
+
+Writers (``daily_job``, backfills, rebuilds from the CLI) serialize on an
+``flock`` of ``write.lock`` across processes, fill rows past the published
+ones first and then replace ``meta.json`` atomically; readers only look at
+the first ``len(dates)`` rows and ``len(codes)`` columns listed there, so a
+half-written day is never visible. Files grow by whole date chunks in place;
+running out of code slots, or rewriting an already published day (a same-day
+rerun), re-lays the panel out into a new generation directory instead. The
+previous generation is kept for readers that loaded the old ``meta.json``
+just before the switch (older ones are unlinked; a reader that still loses
+the race reloads once). Every process maps the same files read-only, so
+uvicorn workers and backtest processes share one copy through the page cache.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from contextlib import AbstractContextManager
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .locks import file_lock
+from .paths import PANEL_CACHE_DIR
+from .readers import read_prices, read_prices_and_adj, read_signals
+
+
+# column -> (dtype, source column in prices_daily)
+COLUMNS: dict[str, tuple[str, Optional[str]]] = {
+    "open": ("float32", "open_raw"),
+    "high": ("float32", "high_raw"),
+    "low": ("float32", "low_raw"),
+    "close": ("float32", "close_raw"),
+    "volume": ("float32", "volume"),
+    "amount": ("float32", "amount"),
+    "adj_factor": ("float32", None),
+    "is_trading": ("uint8", None),
+    "mask_untradable": ("uint8", None),
+    "p_score": ("float32", None),
+}
+ADJUSTED = ("open", "high", "low", "close")
+# written by put_scores from signals_daily, not from prices
+SCORES = ("p_score",)
+META_FILE = "meta.json"
+WRITE_LOCK = "write.lock"
+VERSION = 3
+# rows added whenever the date axis runs out (~1 trading year)
+DATE_CHUNK = 256
+# spare code slots reserved on every (re)layout for new listings
+CODE_SLACK = 256
+
+
+@dataclass(frozen=True)
+class _Meta:
+    generation: int
+    dates: list[date]
+    codes: list[str]
+    date_capacity: int
+    code_capacity: int
+
+    @classmethod
+    def load(cls, root: Path) -> Optional["_Meta"]:
+        path = root / META_FILE
+        if not path.exists():
+            return None
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        if raw.get("version") != VERSION:
+            return None
+        return cls(
+            generation=int(raw["generation"]),
+            dates=[date.fromisoformat(d) for d in raw["dates"]],
+            codes=list(raw["codes"]),
+            date_capacity=int(raw["date_capacity"]),
+            code_capacity=int(raw["code_capacity"]),
+        )
+
+    def save(self, root: Path) -> None:
+        body = {
+            "version": VERSION,
+            "generation": self.generation,
+            "date_capacity": self.date_capacity,
+            "code_capacity": self.code_capacity,
+            "columns": {name: dtype for name, (dtype, _) in COLUMNS.items()},
+            "dates": [d.isoformat() for d in self.dates],
+            "codes": self.codes,
+        }
+        tmp = root / (META_FILE + ".tmp")
+        tmp.write_text(json.dumps(body, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, root / META_FILE)
+
+
+def _gen_dir(root: Path, generation: int) -> Path:
+    return root / f"g{generation:04d}"
+
+
+def _write_lock(root: Path) -> AbstractContextManager[None]:
+    # held by one writer across all processes (scheduler, CLI backfill/rebuild)
+    return file_lock(root / WRITE_LOCK)
+
+
+def _open_column(root: Path, meta: _Meta, name: str, mode: str) -> np.memmap:
+    dtype = COLUMNS[name][0]
+    return np.memmap(_gen_dir(root, meta.generation) / f"{name}.bin", dtype=dtype, mode=mode, shape=(meta.date_capacity, meta.code_capacity))
+
+
+def _allocate(root: Path, generation: int, date_capacity: int, code_capacity: int) -> None:
+    """Create (or grow in place) the column files of ``generation``; new space reads as empty."""
+    gen = _gen_dir(root, generation)
+    gen.mkdir(parents=True, exist_ok=True)
+    for name, (dtype, _) in COLUMNS.items():
+        path = gen / f"{name}.bin"
+        size = date_capacity * code_capacity * np.dtype(dtype).itemsize
+        old = path.stat().st_size if path.exists() else 0
+        if old >= size:
+            continue
+        with open(path, "r+b" if old else "wb") as f:
+            f.truncate(size)
+        if dtype.startswith("float"):
+            arr = np.memmap(path, dtype=dtype, mode="r+", shape=(date_capacity, code_capacity))
+            arr.reshape(-1)[old // np.dtype(dtype).itemsize:] = np.nan
+            arr.flush()
+            del arr
+
+
+def _relayout(root: Path, meta: Optional[_Meta], codes: list[str], date_capacity: int, keep_dates: int = 0) -> _Meta:
+    """Move to a new generation with room for ``codes``, copying the first
+    ``keep_dates`` rows of ``meta``; returns the unsaved meta."""
+    generation = (meta.generation if meta else 0) + 1
+    code_capacity = len(codes) + CODE_SLACK
+    shutil.rmtree(_gen_dir(root, generation), ignore_errors=True)
+    _allocate(root, generation, date_capacity, code_capacity)
+    n = min(keep_dates, len(meta.dates)) if meta else 0
+    new = _Meta(generation, list(meta.dates[:n]) if meta else [], codes, date_capacity, code_capacity)
+    if meta and n:
+        k = len(meta.codes)
+        for name in COLUMNS:
+            src = _open_column(root, meta, name, "r")
+            dst = _open_column(root, new, name, "r+")
+            dst[:n, :k] = src[:n, :k]
+            dst.flush()
+            del src, dst
+    return new
+
+
+def _drop_old_generations(root: Path, current: int) -> None:
+    """Unlink generations older than the one before ``current``.
+
+    The previous generation stays for readers that loaded the old meta.json
+    and are about to map it; files already mapped survive the unlink (POSIX).
+    """
+    keep = {_gen_dir(root, current).name, _gen_dir(root, current - 1).name}
+    for path in root.glob("g*"):
+        if path.is_dir() and path.name not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _write_rows(root: Path, meta: Optional[_Meta], frame: pd.DataFrame, reset: bool = False) -> _Meta:
+    """Write the trade dates in ``frame`` (all >= the last cached date) as panel rows.
+
+    ``reset`` starts an empty panel in a fresh generation instead of appending
+    to ``meta``. Published rows are never written in place: rewriting the last
+    cached day moves to a new generation holding the rows before it.
+    """
+    frame = frame.copy()
+    frame["trade_date"] = pd.to_datetime(frame["trade_date"]).dt.date
+    frame["ts_code"] = frame["ts_code"].astype(str)
+    days = sorted(frame["trade_date"].unique())
+
+    codes = list(meta.codes) if meta and not reset else []
+    known = set(codes)
+    new_codes = sorted(set(frame["ts_code"].unique()) - known)
+    base_dates = list(meta.dates) if meta and not reset else []
+    rerun = bool(base_dates) and base_dates[-1] == days[0]
+    if rerun:
+        base_dates.pop()  # same-day rerun replaces the last row
+    n_dates = len(base_dates) + len(days)
+
+    if meta is None or reset or rerun or len(codes) + len(new_codes) > meta.code_capacity:
+        date_capacity = max(meta.date_capacity if meta and not reset else 0, -(-n_dates // DATE_CHUNK) * DATE_CHUNK)
+        meta = _relayout(root, meta, codes + new_codes, date_capacity, keep_dates=len(base_dates))
+    else:
+        if n_dates > meta.date_capacity:
+            date_capacity = -(-n_dates // DATE_CHUNK) * DATE_CHUNK
+            _allocate(root, meta.generation, date_capacity, meta.code_capacity)
+            meta = _Meta(meta.generation, meta.dates, meta.codes, date_capacity, meta.code_capacity)
+        meta = _Meta(meta.generation, meta.dates, codes + new_codes, meta.date_capacity, meta.code_capacity)
+    codes = meta.codes
+
+    row0 = len(base_dates)
+    rows = pd.Index(days).get_indexer(frame["trade_date"])
+    cols = pd.Index(codes).get_indexer(frame["ts_code"])
+    shape = (len(days), len(codes))
+
+    def block(column: str) -> np.ndarray:
+        out = np.full(shape, np.nan, dtype=np.float32)
+        if column in frame.columns:
+            out[rows, cols] = pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+        return out
+
+    factor = block("adj_factor")
+    arrays = {name: _open_column(root, meta, name, "r+") for name in COLUMNS}
+    # carry factors forward per code, from the last cached row into the new block
+    prev = np.array(arrays["adj_factor"][row0 - 1, : len(codes)]) if row0 else np.full(len(codes), np.nan, dtype=np.float32)
+    for i in range(len(days)):
+        factor[i] = np.where(np.isnan(factor[i]), prev, factor[i])
+        prev = factor[i]
+    factor = np.where(np.isnan(factor), np.float32(1.0), factor)
+
+    volume = block("volume")
+    # stored flags where the partition has them, else the volume rule
+    stored_trading, stored_mask = block("is_trading"), block("mask_untradable")
+    trading = np.where(np.isnan(stored_trading), volume > 0, stored_trading > 0)
+    untradable = np.where(np.isnan(stored_mask), ~(volume > 0), stored_mask > 0)
+    arrays["adj_factor"][row0 : row0 + len(days), : len(codes)] = factor
+    arrays["is_trading"][row0 : row0 + len(days), : len(codes)] = trading.astype(np.uint8)
+    arrays["mask_untradable"][row0 : row0 + len(days), : len(codes)] = untradable.astype(np.uint8)
+    arrays["volume"][row0 : row0 + len(days), : len(codes)] = volume
+    arrays["amount"][row0 : row0 + len(days), : len(codes)] = block("amount")
+    for name in ADJUSTED:
+        arrays[name][row0 : row0 + len(days), : len(codes)] = block(COLUMNS[name][1]) * factor
+    for arr in arrays.values():
+        arr.flush()
+    del arrays
+
+    meta = _Meta(meta.generation, base_dates + days, codes, meta.date_capacity, meta.code_capacity)
+    meta.save(root)
+    _drop_old_generations(root, meta.generation)
+    return meta
+
+
+def _put_scores(root: Path, meta: _Meta, frame: pd.DataFrame) -> int:
+    rows = pd.Index(meta.dates).get_indexer(pd.to_datetime(frame["trade_date"]).dt.date)
+    cols = pd.Index(meta.codes).get_indexer(frame["ts_code"].astype(str))
+    keep = (rows >= 0) & (cols >= 0)
+    for name in SCORES:
+        if name not in frame.columns:
+            continue
+        arr = _open_column(root, meta, name, "r+")
+        arr[rows[keep], cols[keep]] = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)[keep]
+        arr.flush()
+        del arr
+    return int(keep.sum())
+
+
+def put_scores(frame: pd.DataFrame, root: Optional[Path] = None) -> int:
+    """Store signal values (``ts_code``, ``trade_date``, :data:`SCORES`) for dates already in the panel.
+
+    Rows for dates or codes the panel does not have are skipped; returns the
+    cells written. Mapped readers see the values without re-opening.
+    """
+    root = root or PANEL_CACHE_DIR
+    if not root.exists():
+        return 0
+    with _write_lock(root):
+        meta = _Meta.load(root)
+        if meta is None or frame.empty:
+            return 0
+        return _put_scores(root, meta, frame)
+
+
+def rebuild_panel_cache(start: Optional[date] = None, end: Optional[date] = None, root: Optional[Path] = None) -> int:
+    """Rebuild the whole panel from ``prices_daily``/``adj_factor``, a month at a time; returns dates written."""
+    root = root or PANEL_CACHE_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    with _write_lock(root):
+        return _rebuild(root, start, end)
+
+
+def _rebuild(root: Path, start: Optional[date], end: Optional[date]) -> int:
+    days = read_prices(None, start, end, columns=["trade_date"])
+    if days.empty:
+        return 0
+    months = sorted(pd.to_datetime(days["trade_date"]).dt.to_period("M").unique())
+    meta = _Meta.load(root)
+    reset = True
+    for month in months:
+        lo, hi = month.start_time.date(), month.end_time.date()
+        frame = read_prices_and_adj(None, max(lo, start) if start else lo, min(hi, end) if end else hi)
+        if frame.empty:
+            continue
+        meta = _write_rows(root, meta, frame, reset=reset)
+        reset = False
+        signals = read_signals(None, frame["trade_date"].min(), frame["trade_date"].max())
+        if not signals.empty:
+            _put_scores(root, meta, signals)
+    return 0 if reset or meta is None else len(meta.dates)
+
+
+def update_panel_cache(start: date, end: Optional[date] = None, root: Optional[Path] = None) -> int:
+    """Bring the panel up to date after ``[start, end]`` was (re)written; returns dates written.
+
+    Days at or after the last cached date are appended (the last day is
+    overwritten on a rerun); anything earlier means history changed, so the
+    panel is rebuilt.
+    """
+    root = root or PANEL_CACHE_DIR
+    end = end or start
+    root.mkdir(parents=True, exist_ok=True)
+    with _write_lock(root):
+        meta = _Meta.load(root)
+        if meta is None or not meta.dates or start < meta.dates[-1]:
+            return _rebuild(root, None, None)
+        frame = read_prices_and_adj(None, start, end)
+        if frame.empty:
+            return 0
+        _write_rows(root, meta, frame)
+        return int(frame["trade_date"].nunique())
+
+
+class PanelView:
+    """Read-only (dates x codes) views over the mapped column files."""
+
+    def __init__(self, root: Path, meta: _Meta):
+        self.dates = meta.dates
+        self.codes = meta.codes
+        self.generation = meta.generation
+        self._code_index = pd.Index(meta.codes)
+        n, k = len(meta.dates), len(meta.codes)
+        self._columns = {name: _open_column(root, meta, name, "r")[:n, :k] for name in COLUMNS}
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (len(self.dates), len(self.codes))
+
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for arr in self._columns.values())
+
+    def column(self, name: str) -> np.ndarray:
+        """Full (dates x codes) view of one column; no copy."""
+        return self._columns[name]
+
+    def covers(self, start: date, end: date) -> bool:
+        return bool(self.dates) and self.dates[0] <= start and end <= self.dates[-1]
+
+    def date_slice(self, start: Optional[date], end: Optional[date]) -> slice:
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end) if end else len(self.dates)
+        return slice(lo, hi)
+
+    def code_indexer(self, codes: Iterable[str]) -> np.ndarray:
+        """Column positions of ``codes``; -1 for codes not in the panel."""
+        return self._code_index.get_indexer(list(codes))
+
+    def window(self, name: str, start: Optional[date], end: Optional[date], codes: Optional[Iterable[str]] = None) -> np.ndarray:
+        """``name`` over [start, end] for ``codes`` (all codes: a view; otherwise a copy, NaN/0 for unknown codes)."""
+        rows = self._columns[name][self.date_slice(start, end)]
+        if codes is None:
+            return rows
+        idx = self.code_indexer(codes)
+        out = rows[:, np.maximum(idx, 0)]
+        out[:, idx < 0] = np.nan if out.dtype.kind == "f" else 0
+        return out
+
+
+_VIEW: Optional[PanelView] = None
+_VIEW_KEY: Optional[tuple] = None
+_VIEW_LOCK = threading.Lock()
+
+
+def open_panel_cache(root: Optional[Path] = None) -> Optional[PanelView]:
+    """The current panel, re-mapped only when ``meta.json`` changed; None if there is none yet."""
+    global _VIEW, _VIEW_KEY
+    root = root or PANEL_CACHE_DIR
+    try:
+        st = (root / META_FILE).stat()
+    except FileNotFoundError:
+        return None
+    key = (str(root), st.st_mtime_ns, st.st_size)
+    with _VIEW_LOCK:
+        if _VIEW is not None and _VIEW_KEY == key:
+            return _VIEW
+        for attempt in (0, 1):
+            meta = _Meta.load(root)
+            if meta is None or not meta.dates:
+                return None
+            try:
+                view = PanelView(root, meta)
+                break
+            except FileNotFoundError:
+                # a writer unlinked this generation between reading meta.json and mapping it
+                if attempt:
+                    raise
+        _VIEW, _VIEW_KEY = view, key
+        return _VIEW
+
+
+def panel_cache_stats(root: Optional[Path] = None) -> dict[str, Any]:
+    view = open_panel_cache(root)
+    if view is None:
+        return {"dates": 0, "codes": 0}
+    return {
+        "dates": len(view.dates),
+        "codes": len(view.codes),
+        "first": view.dates[0].isoformat(),
+        "last": view.dates[-1].isoformat(),
+        "generation": view.generation,
+        "mb": round(view.nbytes() / 2**20, 1),
+    }
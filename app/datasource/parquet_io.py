@@ -1,40 +1,143 @@
 from __future__ import annotations
 
+import functools
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable, Optional
 
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
 
+from app.settings import settings
 
-def _ensure_parent(path: Path) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
+from .locks import partition_write_lock
 
 
-def write_parquet_atomic(df: pd.DataFrame, dest_tmp: Path, dest_final: Path) -> int:
-    """Write DataFrame to dest_tmp then atomically rename to dest_final.
+@dataclass(frozen=True)
+class WriterProfile:
+    """How partitions are laid out on disk.
 
-    Returns
-    -------
-    int
-        Number of rows written.
+    ``sort_by`` + a bounded ``row_group_size`` make the per-row-group min/max
+    statistics on ``ts_code`` selective, so a single-stock lookup skips every
+    other row group; bloom filters / the page index are written where the
+    installed pyarrow supports them.
     """
-    _ensure_parent(dest_tmp)
 
-    table = pa.Table.from_pandas(df)
+    sort_by: tuple[str, ...] = ()
+    row_group_size: Optional[int] = None  # rows; None = pyarrow default (one group per partition)
+    bloom_filter_columns: tuple[str, ...] = ()
+    write_page_index: bool = False
+
+
+WRITER_PROFILES = {
+    # fetch order, one row group (the original writer)
+    "plain": WriterProfile(),
+    # point lookups: ~5 row groups per full-market day partition
+    "lookup": WriterProfile(
+        sort_by=("ts_code", "trade_date"),
+        row_group_size=1024,
+        bloom_filter_columns=("ts_code",),
+        write_page_index=True,
+    ),
+}
+
+
+def writer_profile(name: Optional[str] = None) -> WriterProfile:
+    name = (name or settings.parquet_writer_profile).lower()
+    try:
+        return WRITER_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown parquet writer profile: {name}") from None
+
+
+@functools.lru_cache(maxsize=None)
+def _bloom_filter_style() -> Optional[str]:
+    """Which bloom filter keyword the installed pyarrow accepts, if any.
+
+    The parameter name differs across versions, so probe with a one-row write.
+    """
+    probe = pa.table({"ts_code": ["000001.SZ"]})
+    candidates = {
+        "options": {"bloom_filter_options": {"ts_code": {"ndv": 16, "fpp": 0.01}}},
+        "columns": {"bloom_filter_enabled": True, "bloom_filter_columns": ["ts_code"]},
+    }
+    for style, kwargs in candidates.items():
+        try:
+            pq.write_table(probe, pa.BufferOutputStream(), **kwargs)
+        except Exception:
+            continue
+        return style
+    return None
+
+
+def _bloom_kwargs(columns: Iterable[str], ndv: int) -> dict[str, Any]:
+    columns = list(columns)
+    style = _bloom_filter_style() if columns else None
+    if style == "options":
+        return {"bloom_filter_options": {c: {"ndv": max(ndv, 1), "fpp": 0.01} for c in columns}}
+    if style == "columns":
+        return {"bloom_filter_enabled": True, "bloom_filter_columns": columns}
+    return {}
+
+
+def write_table(
+    table: pa.Table,
+    dest: Path,
+    profile: Optional[WriterProfile] = None,
+    row_group_size: Optional[int] = None,
+) -> None:
+    """Write ``table`` with the repo's codec settings and a writer profile.
+
+    ``row_group_size`` overrides the profile's (e.g. month files from compaction).
+    """
+    profile = profile or writer_profile()
+    keys = [k for k in profile.sort_by if k in table.column_names]
+    kwargs: dict[str, Any] = {}
+    if keys:
+        table = table.sort_by([(k, "ascending") for k in keys])
+        kwargs["sorting_columns"] = [pq.SortingColumn(table.column_names.index(k)) for k in keys]
+    bloom = [c for c in profile.bloom_filter_columns if c in table.column_names]
+    if bloom:
+        kwargs.update(_bloom_kwargs(bloom, ndv=table.num_rows))
+    if profile.write_page_index:
+        kwargs["write_page_index"] = True
     pq.write_table(
         table,
-        dest_tmp,
+        dest,
         compression="zstd",
         use_dictionary=True,
         data_page_size=1024 * 1024,
         write_statistics=True,
+        row_group_size=row_group_size or profile.row_group_size,
+        **kwargs,
     )
 
-    # Atomic rename
-    dest_tmp.replace(dest_final) if dest_final.exists() else dest_tmp.rename(dest_final)
 
-    return len(df)
+def _ensure_parent(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+
+def write_parquet_atomic(df: pd.DataFrame, dest_tmp: Path, dest_final: Path, profile: Optional[WriterProfile] = None) -> int:
+    """Write DataFrame to dest_tmp then atomically rename to dest_final.
 
+    Layout (sort order, row groups, bloom filters) follows ``profile``, by
+    default ``settings.parquet_writer_profile``. Writes under ``PARQUET_DIR``
+    hold the table's layout lock shared, so monthly compaction never swaps a
+    month while a day is being written into it.
 
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    table = pa.Table.from_pandas(df)
+    # a write into a table partition holds its layout lock shared (see compaction)
+    with partition_write_lock(dest_final):
+        _ensure_parent(dest_tmp)
+        write_table(table, dest_tmp, profile)
+
+        # Atomic rename
+        dest_tmp.replace(dest_final) if dest_final.exists() else dest_tmp.rename(dest_final)
+
+    return len(df)
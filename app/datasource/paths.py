@@ -9,6 +9,11 @@ DATA_DIR = Path("data")
 PARQUET_DIR = DATA_DIR / "parquet"
 META_SQLITE = DATA_DIR / "meta.sqlite"
 WATERMARK_PARQUET = DATA_DIR / "watermark.parquet"
+API_CACHE_DIR = DATA_DIR / "cache" / "api"
+SIGNALS_STATE_PARQUET = DATA_DIR / "signals_state.parquet"
+UNIVERSE_STATE_DIR = DATA_DIR / "universe_state"
+STOCK_BASIC_PARQUET = DATA_DIR / "stock_basic.parquet"
+PANEL_CACHE_DIR = DATA_DIR / "panel_cache"
 
 
 @dataclass(frozen=True)
@@ -29,3 +34,23 @@ class PartitionPath:
         return self.dir() / "part-0000.parquet"
 
 
+@dataclass(frozen=True)
+class MonthPartitionPath:
+    """``<table>/month=YYYY-MM/part-0000.parquet`` (monthly snapshots such as universe_monthly)."""
+
+    table: str
+    year: int
+    month: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.year:04d}-{self.month:02d}"
+
+    def dir(self) -> Path:
+        return PARQUET_DIR / self.table / f"month={self.key}"
+
+    def tmp_file(self) -> Path:
+        return self.dir() / "part-0000.parquet.tmp"
+
+    def final_file(self) -> Path:
+        return self.dir() / "part-0000.parquet"
@@ -1,16 +1,106 @@
 from __future__ import annotations
 
+import functools
+import json
+import operator
+import threading
 from datetime import date
-from typing import Iterable, Optional
+from typing import Any, Iterable, Iterator, Optional
 
 import pandas as pd
+import pyarrow as pa
 import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
-from .paths import PARQUET_DIR
+from app.settings import settings
+from app.market.core import SUMMARY_COLUMNS
+from app.rankings.core import RANKING_COLUMNS
+from app.signals.core import SIGNAL_COLUMNS
+from app.universe.core import UNIVERSE_COLUMNS
+
+from .locks import layout_lock
+from .paths import PARQUET_DIR, STOCK_BASIC_PARQUET, MonthPartitionPath, PartitionPath
+from .watermark import watermark_version
+
+
+PRICE_COLUMNS = ["ts_code","trade_date","open_raw","high_raw","low_raw","close_raw","pre_close","volume","amount"]
+# derived at write time (app.datasource.enrich); absent from older partitions
+TRADABILITY_COLUMNS = ["is_trading","mask_untradable"]
+ADJ_COLUMNS = ["ts_code","trade_date","adj_factor"]
+BASIC_COLUMNS = ["ts_code","trade_date","turnover_rate","pe","pe_ttm","pb","ps","total_mv","circ_mv"]
+STOCK_BASIC_COLUMNS = ["ts_code","name","industry","list_date"]
+
+
+# up to this many codes the ts_code predicate is an OR of equalities, which the
+# Parquet reader checks against row-group min/max statistics (isin() is not)
+_POINT_LOOKUP_MAX = 16
+
+
+def _parquet_format() -> ds.ParquetFileFormat:
+    # ts_code is read as plain strings: with dictionary_columns the row-group
+    # statistics are not used for pruning, which defeats the sorted "lookup"
+    # writer profile (see app.datasource.parquet_io).
+    return ds.ParquetFileFormat(
+        default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True),
+    )
+
+
+_DATASETS: dict[str, tuple[Any, ds.Dataset]] = {}
+_DATASET_STATS = {"hits": 0, "misses": 0, "invalidations": 0}
+_DATASET_LOCK = threading.Lock()
 
 
 def _dataset(table: str) -> ds.Dataset:
-    return ds.dataset(str(PARQUET_DIR / table), format="parquet", partitioning="hive")
+    """Return the dataset for ``table``, reusing the discovered fragment list.
+
+    Discovery walks the whole ``year=/month=/day=`` tree, so the result is cached
+    per process and keyed by the watermark version; a hit costs one version read.
+    """
+    version = watermark_version()
+    with _DATASET_LOCK:
+        cached = _DATASETS.get(table)
+        if cached is not None and cached[0] == version:
+            _DATASET_STATS["hits"] += 1
+            return cached[1]
+        _DATASET_STATS["misses"] += 1
+    # FileNotFoundError propagates and is deliberately not cached
+    dataset = ds.dataset(str(PARQUET_DIR / table), format=_parquet_format(), partitioning="hive")
+    dataset = _with_newest_columns(dataset)
+    with _DATASET_LOCK:
+        _DATASETS[table] = (version, dataset)
+    return dataset
+
+
+def _with_newest_columns(dataset: ds.Dataset) -> ds.Dataset:
+    """Widen the schema (inferred from the oldest file) with columns added since.
+
+    The newest file sorts last (``year=/month=/day=``, a month file after its
+    days); older fragments read the added columns as nulls.
+    """
+    files = dataset.files
+    if len(files) < 2:
+        return dataset
+    newest = pq.read_schema(max(files)).remove_metadata()
+    if all(name in dataset.schema.names for name in newest.names):
+        return dataset
+    return dataset.replace_schema(pa.unify_schemas([dataset.schema, newest], promote_options="permissive"))
+
+
+def _forget_dataset(table: str) -> None:
+    with _DATASET_LOCK:
+        _DATASETS.pop(table, None)
+
+
+def invalidate_datasets() -> None:
+    """Drop all cached datasets (in-process signal after a write)."""
+    with _DATASET_LOCK:
+        _DATASETS.clear()
+        _DATASET_STATS["invalidations"] += 1
+
+
+def dataset_cache_stats() -> dict[str, Any]:
+    with _DATASET_LOCK:
+        return {**_DATASET_STATS, "tables": sorted(_DATASETS)}
 
 
 def _filter_date_range(start: Optional[date], end: Optional[date]):
@@ -23,55 +113,312 @@ def _filter_date_range(start: Optional[date], end: Optional[date]):
     return expr
 
 
-def read_prices_and_adj(
+def _filter_partitions(start: Optional[date], end: Optional[date]):
+    """Predicate on the hive ``year``/``month`` keys so whole directories are pruned
+    before any footer is opened."""
+    expr = None
+    if start is not None:
+        y, m = start.year, start.month
+        expr = (ds.field("year") > y) | ((ds.field("year") == y) & (ds.field("month") >= m))
+    if end is not None:
+        y, m = end.year, end.month
+        end_expr = (ds.field("year") < y) | ((ds.field("year") == y) & (ds.field("month") <= m))
+        expr = end_expr if expr is None else (expr & end_expr)
+    return expr
+
+
+def _build_filter(ts_codes: Optional[Iterable[str]], start: Optional[date], end: Optional[date]):
+    """Combine partition, date and ts_code predicates into one dataset expression.
+
+    The ts_code term lets the Parquet reader skip row groups by min/max statistics.
+    """
+    expr = None
+    for part in (_filter_partitions(start, end), _filter_date_range(start, end)):
+        if part is not None:
+            expr = part if expr is None else (expr & part)
+    if ts_codes:
+        codes = sorted(set(ts_codes))
+        if len(codes) <= _POINT_LOOKUP_MAX:
+            code_expr = functools.reduce(operator.or_, [ds.field("ts_code") == c for c in codes])
+        else:
+            code_expr = ds.field("ts_code").isin(codes)
+        expr = code_expr if expr is None else (expr & code_expr)
+    return expr
+
+
+def _to_pandas(table: pa.Table) -> pd.DataFrame:
+    # decode dictionary columns back to plain values so merges/groupbys see strings
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table.to_pandas()
+
+
+def _scan(table: str, columns: list[str], filters) -> pd.DataFrame:
+    """Scan ``table`` under ``filters``.
+
+    The scan holds the table's shared layout lock, so compaction never swaps a
+    month under it. A fragment that disappears anyway (a cached fragment list
+    older than a rewrite) triggers one re-discovery and retry.
+    """
+    with layout_lock(table, shared=True):
+        for attempt in (0, 1):
+            dataset = _dataset(table)
+            present = set(dataset.schema.names)
+            try:
+                return _to_pandas(dataset.to_table(filter=filters, columns=[c for c in columns if c in present]))
+            except FileNotFoundError:
+                if attempt:
+                    raise
+                _forget_dataset(table)
+    raise AssertionError("unreachable")
+
+
+def iter_batches(
+    table: str,
+    columns: list[str],
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+    batch_rows: int,
+) -> Iterator[pd.DataFrame]:
+    """Scan ``table`` as frames of about ``batch_rows`` rows, in partition order.
+
+    Small record batches (one-day files) are gathered up to ``batch_rows``
+    before the pandas conversion, so a frame may span several partitions;
+    only one frame is materialized at a time. The shared layout lock is held
+    until the generator is exhausted or closed, so compaction waits for open
+    streams.
+    """
+    with layout_lock(table, shared=True):
+        yield from _iter_batches(table, columns, ts_codes, start, end, batch_rows)
+
+
+def _iter_batches(
+    table: str,
+    columns: list[str],
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+    batch_rows: int,
+) -> Iterator[pd.DataFrame]:
+    try:
+        dataset = _dataset(table)
+    except FileNotFoundError:
+        return
+    present = set(dataset.schema.names)
+    scanner = dataset.scanner(
+        columns=[c for c in columns if c in present],
+        filter=_build_filter(ts_codes, start, end),
+        batch_size=batch_rows,
+    )
+    pending: list[pa.RecordBatch] = []
+    rows = 0
+    for batch in scanner.to_batches():
+        if not batch.num_rows:
+            continue
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= batch_rows:
+            yield _to_pandas(pa.Table.from_batches(pending))
+            pending, rows = [], 0
+    if pending:
+        yield _to_pandas(pa.Table.from_batches(pending))
+
+
+def _use_duckdb() -> bool:
+    return settings.query_engine.lower() == "duckdb"
+
+
+def _tradable_filter(present: Iterable[str]):
+    """Rows that can be traded: stored ``mask_untradable`` false, or ``volume > 0`` where it was never stored."""
+    volume = ds.field("volume") > 0
+    if "mask_untradable" not in present:
+        return volume
+    mask = ds.field("mask_untradable")
+    return (mask == False) | (mask.is_null() & volume)  # noqa: E712
+
+
+def read_prices(
     ts_codes: Optional[list[str]],
     start: Optional[date],
     end: Optional[date],
+    columns: Optional[list[str]] = None,
+    tradable_only: bool = False,
 ) -> pd.DataFrame:
+    """Raw ``prices_daily`` rows (no adj_factor); empty frame if the dataset is missing.
+
+    ``tradable_only`` pushes the untradable-row predicate into the scan.
+    """
+    columns = columns or PRICE_COLUMNS + TRADABILITY_COLUMNS
     try:
-        prices_ds = _dataset("prices_daily")
+        filters = _build_filter(ts_codes, start, end)
+        if tradable_only:
+            tradable = _tradable_filter(_dataset("prices_daily").schema.names)
+            filters = tradable if filters is None else (filters & tradable)
+        return _scan("prices_daily", columns, filters)
     except FileNotFoundError:
-        return pd.DataFrame(columns=[
-            "ts_code","trade_date","open_raw","high_raw","low_raw","close_raw","pre_close","volume","amount","adj_factor"
-        ])
-    filters = _filter_date_range(start, end)
-    table = prices_ds.to_table(filter=filters, columns=[
-        "ts_code","trade_date","open_raw","high_raw","low_raw","close_raw","pre_close","volume","amount"
-    ])
-    prices = table.to_pandas()
-    if ts_codes:
-        prices = prices[prices["ts_code"].isin(ts_codes)]
+        return pd.DataFrame(columns=columns)
+
 
+def read_adj_factor(
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+) -> pd.DataFrame:
     try:
-        adj_ds = _dataset("adj_factor")
-        adj_table = adj_ds.to_table(filter=filters, columns=["ts_code","trade_date","adj_factor"])
-        adj = adj_table.to_pandas()
+        return _scan("adj_factor", ADJ_COLUMNS, _build_filter(ts_codes, start, end))
     except Exception:
         # dataset may not exist yet
-        adj = pd.DataFrame(columns=["ts_code","trade_date","adj_factor"])
+        return pd.DataFrame(columns=ADJ_COLUMNS)
 
+
+def join_prices(prices: pd.DataFrame, adj: pd.DataFrame, basic: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Left-join adj_factor (and turnover_rate from ``basic``) onto raw prices.
+
+    Split out of :func:`read_prices_and_adj` so callers can run the three scans
+    concurrently and join afterwards.
+    """
+    if prices.empty:
+        return pd.DataFrame(columns=PRICE_COLUMNS + ["adj_factor"] + (["turnover_rate"] if basic is not None else []))
     if not adj.empty:
         prices = prices.merge(adj, on=["ts_code","trade_date"], how="left")
     else:
         prices["adj_factor"] = pd.NA
-
+    if basic is not None:
+        prices = prices.merge(basic[["ts_code", "trade_date", "turnover_rate"]], on=["ts_code", "trade_date"], how="left")
     return prices
 
 
+def read_prices_and_adj(
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+    include_basic: bool = False,
+    tradable_only: bool = False,
+) -> pd.DataFrame:
+    """Raw prices left-joined with adj_factor (and turnover_rate if include_basic)."""
+    if _use_duckdb():
+        from . import duckdb_readers
+
+        return duckdb_readers.read_prices_and_adj(ts_codes, start, end, include_basic=include_basic, tradable_only=tradable_only)
+    prices = read_prices(ts_codes, start, end, tradable_only=tradable_only)
+    adj = read_adj_factor(ts_codes, start, end)
+    basic = read_daily_basic(ts_codes, start, end) if include_basic else None
+    return join_prices(prices, adj, basic)
+
+
 def read_daily_basic(
     ts_codes: Optional[list[str]],
     start: Optional[date],
     end: Optional[date],
 ) -> pd.DataFrame:
+    if _use_duckdb():
+        from . import duckdb_readers
+
+        return duckdb_readers.read_daily_basic(ts_codes, start, end)
     try:
-        basic_ds = _dataset("daily_basic")
+        return _scan("daily_basic", BASIC_COLUMNS, _build_filter(ts_codes, start, end))
     except Exception:
-        return pd.DataFrame(columns=["ts_code","trade_date","turnover_rate","pe","pe_ttm","pb","ps","total_mv","circ_mv"])
-    filters = _filter_date_range(start, end)
-    table = basic_ds.to_table(filter=filters)
-    df = table.to_pandas()
-    if ts_codes:
-        df = df[df["ts_code"].isin(ts_codes)]
-    return df
+        return pd.DataFrame(columns=BASIC_COLUMNS)
+
+
+def count_rows(
+    table: str,
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+) -> int:
+    """Row count under the same pushed-down predicate, without materializing columns."""
+    filters = _build_filter(ts_codes, start, end)
+    with layout_lock(table, shared=True):
+        for attempt in (0, 1):
+            try:
+                return _dataset(table).count_rows(filter=filters)
+            except FileNotFoundError:
+                if attempt or not (PARQUET_DIR / table).exists():
+                    return 0
+                _forget_dataset(table)
+    return 0
+
+
+def read_signals(
+    ts_codes: Optional[list[str]],
+    start: Optional[date],
+    end: Optional[date],
+) -> pd.DataFrame:
+    try:
+        return _scan("signals_daily", SIGNAL_COLUMNS, _build_filter(ts_codes, start, end))
+    except FileNotFoundError:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+
+
+def read_universe(year: int, month: int) -> pd.DataFrame:
+    """One ``universe_monthly`` snapshot (rank order); empty if not built."""
+    path = MonthPartitionPath("universe_monthly", year, month).final_file()
+    if not path.exists():
+        return pd.DataFrame(columns=UNIVERSE_COLUMNS)
+    return pq.read_table(path).to_pandas()
+
 
+def universe_months() -> list[str]:
+    """``YYYY-MM`` keys of the built universe snapshots, ascending."""
+    root = PARQUET_DIR / "universe_monthly"
+    return sorted(p.name.split("=", 1)[1] for p in root.glob("month=*") if (p / "part-0000.parquet").exists())
 
+
+def read_stock_basic() -> pd.DataFrame:
+    """The stock_basic snapshot (ts_code, name, industry, list_date); empty if never fetched."""
+    if not STOCK_BASIC_PARQUET.exists():
+        return pd.DataFrame(columns=STOCK_BASIC_COLUMNS)
+    return pq.read_table(STOCK_BASIC_PARQUET).to_pandas()
+
+
+def read_market_summary(dt: date) -> Optional[dict[str, Any]]:
+    """The ``market_summary`` row for ``dt`` as a dict, or None.
+
+    The day file is read directly (no dataset discovery); a compacted month
+    falls back to a filtered scan.
+    """
+    path = PartitionPath("market_summary", dt).final_file()
+    try:
+        frame = pq.read_table(path).to_pandas() if path.exists() else None
+    except FileNotFoundError:
+        frame = None
+    if frame is None:
+        try:
+            frame = _scan("market_summary", SUMMARY_COLUMNS, _build_filter(None, dt, dt))
+        except FileNotFoundError:
+            return None
+    if frame.empty:
+        return None
+    row = frame.iloc[-1]
+    return {
+        "date": dt.isoformat(),
+        "adv_decl": {"adv": int(row["adv"]), "decl": int(row["decl"]), "unch": int(row["unch"])},
+        "turnover_total": float(row["turnover_total"]),
+        **json.loads(row["payload"]),
+    }
+
+
+def read_rankings(dt: date, top: int) -> pd.DataFrame:
+    """The first ``top`` rows of the ``rankings_daily`` partition for ``dt`` (rank order).
+
+    Only the leading batch of the day file is decoded; a compacted month (rows
+    re-sorted by ts_code) falls back to a filtered scan.
+    """
+    path = PartitionPath("rankings_daily", dt).final_file()
+    try:
+        if path.exists():
+            batches = pq.ParquetFile(path).iter_batches(batch_size=top, columns=RANKING_COLUMNS)
+            batch = next(batches, None)
+            if batch is None:
+                return pd.DataFrame(columns=RANKING_COLUMNS)
+            return _to_pandas(pa.Table.from_batches([batch]))
+    except FileNotFoundError:
+        pass
+    try:
+        frame = _scan("rankings_daily", RANKING_COLUMNS, _build_filter(None, dt, dt))
+    except FileNotFoundError:
+        return pd.DataFrame(columns=RANKING_COLUMNS)
+    return frame.sort_values("rank", kind="mergesort").head(top).reset_index(drop=True)
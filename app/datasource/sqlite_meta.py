@@ -1,44 +1,13 @@
 from __future__ import annotations
 
-import sqlite3
-from dataclasses import dataclass
-from pathlib import Path
+from datetime import date
 from typing import Any, Iterable
 
-from .paths import META_SQLITE
-
-
-def _ensure_conn() -> sqlite3.Connection:
-    META_SQLITE.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(META_SQLITE)
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS fail_queue (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            endpoint TEXT NOT NULL,
-            params TEXT NOT NULL,
-            retries INTEGER NOT NULL DEFAULT 0,
-            last_error TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS jobs (
-            id TEXT PRIMARY KEY,
-            last_run TIMESTAMP,
-            state TEXT,
-            next_run TIMESTAMP
-        )
-        """
-    )
-    return conn
+from .meta_db import connect, transaction
 
 
 def enqueue_fail(endpoint: str, params: str, last_error: str) -> None:
-    conn = _ensure_conn()
-    with conn:
+    with transaction() as conn:
         conn.execute(
             "INSERT INTO fail_queue(endpoint, params, last_error) VALUES (?,?,?)",
             (endpoint, params, last_error),
@@ -46,7 +15,7 @@ def enqueue_fail(endpoint: str, params: str, last_error: str) -> None:
 
 
 def list_fail(limit: int = 50) -> list[dict[str, Any]]:
-    conn = _ensure_conn()
+    conn = connect()
     cur = conn.execute("SELECT id, endpoint, params, retries, last_error, created_at FROM fail_queue ORDER BY id DESC LIMIT ?", (limit,))
     rows = [
         {
@@ -63,8 +32,7 @@ def list_fail(limit: int = 50) -> list[dict[str, Any]]:
 
 
 def upsert_job_status(job_id: str, last_run: str | None, state: str | None, next_run: str | None) -> None:
-    conn = _ensure_conn()
-    with conn:
+    with transaction() as conn:
         conn.execute(
             "INSERT INTO jobs(id,last_run,state,next_run) VALUES(?,?,?,?) ON CONFLICT(id) DO UPDATE SET last_run=excluded.last_run, state=excluded.state, next_run=excluded.next_run",
             (job_id, last_run, state, next_run),
@@ -72,7 +40,7 @@ def upsert_job_status(job_id: str, last_run: str | None, state: str | None, next
 
 
 def list_jobs() -> list[dict[str, Any]]:
-    conn = _ensure_conn()
+    conn = connect()
     cur = conn.execute("SELECT id,last_run,state,next_run FROM jobs ORDER BY id")
     return [
         {"id": r[0], "last_run": r[1], "state": r[2], "next_run": r[3]}
@@ -80,3 +48,78 @@ def list_jobs() -> list[dict[str, Any]]:
     ]
 
 
+def record_fetch_run(
+    endpoint: str,
+    params: str,
+    symbols: int,
+    ok: int,
+    empty: int,
+    failed: int,
+    requests: int,
+    elapsed_s: float,
+) -> None:
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO fetch_runs(endpoint, params, symbols, ok, empty, failed, requests, elapsed_s, symbols_per_s) VALUES (?,?,?,?,?,?,?,?,?)",
+            (endpoint, params, symbols, ok, empty, failed, requests, elapsed_s, symbols / elapsed_s if elapsed_s > 0 else 0.0),
+        )
+
+
+def list_fetch_runs(limit: int = 20) -> list[dict[str, Any]]:
+    conn = connect()
+    cur = conn.execute(
+        "SELECT endpoint, params, symbols, ok, empty, failed, requests, elapsed_s, symbols_per_s, created_at FROM fetch_runs ORDER BY id DESC LIMIT ?",
+        (limit,),
+    )
+    keys = ("endpoint", "params", "symbols", "ok", "empty", "failed", "requests", "elapsed_s", "symbols_per_s", "created_at")
+    return [dict(zip(keys, r)) for r in cur.fetchall()]
+
+
+def mark_backfilled(provider: str, days: Iterable[tuple[date, int, float]]) -> None:
+    """Checkpoint finished backfill dates as (trade_date, rows, elapsed_s)."""
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO backfill_progress(provider, trade_date, rows, elapsed_s) VALUES (?,?,?,?) "
+            "ON CONFLICT(provider, trade_date) DO UPDATE SET rows=excluded.rows, elapsed_s=excluded.elapsed_s, done_at=CURRENT_TIMESTAMP",
+            [(provider, d.isoformat(), rows, elapsed_s) for d, rows, elapsed_s in days],
+        )
+
+
+def backfilled_dates(provider: str, start: date, end: date) -> set[date]:
+    conn = connect()
+    cur = conn.execute(
+        "SELECT trade_date FROM backfill_progress WHERE provider = ? AND trade_date BETWEEN ? AND ?",
+        (provider, start.isoformat(), end.isoformat()),
+    )
+    return {date.fromisoformat(r[0]) for r in cur.fetchall()}
+
+
+def create_backtest_run(run_id: str, config: str) -> None:
+    with transaction() as conn:
+        conn.execute("INSERT INTO backtest_runs(run_id, state, config) VALUES (?, 'queued', ?)", (run_id, config))
+
+
+def update_backtest_run(
+    run_id: str,
+    state: str,
+    result: str | None = None,
+    error: str | None = None,
+    elapsed_s: float | None = None,
+) -> None:
+    finished = state in ("done", "error")
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE backtest_runs SET state=?, result=?, error=?, elapsed_s=?, "
+            "finished_at=CASE WHEN ? THEN CURRENT_TIMESTAMP ELSE finished_at END WHERE run_id=?",
+            (state, result, error, elapsed_s, finished, run_id),
+        )
+
+
+def get_backtest_run(run_id: str) -> dict[str, Any] | None:
+    conn = connect()
+    row = conn.execute(
+        "SELECT run_id, state, config, result, error, elapsed_s, created_at, finished_at FROM backtest_runs WHERE run_id = ?",
+        (run_id,),
+    ).fetchone()
+    keys = ("run_id", "state", "config", "result", "error", "elapsed_s", "created_at", "finished_at")
+    return dict(zip(keys, row)) if row else None
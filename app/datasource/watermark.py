@@ -1,15 +1,30 @@
+"""Per-table watermarks (``table, last_dt, rowcount, hash``).
+
+The source of truth is the ``watermarks`` table in ``meta.sqlite``; every write
+runs in one ``BEGIN IMMEDIATE`` transaction (see :mod:`.meta_db`) that also
+bumps ``watermark_meta.version``, so concurrent writers (scheduler, manual
+backfill) serialize instead of overwriting each other. ``watermark.parquet`` is
+still exported after each write for external consumers, and imported once if
+the table is empty (upgrade path).
+"""
+
 from __future__ import annotations
 
+import os
+import sqlite3
+import threading
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable, Optional
 
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
 
-from .paths import WATERMARK_PARQUET
+from .paths import META_SQLITE, WATERMARK_PARQUET
+from .locks import file_lock
+from .meta_db import connect, transaction
 
 
 @dataclass
@@ -24,40 +39,122 @@ def _ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+_VIEW: dict[str, Any] = {"key": None, "rows": []}
+_VIEW_LOCK = threading.Lock()
+_IMPORTED: set[str] = set()
+
+
+def _conn() -> sqlite3.Connection:
+    conn = connect()
+    path = os.path.abspath(META_SQLITE)
+    if path not in _IMPORTED:
+        _import_parquet()
+        _IMPORTED.add(path)
+    return conn
+
+
+def watermark_version() -> Optional[int]:
+    """Change counter bumped by every watermark write (one indexed sqlite read).
+
+    Every partition write is followed by a watermark upsert, so caches keyed by this
+    token are invalidated whenever new data lands.
+    """
+    row = _conn().execute("SELECT version FROM watermark_meta WHERE id = 1").fetchone()
+    return row[0] if row else None
+
+
+def touch_watermark() -> None:
+    """Bump :func:`watermark_version` without changing content (e.g. after a
+    layout-only rewrite such as compaction) so readers re-discover files."""
+    _conn()
+    with transaction() as conn:
+        conn.execute("UPDATE watermark_meta SET version = version + 1 WHERE id = 1")
+
+
 def read_watermarks() -> list[WatermarkRow]:
-    if not WATERMARK_PARQUET.exists():
-        return []
-    table = pq.read_table(WATERMARK_PARQUET)
-    df = table.to_pandas()
-    rows: list[WatermarkRow] = []
-    for _, r in df.iterrows():
-        rows.append(
-            WatermarkRow(
-                table=str(r["table"]),
-                last_dt=pd.to_datetime(r["last_dt"]).date(),
-                rowcount=int(r["rowcount"]),
-                hash=str(r["hash"]),
-            )
+    """All watermarks, served from an in-process view refreshed when the version moves."""
+    key = (os.path.abspath(META_SQLITE), watermark_version())
+    with _VIEW_LOCK:
+        if _VIEW["key"] == key:
+            return list(_VIEW["rows"])
+    cur = _conn().execute("SELECT table_name, last_dt, rowcount, hash FROM watermarks ORDER BY table_name")
+    rows = [WatermarkRow(table=r[0], last_dt=date.fromisoformat(r[1]), rowcount=int(r[2]), hash=r[3]) for r in cur.fetchall()]
+    with _VIEW_LOCK:
+        # rows may be newer than ``key``; the next call then simply reloads
+        _VIEW["key"] = key
+        _VIEW["rows"] = rows
+    return list(rows)
+
+
+def _upsert(rows: list[WatermarkRow]) -> None:
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT INTO watermarks(table_name, last_dt, rowcount, hash) VALUES (?,?,?,?) "
+            "ON CONFLICT(table_name) DO UPDATE SET last_dt=excluded.last_dt, rowcount=excluded.rowcount, "
+            "hash=excluded.hash, updated_at=CURRENT_TIMESTAMP WHERE excluded.last_dt >= watermarks.last_dt",
+            [(r.table, r.last_dt.isoformat(), int(r.rowcount), r.hash) for r in rows],
         )
-    return rows
+        conn.execute("UPDATE watermark_meta SET version = version + 1 WHERE id = 1")
 
 
 def upsert_watermark(row: WatermarkRow) -> None:
-    existing = read_watermarks()
-    by_table = {r.table: r for r in existing}
-    by_table[row.table] = row
-    df = pd.DataFrame(
-        [
-            {
-                "table": r.table,
-                "last_dt": pd.Timestamp(r.last_dt),
-                "rowcount": r.rowcount,
-                "hash": r.hash,
-            }
-            for r in by_table.values()
-        ]
-    )
-    _ensure_parent(WATERMARK_PARQUET)
-    pq.write_table(pa.Table.from_pandas(df), WATERMARK_PARQUET)
+    upsert_watermarks([row])
+
+
+def upsert_watermarks(rows: Iterable[WatermarkRow]) -> None:
+    """Apply many watermark rows in one transaction.
+
+    Per table the row with the latest ``last_dt`` wins, and an existing watermark
+    that is already further ahead is kept (backfilling history never moves it back).
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    _conn()
+    _upsert(rows)
+    export_watermarks()
+
 
+def export_watermarks(path: Path = WATERMARK_PARQUET) -> None:
+    """Write the current watermarks to ``watermark.parquet`` (compatibility export).
 
+    Read and write happen under a lock next to the file, so concurrent writers
+    export in turn and the last export always reflects the latest rows.
+    """
+    _ensure_parent(path)
+    with file_lock(path.with_name(f"{path.name}.lock")):
+        df = pd.DataFrame(
+            [
+                {
+                    "table": r.table,
+                    "last_dt": pd.Timestamp(r.last_dt),
+                    "rowcount": r.rowcount,
+                    "hash": r.hash,
+                }
+                for r in read_watermarks()
+            ],
+            columns=["table", "last_dt", "rowcount", "hash"],
+        )
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+        tmp.replace(path)
+
+
+def _import_parquet() -> None:
+    # one-time upgrade from the Parquet-only watermark
+    if not WATERMARK_PARQUET.exists():
+        return
+    if connect().execute("SELECT 1 FROM watermarks LIMIT 1").fetchone() is not None:
+        return
+    df = pq.read_table(WATERMARK_PARQUET).to_pandas()
+    rows = [
+        WatermarkRow(
+            table=str(t),
+            last_dt=pd.Timestamp(d).date(),
+            rowcount=int(n),
+            hash=str(h),
+        )
+        for t, d, n, h in zip(df["table"], df["last_dt"], df["rowcount"], df["hash"])
+    ]
+    if rows:
+        _upsert(rows)
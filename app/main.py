@@ -1,12 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import router as api_router
+from app.datasource.meta_db import migrate
 from app.settings import settings
 
 
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # meta.sqlite schema + WAL, once per worker process; at startup rather than
+    # import, so importing the app never creates data/ in the working directory
+    migrate()
+    yield
+
+
 def create_app() -> FastAPI:
-    application = FastAPI(title="PandaAlpha API", version="0.1.0")
+    application = FastAPI(title="PandaAlpha API", version="0.1.0", lifespan=lifespan)
 
     # CORS for local Next.js dev
     application.add_middleware(
@@ -0,0 +1,3 @@
+"""Market overview: per-day summary (adv/decl/unch, movers, industries) and the market_summary dataset."""
+
+__all__ = []
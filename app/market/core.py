@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+TOP_N = 20
+UNKNOWN_INDUSTRY = "未分类"
+SUMMARY_COLUMNS = ["trade_date", "adv", "decl", "unch", "turnover_total", "payload"]
+
+
+def _movers(frame: pd.DataFrame) -> list[dict[str, Any]]:
+    return [
+        {"ts_code": code, "pct_chg": float(pct), "turnover": float(amount)}
+        for code, pct, amount in zip(frame["ts_code"], frame["pct_chg"], frame["amount"])
+    ]
+
+
+def summarize_day(prices: pd.DataFrame, basic: Optional[pd.DataFrame] = None, top_n: int = TOP_N) -> dict[str, Any]:
+    """Aggregates for one trading day of ``prices_daily`` rows.
+
+    ``pct_chg`` is close_raw / pre_close - 1 as a decimal (0.07 = +7%); rows
+    without a pre_close are left out of the counts and movers. ``turnover``
+    is 成交额 in 元. Industries come from stock_basic, else ``未分类``.
+    """
+    close = pd.to_numeric(prices["close_raw"], errors="coerce")
+    pre = pd.to_numeric(prices["pre_close"], errors="coerce")
+    frame = pd.DataFrame({
+        "ts_code": prices["ts_code"].astype(str).to_numpy(),
+        "pct_chg": (close / pre.where(pre > 0) - 1).to_numpy(),
+        "amount": pd.to_numeric(prices["amount"], errors="coerce").fillna(0.0).to_numpy(),
+    })
+    if basic is not None and not basic.empty:
+        industry = basic.drop_duplicates("ts_code").set_index("ts_code")["industry"]
+        frame["industry"] = frame["ts_code"].map(industry).fillna(UNKNOWN_INDUSTRY).to_numpy()
+    else:
+        frame["industry"] = UNKNOWN_INDUSTRY
+    # unchanged within float noise of the raw prices
+    sign = np.sign(frame["pct_chg"].where(frame["pct_chg"].abs() > 1e-9, 0.0))
+    frame["adv"] = (sign > 0).astype("int64")
+    frame["decl"] = (sign < 0).astype("int64")
+    frame["unch"] = (sign == 0).astype("int64")
+
+    valid = frame[frame["pct_chg"].notna()]
+    ranked = valid.sort_values(["pct_chg", "ts_code"], ascending=[False, True], kind="mergesort")
+    by_industry = (
+        valid.groupby("industry", sort=False)
+        .agg(adv=("adv", "sum"), decl=("decl", "sum"), unch=("unch", "sum"), turnover=("amount", "sum"), pct_chg=("pct_chg", "mean"))
+        .reset_index()
+        .sort_values("turnover", ascending=False, kind="mergesort")
+    )
+    return {
+        "adv_decl": {"adv": int(valid["adv"].sum()), "decl": int(valid["decl"].sum()), "unch": int(valid["unch"].sum())},
+        "turnover_total": float(frame["amount"].sum()),
+        "by_industry": [
+            {
+                "industry": row.industry,
+                "adv": int(row.adv),
+                "decl": int(row.decl),
+                "unch": int(row.unch),
+                "turnover": float(row.turnover),
+                "pct_chg": float(row.pct_chg),
+            }
+            for row in by_industry.itertuples(index=False)
+        ],
+        "top": _movers(ranked.head(top_n)),
+        "bottom": _movers(ranked.tail(top_n).iloc[::-1]),
+    }
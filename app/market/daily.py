@@ -0,0 +1,66 @@
+"""market_summary maintenance.
+
+``update_market_summary(dt)`` is run by ``daily_job`` right after the day's
+``prices_daily`` partition is written: it aggregates that one day once and
+stores a single row (counts, turnover and a JSON payload with industries and
+movers) as the ``market_summary`` day partition, so ``/api/market/summary`` is
+a key lookup. ``rebuild_market_summary(start, end)`` covers backfills.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import date
+from typing import Any
+
+import pandas as pd
+
+from app.datasource.parquet_io import write_parquet_atomic
+from app.datasource.paths import PartitionPath
+from app.datasource.readers import read_prices, read_stock_basic
+from app.datasource.watermark import WatermarkRow, upsert_watermark, upsert_watermarks
+from app.settings import settings
+
+from .core import SUMMARY_COLUMNS, summarize_day
+
+
+TABLE = "market_summary"
+_COLUMNS = ["ts_code", "trade_date", "close_raw", "pre_close", "amount"]
+
+
+def _summary_row(dt: date, summary: dict[str, Any]) -> pd.DataFrame:
+    counts = summary["adv_decl"]
+    payload = {k: summary[k] for k in ("by_industry", "top", "bottom")}
+    return pd.DataFrame(
+        [[dt, counts["adv"], counts["decl"], counts["unch"], summary["turnover_total"], json.dumps(payload, ensure_ascii=False)]],
+        columns=SUMMARY_COLUMNS,
+    )
+
+
+def _write_day(day: pd.DataFrame, dt: date, basic: pd.DataFrame) -> WatermarkRow:
+    summary = summarize_day(day, basic, top_n=settings.market_summary_top_n)
+    part = PartitionPath(TABLE, dt)
+    rows = write_parquet_atomic(_summary_row(dt, summary), part.tmp_file(), part.final_file())
+    sha = hashlib.sha1(",".join(sorted(day["ts_code"].astype(str).tolist())).encode("utf-8")).hexdigest()
+    return WatermarkRow(table=TABLE, last_dt=dt, rowcount=rows, hash=sha)
+
+
+def update_market_summary(dt: date) -> bool:
+    """Aggregate ``dt`` and persist it; False when there are no prices for that day."""
+    day = read_prices(None, dt, dt, columns=_COLUMNS)
+    if day.empty:
+        return False
+    upsert_watermark(_write_day(day, dt, read_stock_basic()))
+    return True
+
+
+def rebuild_market_summary(start: date, end: date) -> int:
+    """Recompute the summary of every trade date in [start, end] from one scan."""
+    prices = read_prices(None, start, end, columns=_COLUMNS)
+    if prices.empty:
+        return 0
+    basic = read_stock_basic()
+    marks = [_write_day(day, dt, basic) for dt, day in prices.groupby("trade_date", sort=True)]
+    upsert_watermarks(marks)
+    return len(marks)
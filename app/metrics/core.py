@@ -1,47 +1,158 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from math import sqrt
 from typing import Iterable, Optional
 
+import numpy as np
 import pandas as pd
 
 
+_RAW_COLUMNS = ("open_raw", "high_raw", "low_raw", "close_raw")
+_ADJ_COLUMNS = ("open", "high", "low", "close")
+
+
 def adjust_ohlc(df: pd.DataFrame, adj: str = "backward") -> pd.DataFrame:
     """Adjust raw OHLC using adj_factor.
 
     - none: return raw
     - backward: normalize adj_factor to last available date per ts_code
     - forward: normalize to first available date per ts_code
+
+    For backward/forward the result is sorted by (ts_code, trade_date) and keeps
+    the input index labels.
     """
-    out = df.copy()
     if adj == "none":
+        out = df.copy()
         out["open"] = out["open_raw"]
         out["high"] = out["high_raw"]
         out["low"] = out["low_raw"]
         out["close"] = out["close_raw"]
         return out
 
-    if "adj_factor" not in out.columns or out["adj_factor"].isna().all():
+    if "adj_factor" not in df.columns or df["adj_factor"].isna().all():
         # no factors available; fall back to raw
-        return adjust_ohlc(out, adj="none")
-
-    def _normalize(group: pd.DataFrame) -> pd.DataFrame:
-        g = group.sort_values("trade_date").copy()
-        if adj == "backward":
-            base = g["adj_factor"].ffill().bfill().iloc[-1]
-        else:  # forward
-            base = g["adj_factor"].ffill().bfill().iloc[0]
-        scale = g["adj_factor"].ffill().bfill() / base
-        for col_raw, col_adj in [
-            ("open_raw", "open"),
-            ("high_raw", "high"),
-            ("low_raw", "low"),
-            ("close_raw", "close"),
-        ]:
-            g[col_adj] = g[col_raw] * scale
-        return g
-
-    out = out.groupby("ts_code", group_keys=False).apply(_normalize)
+        return adjust_ohlc(df, adj="none")
+
+    # One stable sort, then grouped fills/bases as column ops; equivalent to
+    # normalizing each ts_code group separately but without per-group frames.
+    out = df.sort_values(["ts_code", "trade_date"], kind="mergesort")
+    if out["ts_code"].isna().any():
+        out = out.dropna(subset=["ts_code"])
+    keys = out["ts_code"]
+    factor = pd.to_numeric(out["adj_factor"], errors="coerce")
+    filled = factor.groupby(keys, sort=False).ffill()
+    filled = filled.groupby(keys, sort=False).bfill()
+    base = filled.groupby(keys, sort=False).transform("last" if adj == "backward" else "first")
+    scale = (filled / base).to_numpy(dtype="float64")
+    raw = out[list(_RAW_COLUMNS)].to_numpy(dtype="float64")
+    out[list(_ADJ_COLUMNS)] = raw * scale[:, None]
+    return out
+
+
+def _day_numbers(trade_date: pd.Series) -> np.ndarray:
+    return pd.to_datetime(trade_date).to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+@dataclass
+class FactorSteps:
+    """adj_factor per code as change points, for adjusting prices batch by batch.
+
+    ``keys`` (code position << 32 | day number, ascending) and ``factors`` hold
+    only the rows where a code's factor differs from its previous value, so a
+    multi-year range fits in a few thousand entries. ``first``/``last`` are
+    each code's first and last factor in the range (the forward/backward
+    bases of :func:`adjust_ohlc`).
+    """
+
+    codes: pd.Index
+    keys: np.ndarray
+    factors: np.ndarray
+    first: np.ndarray
+    last: np.ndarray
+
+    @property
+    def empty(self) -> bool:
+        return len(self.codes) == 0
+
+    @classmethod
+    def from_frame(cls, adj: pd.DataFrame) -> "FactorSteps":
+        """Build from adj_factor rows in any order."""
+        adj = adj[["ts_code", "trade_date", "adj_factor"]].copy()
+        adj["adj_factor"] = pd.to_numeric(adj["adj_factor"], errors="coerce")
+        adj = adj.dropna(subset=["ts_code", "adj_factor"])
+        adj = adj.sort_values(["ts_code", "trade_date"], kind="mergesort")
+        keys = adj["ts_code"].astype(str)
+        prev = adj["adj_factor"].groupby(keys, sort=False).shift(1)
+        steps = adj[prev.isna() | (adj["adj_factor"] != prev)]
+        codes = pd.Index(keys.unique())
+        code_pos = codes.get_indexer(steps["ts_code"].astype(str)).astype(np.int64)
+        by_code = steps["adj_factor"].groupby(steps["ts_code"].astype(str), sort=False)
+        return cls(
+            codes=codes,
+            keys=(code_pos << 32) | _day_numbers(steps["trade_date"]),
+            factors=steps["adj_factor"].to_numpy(dtype="float64"),
+            first=by_code.first().reindex(codes).to_numpy(dtype="float64"),
+            last=by_code.last().reindex(codes).to_numpy(dtype="float64"),
+        )
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[pd.DataFrame]) -> Optional["FactorSteps"]:
+        """Build from adj_factor batches without holding the whole table.
+
+        Each batch is reduced to its change points against the running last
+        factor per code. Batches must arrive in date order per code (the
+        dataset's partition order); returns None when they do not, and the
+        caller rebuilds with :meth:`from_frame`.
+        """
+        parts: list[pd.DataFrame] = []
+        last = pd.DataFrame({"trade_date": pd.Series(dtype=object), "adj_factor": pd.Series(dtype="float64")})
+        for batch in batches:
+            batch = batch.dropna(subset=["ts_code", "adj_factor"])
+            if batch.empty:
+                continue
+            batch = batch.sort_values(["ts_code", "trade_date"], kind="mergesort")
+            codes = batch["ts_code"].astype(str)
+            factor = pd.to_numeric(batch["adj_factor"], errors="coerce")
+            grouped = factor.groupby(codes, sort=False)
+            head = grouped.cumcount() == 0
+            prev = grouped.shift(1)
+            prev = prev.where(~head, codes.map(last["adj_factor"]).astype("float64"))
+            seen = codes[head].map(last["trade_date"]).dropna()
+            if (batch.loc[seen.index, "trade_date"] <= seen).any():
+                return None
+            parts.append(batch[prev.isna() | (factor != prev)])
+            tail = batch.groupby(codes, sort=False).tail(1).set_index("ts_code")[["trade_date", "adj_factor"]]
+            last = pd.concat([last[~last.index.isin(tail.index)], tail])
+        if not parts:
+            return cls.from_frame(pd.DataFrame(columns=["ts_code", "trade_date", "adj_factor"]))
+        return cls.from_frame(pd.concat(parts, ignore_index=True))
+
+    def scale(self, ts_code: pd.Series, trade_date: pd.Series, adj: str) -> np.ndarray:
+        """Per-row ``factor / base`` as in :func:`adjust_ohlc`: the factor carried
+        forward from the last change point (the first factor before any), NaN
+        for codes without factors. Requires a non-empty instance."""
+        pos = self.codes.get_indexer(ts_code.astype(str)).astype(np.int64)
+        code = np.maximum(pos, 0)
+        at = np.searchsorted(self.keys, (code << 32) | _day_numbers(trade_date), side="right") - 1
+        hit = (at >= 0) & ((self.keys[np.maximum(at, 0)] >> 32) == code)
+        factor = np.where(hit, self.factors[np.maximum(at, 0)], self.first[code])
+        base = (self.last if adj == "backward" else self.first)[code]
+        return np.where(pos >= 0, factor / base, np.nan)
+
+
+def adjust_with_steps(df: pd.DataFrame, steps: Optional[FactorSteps], adj: str = "backward") -> pd.DataFrame:
+    """:func:`adjust_ohlc` for one batch of a larger query, with bases precomputed in ``steps``.
+
+    Rows keep their order; without any factors the raw prices are returned,
+    like :func:`adjust_ohlc`.
+    """
+    if adj == "none" or steps is None or steps.empty:
+        return adjust_ohlc(df, adj="none")
+    out = df.copy()
+    scale = steps.scale(out["ts_code"], out["trade_date"], adj)
+    raw = out[list(_RAW_COLUMNS)].to_numpy(dtype="float64")
+    out[list(_ADJ_COLUMNS)] = raw * scale[:, None]
     return out
 
 
@@ -56,3 +167,26 @@ def compute_vol_ann(df: pd.DataFrame, window: int) -> pd.Series:
     return vol.rename("vol_ann")
 
 
+def compute_grouped_metrics(
+    df: pd.DataFrame,
+    windows: Iterable[int] = (),
+    vol_window: Optional[int] = None,
+) -> pd.DataFrame:
+    """Per-ts_code rolling metrics for many codes at once.
+
+    ``df`` must be sorted by (ts_code, trade_date) and carry adjusted ``close``.
+    Returns a frame aligned to ``df.index`` with ``pct_chg``, ``ma{w}`` for each
+    window and ``vol_ann`` when ``vol_window`` is given; values match
+    compute_ma/compute_vol_ann applied to each code separately.
+    """
+    close = df["close"].astype(float)
+    grouped = close.groupby(df["ts_code"], sort=False)
+    ret = grouped.pct_change()
+    out = pd.DataFrame({"pct_chg": ret}, index=df.index)
+    for w in windows:
+        ma = grouped.rolling(window=w, min_periods=w).mean()
+        out[f"ma{w}"] = ma.reset_index(level=0, drop=True)
+    if vol_window is not None:
+        vol = ret.groupby(df["ts_code"], sort=False).rolling(window=vol_window, min_periods=vol_window).std()
+        out["vol_ann"] = vol.reset_index(level=0, drop=True) * sqrt(252)
+    return out
@@ -0,0 +1,3 @@
+"""Cross-sectional p_score rankings: per-date percentile ranks and the top-K rankings_daily dataset."""
+
+__all__ = []
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+# percentile thresholds for the evidence tags
+EVIDENCE_HIGH = 0.8
+EVIDENCE_LOW = 0.2
+PCT_SOURCES = {"pct_mom": "p_mom_63d", "pct_rev": "p_rev_5d", "pct_score": "p_score"}
+
+RANKING_COLUMNS = [
+    "trade_date", "rank", "ts_code", "p_score",
+    "pct_mom", "pct_rev", "pct_score", "in_universe", "mask_untradable",
+]
+
+
+def rank_frame(signals: pd.DataFrame, top_k: int) -> pd.DataFrame:
+    """Percentile-rank every trade_date of ``signals`` at once and keep each day's top ``top_k``.
+
+    ``signals`` has signals_daily rows plus a boolean ``in_universe``.
+    Percentiles (0, 1] are over all codes with a value on that date; ``rank``
+    is 1-based by ``p_score`` descending (ties by ts_code). Codes without a
+    p_score are not ranked. Rows come back sorted by (trade_date, rank).
+    """
+    frame = signals[signals["p_score"].notna()]
+    if frame.empty:
+        return pd.DataFrame(columns=RANKING_COLUMNS)
+    frame = frame.sort_values(["trade_date", "p_score", "ts_code"], ascending=[True, False, True], kind="mergesort")
+    out = frame[["trade_date", "ts_code", "p_score"]].copy()
+    by_date = frame.groupby("trade_date", sort=False)
+    for name, source in PCT_SOURCES.items():
+        out[name] = by_date[source].rank(pct=True).astype("float32")
+    out["rank"] = by_date.cumcount().astype("int32") + 1
+    out["in_universe"] = frame["in_universe"].fillna(False).astype(bool)
+    out["mask_untradable"] = frame["mask_untradable"].fillna(False).astype(bool)
+    out = out[out["rank"] <= top_k]
+    return out[RANKING_COLUMNS].reset_index(drop=True)
+
+
+def evidence(rows: pd.DataFrame, universe_label: str = "universe∈Top200") -> list[list[str]]:
+    """Evidence tags per ranked row (``mom↑`` = top quintile of 63-day momentum, etc.)."""
+    tags = []
+    for name, label in (("pct_mom", "mom"), ("pct_rev", "rev")):
+        pct = rows[name].to_numpy(dtype=float, na_value=np.nan)
+        tags.append(np.where(pct >= EVIDENCE_HIGH, f"{label}↑", np.where(pct <= EVIDENCE_LOW, f"{label}↓", "")))
+    tags.append(np.where(rows["in_universe"].to_numpy(dtype=bool), universe_label, ""))
+    tags.append(np.where(rows["mask_untradable"].to_numpy(dtype=bool), "untradable", ""))
+    return [[t for t in row if t] for row in zip(*tags)]
@@ -0,0 +1,82 @@
+"""rankings_daily maintenance.
+
+``update_rankings(dt)`` runs in ``daily_job`` after signals and the universe
+are updated: it percentile-ranks that day's signals_daily cross-section,
+writes the top ``settings.rankings_top_k`` rows in rank order as the
+``rankings_daily`` day partition (so ``/api/rankings/p_score?top=N`` reads N
+rows of one small file) and copies the day's p_score into the panel cache,
+which serves ``with_history`` as a column slice. ``rebuild_rankings(start,
+end)`` ranks a whole range from one scan.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import date
+
+import pandas as pd
+
+from app.datasource.panel_cache import put_scores
+from app.datasource.parquet_io import WRITER_PROFILES, write_parquet_atomic
+from app.datasource.paths import PartitionPath
+from app.datasource.readers import read_signals, read_universe, universe_months
+from app.datasource.watermark import WatermarkRow, upsert_watermark, upsert_watermarks
+from app.settings import settings
+
+from .core import rank_frame
+
+
+TABLE = "rankings_daily"
+
+
+def _universe_codes(year: int, month: int) -> set[str]:
+    """Codes of the snapshot in force for (year, month): that month's, else the latest earlier one."""
+    key = f"{year:04d}-{month:02d}"
+    months = [m for m in universe_months() if m <= key]
+    if not months:
+        return set()
+    y, m = (int(x) for x in months[-1].split("-"))
+    return set(read_universe(y, m)["ts_code"].astype(str))
+
+
+def _with_universe(signals: pd.DataFrame) -> pd.DataFrame:
+    signals = signals.copy()
+    dates = pd.to_datetime(signals["trade_date"])
+    signals["in_universe"] = False
+    for (y, m), idx in signals.groupby([dates.dt.year, dates.dt.month]).groups.items():
+        codes = _universe_codes(y, m)
+        if codes:
+            signals.loc[idx, "in_universe"] = signals.loc[idx, "ts_code"].astype(str).isin(codes)
+    return signals
+
+
+def _write_day(day: pd.DataFrame, dt: date) -> WatermarkRow:
+    part = PartitionPath(TABLE, dt)
+    # rank order on disk; the "lookup" profile would re-sort by ts_code
+    rows = write_parquet_atomic(day.reset_index(drop=True), part.tmp_file(), part.final_file(), profile=WRITER_PROFILES["plain"])
+    sha = hashlib.sha1(",".join(day["ts_code"].astype(str)).encode("utf-8")).hexdigest()
+    return WatermarkRow(table=TABLE, last_dt=dt, rowcount=rows, hash=sha)
+
+
+def update_rankings(dt: date) -> int:
+    """Rank ``dt`` and persist its top-K; returns rows written (0 without signals)."""
+    signals = read_signals(None, dt, dt)
+    if signals.empty:
+        return 0
+    ranked = rank_frame(_with_universe(signals), settings.rankings_top_k)
+    mark = _write_day(ranked, dt)
+    upsert_watermark(mark)
+    put_scores(signals)
+    return mark.rowcount
+
+
+def rebuild_rankings(start: date, end: date) -> int:
+    """Rank every trade date in [start, end] in one vectorized pass."""
+    signals = read_signals(None, start, end)
+    if signals.empty:
+        return 0
+    ranked = rank_frame(_with_universe(signals), settings.rankings_top_k)
+    marks = [_write_day(day, dt) for dt, day in ranked.groupby("trade_date", sort=True)]
+    upsert_watermarks(marks)
+    put_scores(signals)
+    return sum(m.rowcount for m in marks)
@@ -0,0 +1,60 @@
+"""Per-code p_score trajectories for ``/api/rankings/p_score?with_history=true``.
+
+Served from the panel cache's ``p_score`` column: the last ``days`` rows up to
+the ranking date for the requested codes, one slice of the mapped file. Falls
+back to a signals_daily scan when the panel does not cover the date yet.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+
+from app.datasource.panel_cache import open_panel_cache
+from app.datasource.readers import read_signals
+
+
+def _from_panel(codes: list[str], end: date, days: int) -> list[dict[str, Any]] | None:
+    view = open_panel_cache()
+    if view is None or not view.covers(end, end):
+        return None
+    rows = view.date_slice(None, end)
+    rows = slice(max(rows.stop - days, 0), rows.stop)
+    dates = [d.isoformat() for d in view.dates[rows]]
+    idx = view.code_indexer(codes)
+    scores = view.column("p_score")[rows]
+    out = []
+    for code, i in zip(codes, idx):
+        series = scores[:, i] if i >= 0 else np.full(len(dates), np.nan, dtype=np.float32)
+        out.append({
+            "ts_code": code,
+            "rows": [{"trade_date": d, "p_score": round(float(v), 4)} for d, v in zip(dates, series) if not np.isnan(v)],
+        })
+    return out
+
+
+def _from_signals(codes: list[str], end: date, days: int) -> list[dict[str, Any]]:
+    # headroom for weekends and holidays
+    frame = read_signals(codes, end - timedelta(days=days * 7 // 5 + 30), end)
+    frame = frame[frame["p_score"].notna()].sort_values(["ts_code", "trade_date"], kind="mergesort")
+    by_code = {code: group.tail(days) for code, group in frame.groupby(frame["ts_code"].astype(str), sort=False)}
+    out = []
+    for code in codes:
+        group = by_code.get(code)
+        rows = [] if group is None else [
+            # float32 like the panel, so both paths return the same values
+            {"trade_date": d.isoformat(), "p_score": round(float(np.float32(v)), 4)}
+            for d, v in zip(group["trade_date"], group["p_score"])
+        ]
+        out.append({"ts_code": code, "rows": rows})
+    return out
+
+
+def score_history(codes: list[str], end: date, days: int) -> list[dict[str, Any]]:
+    """``[{"ts_code", "rows": [{"trade_date", "p_score"}, ...]}]`` over the last ``days`` trade dates to ``end``."""
+    if not codes:
+        return []
+    out = _from_panel(codes, end, days)
+    return out if out is not None else _from_signals(codes, end, days)
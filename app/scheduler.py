@@ -6,27 +6,94 @@ This module provides placeholders to avoid coupling at import time.
 
 from __future__ import annotations
 
-from typing import Any
-from datetime import date, timedelta
+from typing import Any, Callable, Iterable
+from datetime import date
 import hashlib
 import json
 
-import pandas as pd
 from dotenv import load_dotenv
 
 from app.settings import settings
 from app.adapters.tushare_adapter import fetch_daily as ts_fetch_daily, fetch_adj_factor as ts_fetch_adj, fetch_daily_basic as ts_fetch_basic
 from app.adapters.akshare_adapter import (
-    fetch_daily_for_codes as ak_fetch_daily,
-    fetch_daily_basic_for_codes as ak_fetch_basic,
+    fetch_daily_and_basic_for_codes as ak_fetch_daily_and_basic,
     fetch_adj_factor_for_codes as ak_fetch_adj,
-    fetch_daily_range_for_codes as ak_fetch_daily_range,
 )
+from app.datasource.compaction import compact_closed_months
+from app.datasource.enrich import enrich_prices
+from app.datasource.panel_cache import update_panel_cache
 from app.datasource.parquet_io import write_parquet_atomic
 from app.datasource.paths import PartitionPath
-from app.datasource.watermark import WatermarkRow, upsert_watermark
+from app.datasource.readers import invalidate_datasets
+from app.datasource.watermark import WatermarkRow, upsert_watermarks
 from app.datasource.sqlite_meta import enqueue_fail, upsert_job_status, list_jobs
 from app.api.watchlist_store import list_all_codes
+from app.market.daily import update_market_summary
+from app.rankings.daily import update_rankings
+from app.signals.daily import update_signals
+from app.universe.monthly import update_universe
+
+
+# 默认抓取沪深各 5 支示例，便于首次跑通（可在 watchlist 设置）
+DEFAULT_CODES = [
+    "000001.SZ","000002.SZ","000004.SZ","000006.SZ","000007.SZ",
+    "600000.SH","600009.SH","600519.SH","601988.SH","601318.SH",
+]
+
+
+def akshare_codes() -> list[str]:
+    # akshare: fetch per watchlist codes; fallback到 Top 部分代码为空则跳过
+    return list_all_codes() or list(DEFAULT_CODES)
+
+
+def day_fetchers(provider: str) -> tuple[Callable[[date], list[Any]], ...]:
+    """Fetch stages for one trade date; each returns a list of FetchResult (one per table)."""
+    if provider == "tushare":
+        return (lambda d: [ts_fetch_daily(d)], lambda d: [ts_fetch_adj(d)], lambda d: [ts_fetch_basic(d)])
+    codes = akshare_codes()
+    # prices_daily + daily_basic come from one request per symbol
+    return (
+        lambda d: ak_fetch_daily_and_basic(d, codes),
+        lambda d: [ak_fetch_adj(d, codes)],
+    )
+
+
+def write_results(dt: date, results: Iterable[Any]) -> list[WatermarkRow]:
+    """Write each non-empty FetchResult as the ``dt`` partition of its table.
+
+    ``prices_daily`` gets its derived columns (pre_close fill, is_trading,
+    mask_untradable) first, see :mod:`app.datasource.enrich`.
+    Returns the watermark rows; callers upsert them (one transaction per batch).
+    """
+    marks: list[WatermarkRow] = []
+    for result in results:
+        if result.df.empty:
+            continue
+
+        df = enrich_prices(result.df) if result.table == "prices_daily" else result.df
+        part = PartitionPath(result.table, dt)
+        rows = write_parquet_atomic(df, part.tmp_file(), part.final_file())
+
+        # naive hash: sha1 of sorted ts_code
+        sha = hashlib.sha1()
+        if "ts_code" in result.df.columns:
+            table_codes = ",".join(sorted(result.df["ts_code"].astype(str).tolist()))
+            sha.update(table_codes.encode("utf-8"))
+        marks.append(WatermarkRow(table=result.table, last_dt=dt, rowcount=rows, hash=sha.hexdigest()))
+    return marks
+
+
+def ingest_day(dt: date, fetchers: Iterable[Callable[[date], list[Any]]]) -> list[WatermarkRow]:
+    """Run every fetch stage for ``dt`` and write its partitions; failures go to fail_queue."""
+    marks: list[WatermarkRow] = []
+    for fetcher in fetchers:
+        try:
+            results = fetcher(dt)
+        except Exception as e:  # record to fail_queue and continue other tables
+            enqueue_fail(endpoint=fetcher.__name__, params=json.dumps({"date": dt.isoformat()}), last_error=str(e))
+            continue
+        marks.extend(write_results(dt, results))
+    return marks
 
 
 def daily_job(*args: Any, **kwargs: Any) -> None:
@@ -45,82 +112,63 @@ def daily_job(*args: Any, **kwargs: Any) -> None:
     else:
         dt = date.today()
 
-    provider = settings.data_provider.lower()
-    if provider == "tushare":
-        fetchers = (lambda d: ts_fetch_daily(d), lambda d: ts_fetch_adj(d), lambda d: ts_fetch_basic(d))
-    else:
-        # akshare: fetch per watchlist codes; fallback到 Top 部分代码为空则跳过
-        codes = list_all_codes()
-        if not codes:
-            # 默认抓取沪深各 5 支示例，便于首次跑通（可在 watchlist 设置）
-            codes = [
-                "000001.SZ","000002.SZ","000004.SZ","000006.SZ","000007.SZ",
-                "600000.SH","600009.SH","600519.SH","601988.SH","601318.SH",
-            ]
-        fetchers = (
-            lambda d: ak_fetch_daily(d, codes),
-            lambda d: ak_fetch_adj(d, codes),
-            lambda d: ak_fetch_basic(d, codes),
-        )
-
-    for fetcher in fetchers:
-        try:
-            result = fetcher(dt)
-        except Exception as e:  # record to fail_queue and continue other tables
-            enqueue_fail(endpoint=fetcher.__name__, params=json.dumps({"date": dt.isoformat()}), last_error=str(e))
-            continue
-
-        if result.df.empty:
-            continue
-
-        part = PartitionPath(result.table, dt)
-        rows = write_parquet_atomic(result.df, part.tmp_file(), part.final_file())
-
-        # naive hash: sha1 of sorted ts_code
-        sha = hashlib.sha1()
-        if "ts_code" in result.df.columns:
-            codes = ",".join(sorted(result.df["ts_code"].astype(str).tolist()))
-            sha.update(codes.encode("utf-8"))
-        upsert_watermark(WatermarkRow(table=result.table, last_dt=dt, rowcount=rows, hash=sha.hexdigest()))
+    marks = ingest_day(dt, day_fetchers(settings.data_provider.lower()))
+    upsert_watermarks(marks)
+    invalidate_datasets()
+
+    # append the day to the memory-mapped price panel
+    try:
+        update_panel_cache(dt)
+    except Exception as e:
+        enqueue_fail(endpoint="update_panel_cache", params=json.dumps({"date": dt.isoformat()}), last_error=str(e))
+    # per-day market aggregates for /api/market/summary
+    try:
+        update_market_summary(dt)
+    except Exception as e:
+        enqueue_fail(endpoint="update_market_summary", params=json.dumps({"date": dt.isoformat()}), last_error=str(e))
+    # derived signals for the day (incremental, from the rolling state)
+    try:
+        update_signals(dt)
+    except Exception as e:
+        enqueue_fail(endpoint="update_signals", params=json.dumps({"date": dt.isoformat()}), last_error=str(e))
+    # rolling 成交额 state; writes universe_monthly on the first trading day of a month
+    try:
+        update_universe(dt)
+    except Exception as e:
+        enqueue_fail(endpoint="update_universe", params=json.dumps({"date": dt.isoformat()}), last_error=str(e))
+    # percentile ranks + top-K for /api/rankings/p_score (needs the day's signals and universe)
+    try:
+        update_rankings(dt)
+    except Exception as e:
+        enqueue_fail(endpoint="update_rankings", params=json.dumps({"date": dt.isoformat()}), last_error=str(e))
     # update job status snapshot (manual invocation)
     upsert_job_status("daily_job", last_run=f"{dt.isoformat()} 19:00:00", state="ok", next_run=None)
 
 
+def compact_job(*args: Any, **kwargs: Any) -> None:
+    """Monthly: fold closed months' day partitions into one sorted file per month."""
+    try:
+        results = compact_closed_months()
+    except Exception as e:
+        enqueue_fail(endpoint="compact_job", params=json.dumps({}), last_error=str(e))
+        upsert_job_status("compact_job", last_run=None, state="error", next_run=None)
+        return
+    if results:
+        invalidate_datasets()
+    upsert_job_status("compact_job", last_run=date.today().isoformat(), state="ok", next_run=None)
+
+
 def get_jobs_status() -> list[dict[str, Any]]:
     return list_jobs()
 
 
 def run_daily_range(start: date, end: date) -> None:
-    """Run daily_job for each business day in [start, end].
+    """Backfill [start, end] on trading days; see :mod:`app.backfill`.
 
-    Does not require trade_cal permission; non-trading days will produce empty
-    frames and be skipped by downstream logic.
+    Dates already checkpointed in ``backfill_progress`` are skipped, so an
+    interrupted run resumes where it stopped.
     """
-    current = start
-    provider = settings.data_provider.lower()
-    if provider == "akshare":
-        codes = list_all_codes()
-        if not codes:
-            codes = [
-                "000001.SZ","000002.SZ","000004.SZ","000006.SZ","000007.SZ",
-                "600000.SH","600009.SH","600519.SH","601988.SH","601318.SH",
-            ]
-        # 批量抓区间，再按日落分区文件
-        df = ak_fetch_daily_range(start, end, codes)
-        if not df.empty:
-            for d, g in df.groupby("trade_date"):
-                part = PartitionPath("prices_daily", d)
-                rows = write_parquet_atomic(g, part.tmp_file(), part.final_file())
-                sha = hashlib.sha1(
-                    ",".join(sorted(g["ts_code"].astype(str).tolist())).encode("utf-8")
-                ).hexdigest()
-                upsert_watermark(WatermarkRow(table="prices_daily", last_dt=d, rowcount=rows, hash=sha))
-        # basic/adj 暂为空表（后续可补）
-    else:
-        current = start
-        while current <= end:
-            if current.weekday() < 5:
-                daily_job(date=current)
-            current += timedelta(days=1)
-
+    # local import: app.backfill builds on this module
+    from app.backfill import run_backfill
 
+    run_backfill(start, end)
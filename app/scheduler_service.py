@@ -8,7 +8,8 @@ from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.triggers.cron import CronTrigger
 
 from app.settings import settings
-from app.scheduler import daily_job
+from app.scheduler import compact_job, daily_job
+from app.datasource.meta_db import migrate
 from app.datasource.sqlite_meta import upsert_job_status
 
 
@@ -20,6 +21,7 @@ def _on_event_update_status(event) -> None:  # type: ignore
 
 
 async def main() -> None:
+    migrate()
     scheduler = AsyncIOScheduler(jobstores={
         "default": SQLAlchemyJobStore(url=settings.database_url)
     }, timezone=settings.tz)
@@ -34,6 +36,16 @@ async def main() -> None:
         replace_existing=True,
     )
 
+    # Monthly compaction of closed months, before the trading day starts
+    scheduler.add_job(
+        compact_job,
+        id="compact_job",
+        trigger=CronTrigger(day=1, hour=3, minute=0),
+        coalesce=True,
+        misfire_grace_time=6 * 3600,
+        replace_existing=True,
+    )
+
     # Listeners update status table
     scheduler.add_listener(_on_event_update_status)
 
@@ -9,9 +9,35 @@ class AppSettings(BaseSettings):
 
     tz: str = "Asia/Shanghai"
     database_url: str = "sqlite:///data/meta.sqlite"
+    meta_busy_timeout_ms: int = 5000  # wait this long for meta.sqlite's write lock
     tushare_token: str | None = None
     serverchan_sendkey: str | None = None
     data_provider: str = "akshare"  # akshare | tushare
+    query_engine: str = "arrow"  # arrow | duckdb
+    api_cache_max_bytes: int = 64 * 1024 * 1024  # in-process response cache budget; 0 disables
+    api_cache_disk: bool = False  # also persist cached responses under data/cache/api
+    api_io_workers: int = 8  # threads for dataset reads behind the async API handlers
+    api_stream_batch_rows: int = 65536  # rows per chunk for /api/prices?format=ndjson
+    ak_max_workers: int = 8  # concurrent AkShare symbol requests
+    ak_rate_per_sec: float = 4.0  # token-bucket rate shared by all AkShare requests
+    ak_burst: int = 8
+    ak_max_retries: int = 3  # attempts per symbol before it goes to fail_queue
+    ts_rate_per_sec: float = 3.0  # TuShare request rate during backfills
+    backfill_workers: int = 4  # dates (tushare) or date chunks (akshare) fetched concurrently
+    parquet_writer_profile: str = "lookup"  # plain | lookup (sorted by ts_code, small row groups, bloom filters)
+    backfill_chunk_days: int = 20  # trading days per AkShare range request during backfills
+    universe_size: int = 200  # monthly universe: Top-N by average 成交额
+    universe_window_days: int = 60  # trading days averaged
+    universe_min_listed_days: int = 30  # exclude codes listed this recently (calendar days)
+    tick_size: float = 0.01  # 元; limit-price comparison tolerance is half a tick
+    limit_pct_main: float = 0.10  # daily price limits by board, relative to pre_close
+    limit_pct_growth: float = 0.20  # ChiNext (since 2020-08-24) and STAR
+    limit_pct_bse: float = 0.30
+    limit_pct_st: float = 0.05  # main-board ST names
+    market_summary_top_n: int = 20  # movers kept per side in market_summary
+    backtest_workers: int = 1  # concurrent POST /api/backtest runs
+    rankings_top_k: int = 500  # rows kept per day in rankings_daily (max ?top=)
+    rankings_history_days: int = 60  # trading days of p_score per code for ?with_history=true
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore")
 
 
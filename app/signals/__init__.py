@@ -0,0 +1,3 @@
+"""Signals: p_mom_63d, p_rev_5d, p_score and the persisted signals_daily dataset."""
+
+__all__ = []
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from math import sqrt
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+MOM_LAG = 63
+REV_LAG = 5
+VOL_WINDOW = 20
+MA_WINDOWS = (5, 10, 20)
+# rows per code needed to compute every signal for the latest day
+TAIL_ROWS = max(MOM_LAG, REV_LAG, VOL_WINDOW, *MA_WINDOWS) + 1
+
+SIGNAL_COLUMNS = [
+    "ts_code", "trade_date", "adj_factor",
+    *[f"ma{w}" for w in MA_WINDOWS],
+    "vol_ann", "p_mom_63d", "p_rev_5d", "p_score", "mask_untradable", "notes",
+]
+
+
+def rank_z(values: pd.Series, lower: float = 0.01, upper: float = 0.99) -> pd.Series:
+    """Cross-sectional 1%–99% winsorize followed by a z-score (spec §6)."""
+    valid = values.dropna()
+    if len(valid) < 2:
+        return pd.Series(np.where(values.notna(), 0.0, np.nan), index=values.index)
+    clipped = values.clip(valid.quantile(lower), valid.quantile(upper))
+    std = clipped.std(ddof=0)
+    if not std or np.isnan(std):
+        return pd.Series(np.where(values.notna(), 0.0, np.nan), index=values.index)
+    return (clipped - clipped.mean()) / std
+
+
+def compute_p_score(p_mom: pd.Series, p_rev: pd.Series) -> pd.Series:
+    return rank_z(p_mom) + 0.5 * rank_z(p_rev)
+
+
+def compute_signals(frame: pd.DataFrame, ma_windows: Iterable[int] = MA_WINDOWS) -> pd.DataFrame:
+    """Time-series signals for every row of ``frame``.
+
+    ``frame`` is sorted by (ts_code, trade_date) with ``close_hfq``
+    (close_raw * adj_factor, i.e. un-normalized backward-adjusted close),
+    ``adj_factor``, ``volume`` and, when stored, ``mask_untradable``. MAs stay in close_hfq units; divide by the
+    query's base factor to get the backward-adjusted values the API serves.
+    Ratios (momentum, reversal, volatility) are unit-free.
+    """
+    keys = frame["ts_code"]
+    close = frame["close_hfq"].astype(float)
+    grouped = close.groupby(keys, sort=False)
+    out = frame[["ts_code", "trade_date", "adj_factor"]].copy()
+    for w in ma_windows:
+        out[f"ma{w}"] = grouped.rolling(window=w, min_periods=w).mean().reset_index(level=0, drop=True)
+    ret = grouped.pct_change()
+    vol = ret.groupby(keys, sort=False).rolling(window=VOL_WINDOW, min_periods=VOL_WINDOW).std()
+    out["vol_ann"] = vol.reset_index(level=0, drop=True) * sqrt(252)
+    out["p_mom_63d"] = close / grouped.shift(MOM_LAG) - 1
+    out["p_rev_5d"] = -(close / grouped.shift(REV_LAG) - 1)
+    no_volume = ~(pd.to_numeric(frame["volume"], errors="coerce").fillna(0) > 0)
+    if "mask_untradable" in frame.columns:
+        # stored at write time (limit rules included); older partitions fall back to volume
+        stored = frame["mask_untradable"]
+        out["mask_untradable"] = stored.where(stored.notna(), no_volume).astype(bool)
+    else:
+        out["mask_untradable"] = no_volume
+    return out
+
+
+def finalize_day(day: pd.DataFrame) -> pd.DataFrame:
+    """Add the cross-sectional ``p_score`` and ``notes`` for one trade_date."""
+    day = day.copy()
+    day["p_score"] = compute_p_score(day["p_mom_63d"], day["p_rev_5d"])
+    notes = pd.Series("", index=day.index, dtype=object)
+    for col in ("p_mom_63d", "p_rev_5d", "vol_ann"):
+        notes = notes + np.where(day[col].isna(), f"{col}_missing,", "")
+    day["notes"] = notes.str.rstrip(",")
+    return day[SIGNAL_COLUMNS]
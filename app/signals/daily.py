@@ -0,0 +1,122 @@
+"""signals_daily maintenance.
+
+``update_signals(dt)`` is run by ``daily_job`` after the day's prices land. It
+keeps a compact rolling-state tail (the last ``TAIL_ROWS`` closes per code in
+``data/signals_state.parquet``), appends the new day, computes the day's
+signals from that tail only and writes one ``signals_daily`` day partition.
+``rebuild_signals(start, end)`` recomputes a whole range in one vectorized
+pass (first run, backfills).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import date, timedelta
+from typing import Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.datasource.parquet_io import write_parquet_atomic
+from app.datasource.paths import SIGNALS_STATE_PARQUET, PartitionPath
+from app.datasource.readers import count_rows, read_prices_and_adj
+from app.datasource.watermark import WatermarkRow, upsert_watermark, upsert_watermarks
+
+from .core import TAIL_ROWS, compute_signals, finalize_day
+
+
+STATE_COLUMNS = ["ts_code", "trade_date", "close_raw", "adj_factor", "volume", "mask_untradable"]
+# codes without a row for this long are dropped from the state (delisted)
+STALE_DAYS = 180
+
+
+def _state_rows(prices: pd.DataFrame) -> pd.DataFrame:
+    if prices.empty:
+        return pd.DataFrame(columns=STATE_COLUMNS)
+    # mask_untradable is missing from partitions written before it was stored
+    out = prices.reindex(columns=STATE_COLUMNS)
+    out["adj_factor"] = pd.to_numeric(out["adj_factor"], errors="coerce")
+    return out
+
+
+def _with_close_hfq(tail: pd.DataFrame) -> pd.DataFrame:
+    """close_raw * adj_factor with factors filled per code (1.0 when a code has none)."""
+    tail = tail.sort_values(["ts_code", "trade_date"], kind="mergesort").reset_index(drop=True)
+    factor = tail["adj_factor"].groupby(tail["ts_code"], sort=False).ffill()
+    factor = factor.groupby(tail["ts_code"], sort=False).bfill().fillna(1.0)
+    tail["adj_factor"] = factor
+    tail["close_hfq"] = pd.to_numeric(tail["close_raw"], errors="coerce") * factor
+    return tail
+
+
+def _load_state() -> Optional[pd.DataFrame]:
+    if not SIGNALS_STATE_PARQUET.exists():
+        return None
+    return pq.read_table(SIGNALS_STATE_PARQUET).to_pandas()
+
+
+def _save_state(tail: pd.DataFrame) -> None:
+    tmp = SIGNALS_STATE_PARQUET.with_name(SIGNALS_STATE_PARQUET.name + ".tmp")
+    write_parquet_atomic(tail.reindex(columns=STATE_COLUMNS).reset_index(drop=True), tmp, SIGNALS_STATE_PARQUET)
+
+
+def _lookback_start(dt: date) -> date:
+    # TAIL_ROWS trading days back, with headroom for holidays
+    return dt - timedelta(days=TAIL_ROWS * 7 // 5 + 30)
+
+
+def _write_day(day: pd.DataFrame, dt: date) -> WatermarkRow:
+    part = PartitionPath("signals_daily", dt)
+    rows = write_parquet_atomic(day.reset_index(drop=True), part.tmp_file(), part.final_file())
+    sha = hashlib.sha1(",".join(sorted(day["ts_code"].astype(str).tolist())).encode("utf-8")).hexdigest()
+    return WatermarkRow(table="signals_daily", last_dt=dt, rowcount=rows, hash=sha)
+
+
+def update_signals(dt: date) -> int:
+    """Compute and persist signals for ``dt`` from the rolling state; returns rows written."""
+    today = read_prices_and_adj(None, dt, dt)
+    if today.empty:
+        return 0
+
+    state = _load_state()
+    last = state["trade_date"].max() if state is not None and not state.empty else None
+    base: Optional[pd.DataFrame] = None
+    if last is not None and last <= dt:
+        base = state[state["trade_date"] < dt]
+        prior = base["trade_date"].max() if not base.empty else None
+        # a missed day in between would leave a hole in the tail
+        if prior is None or count_rows("prices_daily", None, prior + timedelta(days=1), dt - timedelta(days=1)) > 0:
+            base = None
+    if base is None:
+        base = _state_rows(read_prices_and_adj(None, _lookback_start(dt), dt - timedelta(days=1)))
+
+    tail = pd.concat([base, _state_rows(today)], ignore_index=True)
+    tail = tail.sort_values(["ts_code", "trade_date"], kind="mergesort").groupby("ts_code", sort=False).tail(TAIL_ROWS)
+    frame = _with_close_hfq(tail)
+    signals = compute_signals(frame)
+    mark = _write_day(finalize_day(signals[signals["trade_date"] == dt]), dt)
+    upsert_watermark(mark)
+
+    if last is None or dt >= last:
+        last_seen = frame.groupby("ts_code")["trade_date"].transform("max")
+        _save_state(frame[last_seen >= dt - timedelta(days=STALE_DAYS)])
+    return mark.rowcount
+
+
+def rebuild_signals(start: date, end: date) -> int:
+    """Recompute signals_daily for every trade date in [start, end] in one pass."""
+    prices = read_prices_and_adj(None, _lookback_start(start), end)
+    if prices.empty:
+        return 0
+    frame = _with_close_hfq(_state_rows(prices))
+    signals = compute_signals(frame)
+    in_range = signals[(signals["trade_date"] >= start) & (signals["trade_date"] <= end)]
+    marks = [_write_day(finalize_day(day), dt) for dt, day in in_range.groupby("trade_date", sort=True)]
+    upsert_watermarks(marks)
+
+    state = _load_state()
+    last = state["trade_date"].max() if state is not None and not state.empty else None
+    if last is None or end >= last:
+        tail = frame[frame["trade_date"] <= end].groupby("ts_code", sort=False).tail(TAIL_ROWS)
+        _save_state(tail)
+    return sum(m.rowcount for m in marks)
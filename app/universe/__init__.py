@@ -0,0 +1,3 @@
+"""Universe: monthly Top-N by average 成交额 and the universe_monthly dataset."""
+
+__all__ = []
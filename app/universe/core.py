@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+WINDOW_DAYS = 60
+SIZE = 200
+MIN_LISTED_DAYS = 30
+
+AMOUNT_COLUMNS = ["ts_code", "trade_date", "amount"]
+SUM_COLUMNS = ["ts_code", "amount_sum", "n_days", "first_seen"]
+UNIVERSE_COLUMNS = ["ts_code", "rank", "avg_turnover", "n_days", "asof"]
+
+
+def _day_sums(rows: pd.DataFrame) -> pd.DataFrame:
+    amount = pd.to_numeric(rows["amount"], errors="coerce").fillna(0.0)
+    grouped = amount.groupby(rows["ts_code"], sort=False)
+    return pd.DataFrame({"amount_sum": grouped.sum(), "n_days": grouped.size()})
+
+
+@dataclass
+class RollingAmount:
+    """Per-code 成交额 sums over the last ``window`` trading days.
+
+    ``sums`` is indexed by ts_code; ``days`` lists the trading days in the
+    window, oldest first. The raw rows are not kept: the day that falls out
+    is re-read from its ``prices_daily`` partition (:meth:`evicts`).
+    ``first_seen`` is the first day a code was seen, the listing-age fallback
+    when stock_basic has no ``list_date`` (only ever matters for codes younger
+    than the window).
+    """
+
+    sums: pd.DataFrame
+    days: list[date]
+    window: int = WINDOW_DAYS
+
+    @property
+    def last_date(self) -> Optional[date]:
+        return self.days[-1] if self.days else None
+
+    def evicts(self) -> Optional[date]:
+        """The day :meth:`advance` will drop, if the window is full."""
+        return self.days[0] if len(self.days) >= self.window else None
+
+    @classmethod
+    def from_rows(cls, rows: pd.DataFrame, window: int = WINDOW_DAYS) -> "RollingAmount":
+        """Full recompute from price rows (any span; only the last ``window`` days count)."""
+        days = sorted(rows["trade_date"].unique())[-window:]
+        if days:
+            rows = rows[rows["trade_date"] >= days[0]]
+        sums = _day_sums(rows)
+        sums["first_seen"] = rows.groupby("ts_code", sort=False)["trade_date"].min()
+        return cls(sums=sums, days=list(days), window=window)
+
+    def advance(self, day: pd.DataFrame, evicted: Optional[pd.DataFrame] = None) -> "RollingAmount":
+        """Add one trading day's rows; ``evicted`` are the rows of :meth:`evicts`."""
+        dt = day["trade_date"].max()
+        sums = self.sums[["amount_sum", "n_days"]].add(_day_sums(day), fill_value=0)
+        days = self.days + [dt]
+        if self.evicts() is not None:
+            days = days[1:]
+            if evicted is not None and not evicted.empty:
+                sums = sums.sub(_day_sums(evicted), fill_value=0)
+        sums["first_seen"] = self.sums["first_seen"].reindex(sums.index).fillna(dt)
+        sums = sums[sums["n_days"] > 0]
+        sums["n_days"] = sums["n_days"].astype("int64")
+        return RollingAmount(sums=sums, days=days, window=self.window)
+
+
+def select_universe(
+    sums: pd.DataFrame,
+    asof: date,
+    basic: Optional[pd.DataFrame] = None,
+    size: int = SIZE,
+    min_listed_days: int = MIN_LISTED_DAYS,
+) -> pd.DataFrame:
+    """Top ``size`` codes by average 成交额, excluding ST and codes listed <= ``min_listed_days``.
+
+    ``basic`` is stock_basic (ts_code, name, list_date); codes missing from it
+    are kept and aged by ``first_seen``.
+    """
+    frame = sums.copy()
+    frame["avg_turnover"] = frame["amount_sum"] / frame["n_days"]
+    listed = frame["first_seen"]
+    if basic is not None and not basic.empty:
+        info = basic.drop_duplicates("ts_code").set_index("ts_code").reindex(frame.index)
+        is_st = info["name"].fillna("").astype(str).str.upper().str.contains("ST", regex=False)
+        frame = frame[~is_st.to_numpy()]
+        listed = pd.to_datetime(info["list_date"], errors="coerce").dt.date.reindex(frame.index).fillna(frame["first_seen"])
+    age = pd.Series([(asof - d).days for d in listed], index=frame.index)
+    frame = frame[age > min_listed_days]
+    frame = frame.rename_axis("ts_code").reset_index()
+    frame = frame.sort_values(["avg_turnover", "ts_code"], ascending=[False, True], kind="mergesort").head(size)
+    frame["rank"] = np.arange(1, len(frame) + 1, dtype="int64")
+    frame["asof"] = asof
+    return frame[UNIVERSE_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,169 @@
+"""universe_monthly maintenance.
+
+``update_universe(dt)`` is run by ``daily_job`` after the day's prices land. It
+advances the rolling 成交额 sums (``data/universe_state/``) by that one day,
+reading only that day and the day leaving the window, and, on the first
+trading day of a month, first writes the month's snapshot from the window
+ending on the previous trading day. stock_basic is re-fetched for it once a
+month, when the stored snapshot is from an earlier month. ``build_universe`` computes
+one snapshot from a full ``prices_daily`` scan (backfills, checks);
+``rebuild_universe(start, end)`` does so for every month a backfill touched.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import date, timedelta
+from typing import Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.datasource.parquet_io import WRITER_PROFILES, write_parquet_atomic
+from app.datasource.paths import STOCK_BASIC_PARQUET, UNIVERSE_STATE_DIR, MonthPartitionPath
+from app.datasource.readers import STOCK_BASIC_COLUMNS, count_rows, read_prices, read_stock_basic
+from app.datasource.sqlite_meta import enqueue_fail
+from app.datasource.watermark import WatermarkRow, upsert_watermark, upsert_watermarks
+from app.settings import settings
+
+from .core import SUM_COLUMNS, AMOUNT_COLUMNS, RollingAmount, select_universe
+
+
+TABLE = "universe_monthly"
+
+
+def refresh_stock_basic(provider: Optional[str] = None) -> int:
+    """Re-fetch the stock_basic snapshot (names for ST, list_date, industry)."""
+    provider = (provider or settings.data_provider).lower()
+    if provider == "tushare":
+        from app.adapters.tushare_adapter import fetch_stock_basic
+    else:
+        from app.adapters.akshare_adapter import fetch_stock_basic
+    df = fetch_stock_basic()
+    if df.empty:
+        return 0
+    tmp = STOCK_BASIC_PARQUET.with_name(STOCK_BASIC_PARQUET.name + ".tmp")
+    return write_parquet_atomic(df[STOCK_BASIC_COLUMNS].reset_index(drop=True), tmp, STOCK_BASIC_PARQUET)
+
+
+def _stock_basic_month() -> Optional[tuple[int, int]]:
+    """(year, month) the stock_basic snapshot was last written; None if there is none."""
+    try:
+        written = date.fromtimestamp(STOCK_BASIC_PARQUET.stat().st_mtime)
+    except FileNotFoundError:
+        return None
+    return written.year, written.month
+
+
+def _lookback_start(before: date) -> date:
+    # WINDOW_DAYS trading days back, with headroom for holidays
+    return before - timedelta(days=settings.universe_window_days * 7 // 5 + 30)
+
+
+def _window_state(before: date) -> RollingAmount:
+    """Full recompute of the window ending on the last trading day before ``before``."""
+    rows = read_prices(None, _lookback_start(before), before - timedelta(days=1), columns=AMOUNT_COLUMNS)
+    return RollingAmount.from_rows(rows, window=settings.universe_window_days)
+
+
+def _load_state() -> Optional[RollingAmount]:
+    sums_file, days_file = UNIVERSE_STATE_DIR / "sums.parquet", UNIVERSE_STATE_DIR / "days.parquet"
+    if not sums_file.exists() or not days_file.exists():
+        return None
+    sums = pq.read_table(sums_file).to_pandas().set_index("ts_code")
+    days = pq.read_table(days_file).column("trade_date").to_pylist()
+    return RollingAmount(sums=sums, days=days, window=settings.universe_window_days)
+
+
+def _save_state(state: RollingAmount) -> None:
+    frames = {
+        "sums": state.sums.rename_axis("ts_code").reset_index()[SUM_COLUMNS],
+        "days": pd.DataFrame({"trade_date": pd.Series(state.days, dtype=object)}),
+    }
+    for name, df in frames.items():
+        final = UNIVERSE_STATE_DIR / f"{name}.parquet"
+        write_parquet_atomic(df, final.with_name(final.name + ".tmp"), final)
+
+
+def _write_snapshot(state: RollingAmount, year: int, month: int, basic: pd.DataFrame) -> Optional[WatermarkRow]:
+    asof = state.last_date
+    if asof is None:
+        return None
+    universe = select_universe(
+        state.sums,
+        asof,
+        basic,
+        size=settings.universe_size,
+        min_listed_days=settings.universe_min_listed_days,
+    )
+    part = MonthPartitionPath(TABLE, year, month)
+    # rank order on disk; the "lookup" profile would re-sort by ts_code
+    rows = write_parquet_atomic(universe, part.tmp_file(), part.final_file(), profile=WRITER_PROFILES["plain"])
+    sha = hashlib.sha1(",".join(universe["ts_code"].astype(str)).encode("utf-8")).hexdigest()
+    return WatermarkRow(table=TABLE, last_dt=date(year, month, 1), rowcount=rows, hash=sha)
+
+
+def build_universe(year: int, month: int) -> int:
+    """Compute one month's snapshot from a full scan of the preceding window."""
+    mark = _write_snapshot(_window_state(date(year, month, 1)), year, month, read_stock_basic())
+    if mark is None:
+        return 0
+    upsert_watermark(mark)
+    return mark.rowcount
+
+
+def update_universe(dt: date, refresh_basic: bool = True) -> int:
+    """Advance the rolling state by ``dt``; returns snapshot rows written (0 mid-month)."""
+    state = _load_state()
+    last = state.last_date if state is not None else None
+    if last is not None and last >= dt:
+        return 0  # already applied (re-run) or an older date: use rebuild_universe
+    if last is None or count_rows("prices_daily", None, last + timedelta(days=1), dt - timedelta(days=1)) > 0:
+        # no state yet, or a missed day in between would leave a hole in the window
+        state = _window_state(dt)
+        last = state.last_date
+
+    written = 0
+    if last is not None and (last.year, last.month) != (dt.year, dt.month):
+        # keyed on the stored snapshot: the month-change test above stays true on
+        # every non-trading day until a trading day advances the state
+        if refresh_basic and (_stock_basic_month() or (0, 0)) < (dt.year, dt.month):
+            try:
+                refresh_stock_basic()
+            except Exception as e:
+                enqueue_fail(endpoint="refresh_stock_basic", params=json.dumps({"date": dt.isoformat()}), last_error=str(e))
+        mark = _write_snapshot(state, dt.year, dt.month, read_stock_basic())
+        if mark is not None:
+            upsert_watermark(mark)
+            written = mark.rowcount
+
+    day = read_prices(None, dt, dt, columns=AMOUNT_COLUMNS)
+    if not day.empty:
+        dropped = state.evicts()
+        evicted = read_prices(None, dropped, dropped, columns=AMOUNT_COLUMNS) if dropped is not None else None
+        state = state.advance(day, evicted)
+    _save_state(state)
+    return written
+
+
+def rebuild_universe(start: date, end: date) -> int:
+    """Recompute the snapshots of every month whose first day falls in (start, end]
+    and reset the rolling state to end on ``end``."""
+    basic = read_stock_basic()
+    marks: list[WatermarkRow] = []
+    y, m = start.year, start.month
+    while True:
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+        if date(y, m, 1) > end:
+            break
+        mark = _write_snapshot(_window_state(date(y, m, 1)), y, m, basic)
+        if mark is not None:
+            marks.append(mark)
+    upsert_watermarks(marks)
+
+    state = _load_state()
+    last = state.last_date if state is not None else None
+    if last is None or end >= last:
+        _save_state(_window_state(end + timedelta(days=1)))
+    return sum(mark.rowcount for mark in marks)
@@ -0,0 +1,84 @@
+"""Backtest throughput on a synthetic market.
+
+Usage: python -m scripts.bench_backtest --codes 300 --years 5 [--compact]
+
+Builds prices, ``signals_daily`` and ``universe_monthly`` (Top200) under a
+scratch ``data/``, then times the panel load, one full run and a parameter
+sweep over the same panel (``topN`` x ``rebalance_days`` x ``fees_bps``).
+``--compact`` first folds closed months into month files, as ``compact_job``
+does in production.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict
+
+from app.datasource import readers
+from scripts.synth_market import build_market, trading_days, workdir
+
+
+def run(n_codes: int, n_years: int, compact: bool = False) -> Dict[str, object]:
+    days = trading_days(date(2020, 1, 2), n_years * 250)
+    start, end = days[0], days[-1]
+    with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+        from app.backtest.engine import BacktestConfig, run_backtest, run_sweep
+        from app.backtest.panel import load_panel
+        from app.datasource.compaction import compact_closed_months
+        from app.signals.daily import rebuild_signals
+        from app.universe.monthly import rebuild_universe
+
+        t0 = time.perf_counter()
+        build_market(n_codes, len(days))
+        readers.invalidate_datasets()
+        rebuild_signals(start, end)
+        rebuild_universe(start, end)
+        if compact:
+            compact_closed_months(today=end)
+        readers.invalidate_datasets()
+        setup_s = time.perf_counter() - t0
+
+        config = BacktestConfig(start=start, end=end, universe_id="top200", top_n=20)
+        t0 = time.perf_counter()
+        panel = load_panel(start, end, config.universe_id, (config.signal,))
+        load_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        result = run_backtest(panel, config)
+        run_s = time.perf_counter() - t0
+
+        grid = {"top_n": [10, 20, 50], "rebalance_days": [1, 5, 10, 20], "fees_bps": [5, 15]}
+        t0 = time.perf_counter()
+        sweep = run_sweep(panel, config, grid)
+        sweep_s = time.perf_counter() - t0
+
+        return {
+            "codes": n_codes,
+            "compacted": compact,
+            "trading_days": len(days),
+            "setup_s": round(setup_s, 1),
+            "panel_shape": list(panel.shape),
+            "panel_mb": round(panel.nbytes() / 2**20, 1),
+            "panel_load_s": round(load_s, 3),
+            "run_s": round(run_s, 3),
+            "sweep_configs": len(sweep),
+            "sweep_s": round(sweep_s, 3),
+            "configs_per_s": round(len(sweep) / sweep_s, 1),
+            "metrics": result["metrics"],
+            "executions": result["executions"],
+            "by_quantile": result["by_quantile"],
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=300)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--compact", action="store_true", help="compact closed months before loading")
+    args = parser.parse_args()
+    print(json.dumps(run(args.codes, args.years, args.compact), indent=2))
@@ -0,0 +1,87 @@
+"""Scan times before/after monthly compaction on a synthetic market.
+
+Usage: python -m scripts.bench_compaction --codes 5000 --years 2
+
+"cold" evicts the Parquet files from the OS page cache (posix_fadvise
+DONTNEED) and drops the cached datasets before each run; "warm" repeats the
+query with both caches populated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.datasource import readers
+from app.datasource.compaction import compact_closed_months
+from scripts.synth_market import build_market, trading_days, workdir
+
+
+def _evict(root: Path) -> None:
+    for path in root.rglob("*.parquet"):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _timed(fn: Callable[[], object]) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def scan_times(queries: Dict[str, Callable[[], object]], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for label, fn in queries.items():
+        cold = []
+        for _ in range(repeat):
+            _evict(readers.PARQUET_DIR)
+            readers.invalidate_datasets()
+            cold.append(_timed(fn))
+        warm = min(_timed(fn) for _ in range(repeat))
+        out[label] = {"cold_ms": round(min(cold) * 1000, 2), "warm_ms": round(warm * 1000, 2)}
+    return out
+
+
+def _files(table: str) -> int:
+    return sum(1 for _ in (readers.PARQUET_DIR / table).rglob("*.parquet"))
+
+
+def run(n_codes: int, n_years: int) -> Dict[str, object]:
+    days = trading_days(date(2020, 1, 2), n_years * 250)
+    start, end = days[0], days[-1]
+    last_year = days[-min(len(days), 250)]
+    out: Dict[str, object] = {"codes": n_codes, "years": n_years}
+    with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+        codes = build_market(n_codes, len(days))
+        one: List[str] = [codes[len(codes) // 3]]
+        sel: Optional[List[str]] = None
+        queries: Dict[str, Callable[[], object]] = {
+            "1_code_full_range": lambda: readers.read_prices_and_adj(one, start, end),
+            "market_1y": lambda: readers.read_prices_and_adj(sel, last_year, end),
+        }
+        out["files_before"] = _files("prices_daily")
+        out["before"] = scan_times(queries)
+        t0 = time.perf_counter()
+        results = compact_closed_months(today=date(end.year + 1, 1, 1))
+        out["compaction_s"] = round(time.perf_counter() - t0, 2)
+        out["months_compacted"] = len(results)
+        out["files_after"] = _files("prices_daily")
+        out["after"] = scan_times(queries)
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=2)
+    args = parser.parse_args()
+    print(json.dumps(run(args.codes, args.years), indent=2))
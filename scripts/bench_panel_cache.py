@@ -0,0 +1,81 @@
+"""Memory-mapped panel cache vs Parquet + pandas on a synthetic market.
+
+Usage: python -m scripts.bench_panel_cache --codes 2000 --days 500
+
+Builds the cache over all but the last ``--append`` days, appends those one
+at a time (as ``daily_job`` does), checks the panel against
+``read_prices_and_adj`` and times a full-range adjusted-close panel both ways:
+Parquet scan + join + pivot vs slicing the mapped file (cold map and warm).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from app.datasource import readers
+from scripts.synth_market import build_market, trading_days, workdir
+
+
+def run(n_codes: int, n_days: int, n_append: int) -> Dict[str, object]:
+    days = trading_days(date(2020, 1, 2), n_days)
+    with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+        from app.datasource import panel_cache
+
+        build_market(n_codes, n_days)
+        readers.invalidate_datasets()
+
+        t0 = time.perf_counter()
+        panel_cache.rebuild_panel_cache(end=days[-n_append - 1])
+        rebuild_s = time.perf_counter() - t0
+
+        appends = []
+        for d in days[-n_append:]:
+            t0 = time.perf_counter()
+            panel_cache.update_panel_cache(d)
+            appends.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        frame = readers.read_prices_and_adj(None, days[0], days[-1])
+        frame["close_hfq"] = frame["close_raw"].astype(float) * frame["adj_factor"].astype(float)
+        wide = frame.pivot(index="trade_date", columns="ts_code", values="close_hfq")
+        pandas_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        view = panel_cache.open_panel_cache()
+        close = view.window("close", days[0], days[-1], list(wide.columns))
+        cold_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        close = view.window("close", days[0], days[-1], list(wide.columns))
+        warm_s = time.perf_counter() - t0
+
+        expected = wide.to_numpy(dtype=np.float32)
+        return {
+            "codes": n_codes,
+            "days": n_days,
+            "panel_mb": round(view.nbytes() / 2**20, 1),
+            "rebuild_s": round(rebuild_s, 2),
+            "append_p50_ms": round(statistics.median(appends) * 1000, 1),
+            "append_max_ms": round(max(appends) * 1000, 1),
+            "close_panel_pandas_s": round(pandas_s, 3),
+            "close_panel_mmap_cold_s": round(cold_s, 4),
+            "close_panel_mmap_warm_s": round(warm_s, 4),
+            "matches": bool(close.shape == expected.shape and np.allclose(close, expected, rtol=1e-6, equal_nan=True)),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=500)
+    parser.add_argument("--append", type=int, default=10, help="trailing days appended one at a time")
+    args = parser.parse_args()
+    print(json.dumps(run(args.codes, args.days, args.append), indent=2))
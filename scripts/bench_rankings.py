@@ -0,0 +1,97 @@
+"""p_score rankings on a synthetic market.
+
+Usage: python -m scripts.bench_rankings --codes 5000 --days 120
+
+Times a one-date full-universe recompute (``update_rankings``), the top-N
+read from ``rankings_daily`` and ``with_history`` from the panel cache vs a
+signals_daily scan, then checks the endpoint's shape (``history`` only when
+asked for).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict
+
+from app.datasource import readers
+from scripts.synth_market import build_market, trading_days, workdir
+
+
+def _p50_ms(fn: Callable[[], object], n: int = 20) -> float:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def run(n_codes: int, n_days: int, top: int) -> Dict[str, object]:
+    days = trading_days(date(2020, 1, 2), n_days)
+    start, end = days[0], days[-1]
+    with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+        from fastapi.testclient import TestClient
+
+        from app.datasource.panel_cache import rebuild_panel_cache
+        from app.main import app
+        from app.rankings.daily import rebuild_rankings, update_rankings
+        from app.rankings.history import _from_panel, _from_signals
+        from app.settings import settings
+        from app.signals.daily import rebuild_signals
+        from app.universe.monthly import rebuild_universe
+
+        build_market(n_codes, n_days)
+        readers.invalidate_datasets()
+        rebuild_signals(start, end)
+        rebuild_universe(start, end)
+        rebuild_panel_cache()
+        t0 = time.perf_counter()
+        rebuild_rankings(start, end)
+        rebuild_s = time.perf_counter() - t0
+        readers.invalidate_datasets()
+
+        update_ms = _p50_ms(lambda: update_rankings(end), n=5)
+        ranked = readers.read_rankings(end, top)
+        codes = ranked["ts_code"].astype(str).tolist()
+        top_ms = _p50_ms(lambda: readers.read_rankings(end, top))
+        panel_ms = _p50_ms(lambda: _from_panel(codes, end, settings.rankings_history_days))
+        scan_ms = _p50_ms(lambda: _from_signals(codes, end, settings.rankings_history_days), n=5)
+
+        with TestClient(app) as client:
+            plain = client.get("/api/rankings/p_score", params={"top": top}).json()
+            full = client.get("/api/rankings/p_score", params={"top": top, "with_history": "true"}).json()
+            too_many = client.get("/api/rankings/p_score", params={"top": settings.rankings_top_k + 1}).json()
+
+        return {
+            "codes": n_codes,
+            "days": n_days,
+            "rebuild_all_days_s": round(rebuild_s, 2),
+            "update_one_day_ms": update_ms,
+            f"top{top}_read_ms": top_ms,
+            "history_panel_ms": panel_ms,
+            "history_scan_ms": scan_ms,
+            "history_matches": _from_panel(codes, end, settings.rankings_history_days) == _from_signals(codes, end, settings.rankings_history_days),
+            "api": {
+                "date": plain.get("date"),
+                "top_len": len(plain.get("top", [])),
+                "history_absent_by_default": "history" not in plain,
+                "history_rows": len(full["history"][0]["rows"]) if full.get("history") else 0,
+                "first": plain["top"][0] if plain.get("top") else None,
+                "top_over_k": too_many.get("error", {}).get("code"),
+            },
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.codes, args.days, args.top), indent=2, ensure_ascii=False))
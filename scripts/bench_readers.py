@@ -0,0 +1,122 @@
+"""Reader benchmark on a synthetic full-market dataset.
+
+Usage: python -m scripts.bench_readers --codes 5000 --years 5
+
+Reports latency and bytes read (``rchar`` from /proc/self/io) for:
+
+- a single-stock query, legacy "scan range then isin()" vs pushed-down predicate;
+- the arrow and duckdb query engines for 1 code / the watchlist / the full
+  market over 1 year and the full range (prices ⋈ adj_factor ⋈ daily_basic).
+
+With ``--profiles`` it instead compares the Parquet writer profiles on a
+single-stock lookup over full-market day partitions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pyarrow.dataset as ds
+
+from app.datasource import readers
+from app.datasource.parquet_io import WRITER_PROFILES
+from app.settings import settings
+from scripts.synth_market import build_market, trading_days, workdir
+
+
+def _bytes_read() -> int:
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def measure(fn: Callable[[], object], repeat: int = 3) -> Dict[str, float]:
+    best = float("inf")
+    read = 0
+    rows = 0
+    for _ in range(repeat):
+        b0 = _bytes_read()
+        t0 = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed < best:
+            best = elapsed
+            read = _bytes_read() - b0
+            rows = len(out)  # type: ignore[arg-type]
+    return {"ms": round(best * 1000, 2), "bytes_read": read, "rows": rows}
+
+
+def legacy_read(ts_codes: List[str], start: date, end: date):
+    """Pre-pushdown behaviour: decode the whole range, filter in pandas."""
+    prices_ds = ds.dataset(str(readers.PARQUET_DIR / "prices_daily"), format="parquet", partitioning="hive")
+    table = prices_ds.to_table(filter=readers._filter_date_range(start, end), columns=readers.PRICE_COLUMNS)
+    prices = table.to_pandas()
+    prices = prices[prices["ts_code"].isin(ts_codes)]
+    adj_ds = ds.dataset(str(readers.PARQUET_DIR / "adj_factor"), format="parquet", partitioning="hive")
+    adj = adj_ds.to_table(filter=readers._filter_date_range(start, end), columns=readers.ADJ_COLUMNS).to_pandas()
+    return prices.merge(adj, on=["ts_code", "trade_date"], how="left")
+
+
+def engine_read(engine: str, ts_codes: Optional[List[str]], start: date, end: date):
+    settings.query_engine = engine
+    return readers.read_prices_and_adj(ts_codes, start, end, include_basic=True)
+
+
+def run(n_codes: int, n_years: int, watchlist: int = 200) -> Dict[str, object]:
+    days = trading_days(date(2020, 1, 2), n_years * 250)
+    end = days[-1]
+    out: Dict[str, object] = {"codes": n_codes, "years": n_years}
+    with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+        codes = build_market(n_codes, len(days))
+        one = [codes[len(codes) // 3]]
+        out["legacy_1_code"] = measure(lambda: legacy_read(one, days[0], end))
+        out["pushdown_1_code"] = measure(lambda: readers.read_prices_and_adj(one, days[0], end))
+        selections = {"1_code": one, "watchlist": codes[:watchlist], "market": None}
+        for years in sorted({1, n_years}):
+            start = days[-min(len(days), years * 250)]
+            for label, sel in selections.items():
+                for engine in ("arrow", "duckdb"):
+                    out[f"{engine}_{label}_{years}y"] = measure(lambda: engine_read(engine, sel, start, end))
+    return out
+
+
+def run_profiles(n_codes: int, n_days: int) -> Dict[str, object]:
+    """Bytes read by a one-stock lookup under each writer profile."""
+    out: Dict[str, object] = {"codes": n_codes, "days": n_days}
+    for name in WRITER_PROFILES:
+        settings.parquet_writer_profile = name
+        with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+            codes = build_market(n_codes, n_days)
+            # no watermark in the synthetic tree; drop datasets cached from the previous profile
+            readers.invalidate_datasets()
+            days = trading_days(date(2020, 1, 2), n_days)
+            one = [codes[len(codes) // 3]]
+            on_disk = sum(p.stat().st_size for p in (readers.PARQUET_DIR / "prices_daily").rglob("*.parquet"))
+            res: Dict[str, object] = {"prices_bytes_on_disk": on_disk}
+            for engine in ("arrow", "duckdb"):
+                res[engine] = measure(lambda: engine_read(engine, one, days[0], days[-1]))
+            out[name] = res
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--profiles", action="store_true", help="compare writer profiles on a point lookup")
+    args = parser.parse_args()
+    if args.profiles:
+        print(json.dumps(run_profiles(args.codes, args.years * 250), indent=2))
+    else:
+        print(json.dumps(run(args.codes, args.years), indent=2))
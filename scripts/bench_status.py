@@ -0,0 +1,110 @@
+"""Requests/sec on ``/api/status`` against a scratch ``meta.sqlite``.
+
+Usage: python -m scripts.bench_status --seconds 5 --threads 8 [--writer]
+
+Requests go through the ASGI app in-process (``TestClient``) from ``--threads``
+client threads. ``--writer`` runs a second process that keeps writing
+``fail_queue``/``jobs``/watermarks meanwhile, like the scheduler does; any
+"database is locked" error shows up in ``errors``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from scripts.synth_market import workdir
+
+
+def _writer(root: str, stop: "mp.synchronize.Event", counter: "mp.sharedctypes.Synchronized") -> None:
+    import os
+
+    os.chdir(root)
+    from app.datasource.sqlite_meta import enqueue_fail, upsert_job_status
+    from app.datasource.watermark import WatermarkRow, upsert_watermark
+
+    i = 0
+    while not stop.is_set():
+        enqueue_fail(endpoint="bench", params="{}", last_error="x")
+        upsert_job_status("daily_job", last_run=str(i), state="ok", next_run=None)
+        if i % 10 == 0:
+            upsert_watermark(WatermarkRow("prices_daily", date(2020, 1, 1) + timedelta(days=i), i, "h"))
+        i += 1
+        with counter.get_lock():
+            counter.value += 1
+
+
+def run(seconds: float, threads: int, writer: bool) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+        from app.main import create_app
+
+        client = TestClient(create_app())
+        client.get("/api/status")  # warm up: schema, imports
+
+        stop = mp.Event()
+        writes = mp.Value("i", 0)
+        proc = mp.Process(target=_writer, args=(tmp, stop, writes)) if writer else None
+        if proc is not None:
+            proc.start()
+
+        latencies: list[float] = []
+        errors: list[str] = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def _client() -> None:
+            local, errs = [], []
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    resp = client.get("/api/status")
+                    if resp.status_code != 200:
+                        errs.append(f"HTTP {resp.status_code}")
+                except Exception as e:
+                    errs.append(str(e))
+                local.append(time.perf_counter() - t0)
+            with lock:
+                latencies.extend(local)
+                errors.extend(errs)
+
+        t0 = time.perf_counter()
+        pool = [threading.Thread(target=_client) for _ in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        if proc is not None:
+            proc.join()
+
+        lat = np.asarray(latencies) * 1000
+        return {
+            "threads": threads,
+            "requests": len(latencies),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(float(np.percentile(lat, 50)), 3),
+            "p99_ms": round(float(np.percentile(lat, 99)), 3),
+            "errors": len(errors),
+            "error_samples": sorted(set(errors))[:3],
+            "writer_ops": writes.value if writer else 0,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writer", action="store_true", help="concurrent writer process (scheduler-like)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.seconds, args.threads, args.writer), indent=2))
@@ -0,0 +1,128 @@
+"""/api/prices buffered JSON vs streamed NDJSON on a synthetic market.
+
+Usage: python -m scripts.bench_stream --codes 2000 --days 500
+
+Each mode runs in its own process against the same scratch data/ so peak RSS
+is comparable, calling the ASGI app directly and spooling the body to a temp
+file; reported are time to first body byte, total time, body size, the peak
+RSS growth during the request and an order-independent digest of the rows
+(equal digests mean both modes returned the same rows).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict
+from urllib.parse import urlencode
+
+from scripts.synth_market import build_market, make_codes, trading_days, workdir
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _digest(lines) -> str:
+    total = 0
+    for line in lines:
+        total = (total + int.from_bytes(hashlib.sha1(line.encode("utf-8")).digest()[:8], "big")) % 2**64
+    return f"{total:016x}"
+
+
+async def _get(app, path: str, query: str, sink) -> Dict[str, float]:
+    """One GET straight through the ASGI app (no server, no client buffering)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    t0 = time.perf_counter()
+    marks: Dict[str, float] = {}
+    done = asyncio.Event()
+    requested = False
+
+    async def receive():
+        # the request once, then block like a client that stays connected
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            marks.setdefault("ttfb_s", time.perf_counter() - t0)
+            sink.write(message["body"])
+
+    await app(scope, receive, send)
+    done.set()
+    marks["total_s"] = time.perf_counter() - t0
+    return marks
+
+
+def child(mode: str, n_codes: int, days: int) -> Dict[str, object]:
+    from app.main import app
+
+    span = trading_days(date(2020, 1, 2), days)
+    query = urlencode({"ts_code": ",".join(make_codes(n_codes)), "start": str(span[0]), "end": str(span[-1]), "format": mode})
+    with tempfile.TemporaryFile() as body:
+        base_rss = _rss_mb()
+        marks = asyncio.run(_get(app, "/api/prices", query, body))
+        growth = _rss_mb() - base_rss
+        size = body.tell()
+        body.seek(0)
+        text = body.read().decode("utf-8")
+    if mode == "ndjson":
+        lines = text.splitlines()
+    else:
+        lines = [json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in json.loads(text)["rows"]]
+    return {
+        "ttfb_s": round(marks.get("ttfb_s", marks["total_s"]), 3),
+        "total_s": round(marks["total_s"], 3),
+        "body_mb": round(size / 2**20, 1),
+        "rows": len(lines),
+        "rss_growth_mb": round(growth, 1),
+        "digest": _digest(lines),
+    }
+
+
+def run(n_codes: int, n_days: int) -> Dict[str, object]:
+    out: Dict[str, object] = {"codes": n_codes, "days": n_days}
+    with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+        build_market(n_codes, n_days)
+        for mode in ("json", "ndjson"):
+            proc = subprocess.run(
+                [sys.executable, "-m", "scripts.bench_stream", "--child", mode, "--codes", str(n_codes), "--days", str(n_days)],
+                cwd=tmp,
+                env={"PYTHONPATH": str(Path(__file__).resolve().parents[1]), "PATH": ""},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            out[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+    out["same_rows"] = out["json"]["digest"] == out["ndjson"]["digest"]
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=500)
+    parser.add_argument("--child", choices=("json", "ndjson"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(child(args.child, args.codes, args.days)))
+    else:
+        print(json.dumps(run(args.codes, args.days), indent=2))
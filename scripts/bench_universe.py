@@ -0,0 +1,82 @@
+"""Incremental universe update vs a full recompute on a synthetic market.
+
+Usage: python -m scripts.bench_universe --codes 5000 --days 90
+
+"full" is ``build_universe``: scan the 60-day window from ``prices_daily``
+and rank. "incremental" is ``update_universe`` for one trading day: read that
+day, advance the rolling sums, persist the state. The snapshot the
+incremental path writes on the first trading day of a month is compared with
+the full recompute for the same month.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from app.datasource import readers
+from scripts.synth_market import build_market, trading_days, workdir
+
+
+def run(n_codes: int, n_days: int) -> Dict[str, object]:
+    days = trading_days(date(2020, 1, 2), n_days)
+    with tempfile.TemporaryDirectory() as tmp, workdir(Path(tmp)):
+        from app.universe.monthly import build_universe, update_universe
+
+        build_market(n_codes, n_days)
+        readers.invalidate_datasets()
+
+        # prime the state on the first 70% of the days, then time the rest day by day
+        split = int(len(days) * 0.7)
+        update_universe(days[split - 1], refresh_basic=False)
+        incremental = []
+        firsts = {}
+        for d in days[split:]:
+            t0 = time.perf_counter()
+            update_universe(d, refresh_basic=False)
+            incremental.append(time.perf_counter() - t0)
+            firsts.setdefault((d.year, d.month), d)
+
+        # a month that starts inside the timed range; its snapshot came from the state
+        month = next(((y, m) for (y, m), d in firsts.items() if d.day <= 7 and d != days[split]), None)
+        same = None
+        if month is not None:
+            incremental_snapshot = readers.read_universe(*month)
+        full = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            build_universe(*(month or (days[-1].year, days[-1].month)))
+            full.append(time.perf_counter() - t0)
+        if month is not None:
+            rebuilt = readers.read_universe(*month)
+            cols = ["ts_code", "rank"]
+            same = incremental_snapshot[cols].equals(rebuilt[cols]) and np.allclose(
+                incremental_snapshot["avg_turnover"], rebuilt["avg_turnover"]
+            )
+
+        inc = np.asarray(incremental) * 1000
+        return {
+            "codes": n_codes,
+            "days": n_days,
+            "full_recompute_ms": round(min(full) * 1000, 2),
+            "incremental_p50_ms": round(float(np.percentile(inc, 50)), 2),
+            "incremental_max_ms": round(float(inc.max()), 2),
+            "speedup_p50": round(min(full) * 1000 / float(np.percentile(inc, 50)), 1),
+            "snapshot_month": f"{month[0]:04d}-{month[1]:02d}" if month else None,
+            "snapshot_matches_full": same,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+    print(json.dumps(run(args.codes, args.days), indent=2))
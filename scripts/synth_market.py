@@ -0,0 +1,98 @@
+"""Synthetic full-market dataset for local benchmarks.
+
+Writes ``prices_daily``/``adj_factor``/``daily_basic`` day partitions under
+``<root>/data/parquet`` with the same writer (and the same prices_daily
+enrichment) the scheduler uses, so benchmarks exercise the real on-disk layout
+without touching the project's data/.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from app.datasource.enrich import enrich_prices
+from app.datasource.parquet_io import write_parquet_atomic
+from app.datasource.paths import PartitionPath
+
+
+def make_codes(n: int) -> List[str]:
+    half = n // 2
+    sz = [f"{i:06d}.SZ" for i in range(1, half + 1)]
+    sh = [f"{600000 + i:06d}.SH" for i in range(n - half)]
+    return sz + sh
+
+
+def trading_days(start: date, n: int) -> List[date]:
+    days: List[date] = []
+    d = start
+    while len(days) < n:
+        if d.weekday() < 5:
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+@contextmanager
+def workdir(root: Path) -> Iterator[Path]:
+    """chdir into root so the relative ``data/`` paths resolve there."""
+    prev = Path.cwd()
+    root.mkdir(parents=True, exist_ok=True)
+    os.chdir(root)
+    try:
+        yield root
+    finally:
+        os.chdir(prev)
+
+
+def build_market(n_codes: int, n_days: int, start: date = date(2020, 1, 2), seed: int = 7) -> List[str]:
+    """Write a synthetic market into ./data/parquet; returns the code list."""
+    rng = np.random.default_rng(seed)
+    codes = make_codes(n_codes)
+    # fetch order is not code order in practice; shuffle to mimic it
+    order = rng.permutation(n_codes)
+    close = rng.uniform(5, 50, n_codes)
+    factor = np.ones(n_codes)
+    for d in trading_days(start, n_days):
+        pre_close = close
+        close = np.maximum(0.5, pre_close * (1 + rng.normal(0, 0.02, n_codes))).round(2)
+        factor = factor * np.where(rng.random(n_codes) < 0.002, 1.1, 1.0)
+        volume = rng.integers(0, 5_000_000, n_codes)
+        prices = pd.DataFrame(
+            {
+                "ts_code": codes,
+                "trade_date": d,
+                "open_raw": pre_close,
+                "high_raw": np.maximum(pre_close, close) * 1.01,
+                "low_raw": np.minimum(pre_close, close) * 0.99,
+                "close_raw": close,
+                "pre_close": pre_close,
+                "volume": volume,
+                "amount": volume * close,
+            }
+        ).iloc[order]
+        prices = enrich_prices(prices, st=set())
+        adj = pd.DataFrame({"ts_code": codes, "trade_date": d, "adj_factor": factor}).iloc[order]
+        basic = pd.DataFrame(
+            {
+                "ts_code": codes,
+                "trade_date": d,
+                "turnover_rate": rng.uniform(0, 10, n_codes),
+                "pe": np.nan,
+                "pe_ttm": np.nan,
+                "pb": np.nan,
+                "ps": np.nan,
+                "total_mv": np.nan,
+                "circ_mv": np.nan,
+            }
+        ).iloc[order]
+        for table, df in (("prices_daily", prices), ("adj_factor", adj), ("daily_basic", basic)):
+            part = PartitionPath(table, d)
+            write_parquet_atomic(df.reset_index(drop=True), part.tmp_file(), part.final_file())
+    return codes
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from app.api import routes, utils
+from app.api.response_cache import ResponseCache
+from app.datasource import readers
+from scripts.synth_market import build_market, trading_days
+
+
+@pytest.fixture
+def data_root(tmp_path, monkeypatch):
+    """Empty project root: the relative ``data/`` paths resolve under tmp_path.
+
+    The snapshot id memo and the response cache are per test: watermark
+    versions of separate databases can coincide.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(utils, "_SNAPSHOT", {"version": None, "id": None})
+    monkeypatch.setattr(routes, "response_cache", ResponseCache(max_bytes=64 * 1024 * 1024))
+    readers.invalidate_datasets()
+    yield tmp_path
+    readers.invalidate_datasets()
+
+
+@pytest.fixture
+def market(data_root):
+    """A small synthetic market (40 codes x 60 days); returns its trading days."""
+    build_market(40, 60)
+    readers.invalidate_datasets()
+    return trading_days(date(2020, 1, 2), 60)
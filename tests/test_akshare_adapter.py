@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app.adapters import akshare_adapter as a
+from app.adapters.ratelimit import TokenBucket
+from app.datasource.sqlite_meta import list_fail, list_fetch_runs
+from app.settings import settings
+
+
+class StubUpstream:
+    """Local stand-in for AkShare: per-symbol scripted failures, request timestamps."""
+
+    def __init__(self, fail_times: dict[str, int], empty: set[str] = frozenset()) -> None:
+        self.fail_times = dict(fail_times)
+        self.empty = empty
+        self.calls: dict[str, int] = {}
+        self.stamps: list[float] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, code: str) -> pd.DataFrame:
+        with self._lock:
+            self.stamps.append(time.monotonic())
+            n = self.calls[code] = self.calls.get(code, 0) + 1
+        if n <= self.fail_times.get(code, 0):
+            raise ConnectionError(f"{code}: upstream reset")
+        if code in self.empty:
+            return pd.DataFrame()
+        return pd.DataFrame({"ts_code": [code], "close": [float(n)]})
+
+
+@pytest.fixture
+def fast_bucket(monkeypatch):
+    monkeypatch.setattr(settings, "ak_max_retries", 3)
+    monkeypatch.setattr(a, "_BUCKET", TokenBucket(1000, 100))
+
+
+def test_retry_then_success_and_permanent_failure(data_root, fast_bucket):
+    codes = ["000001.SZ", "000002.SZ", "000003.SZ", "000004.SZ"]
+    upstream = StubUpstream({"000002.SZ": 2, "000003.SZ": 99}, empty={"000004.SZ"})
+
+    frames, stats = a.fetch_symbols(codes, upstream, "stub_daily", {"start": "20240102"})
+
+    assert [f["ts_code"].iat[0] for f in frames] == ["000001.SZ", "000002.SZ"]
+    assert upstream.calls == {"000001.SZ": 1, "000002.SZ": 3, "000003.SZ": 3, "000004.SZ": 1}
+    assert (stats.ok, stats.empty, stats.failed, stats.requests) == (2, 1, 1, 8)
+
+    (failed,) = list_fail()
+    assert failed["endpoint"] == "stub_daily"
+    assert json.loads(failed["params"]) == {"start": "20240102", "ts_code": "000003.SZ"}
+    assert "upstream reset" in failed["last_error"]
+    (run,) = list_fetch_runs()
+    assert (run["symbols"], run["ok"], run["empty"], run["failed"], run["requests"]) == (4, 2, 1, 1, 8)
+
+
+def test_requests_share_the_rate_limit(data_root, monkeypatch):
+    rate, burst = 40.0, 2
+    monkeypatch.setattr(a, "_BUCKET", TokenBucket(rate, burst))
+    upstream = StubUpstream({})
+    codes = [f"{i:06d}.SZ" for i in range(12)]
+
+    frames, _ = a.fetch_symbols(codes, upstream, "stub_daily", {})
+
+    assert len(frames) == len(codes)
+    stamps = sorted(upstream.stamps)
+    # from a full bucket, n requests need at least (n - burst) / rate seconds
+    assert stamps[-1] - stamps[0] >= (len(codes) - burst) / rate * 0.9
+
+
+def _hist_response(symbol: str) -> pd.DataFrame:
+    if symbol == "000003":
+        return pd.DataFrame()  # suspended
+    return pd.DataFrame({
+        "日期": ["2024-01-02"], "开盘": [10.0], "收盘": [10.5], "最高": [10.8], "最低": [9.9],
+        "成交量": [1200], "成交额": [1.26e6], "涨跌额": [0.3], "换手率": [1.25],
+    })
+
+
+def test_one_hist_request_per_symbol_feeds_both_tables(data_root, fast_bucket, monkeypatch):
+    hist_calls, daily_calls = [], []
+
+    def stock_zh_a_hist(symbol, **kwargs):
+        hist_calls.append(symbol)
+        return _hist_response(symbol)
+
+    stub = SimpleNamespace(stock_zh_a_hist=stock_zh_a_hist, stock_zh_a_daily=lambda **kw: daily_calls.append(kw))
+    monkeypatch.setattr(a, "ak", stub)
+
+    prices, basic = a.fetch_daily_and_basic_for_codes(date(2024, 1, 2), ["000001.SZ", "600000.SH", "000003.SZ"])
+
+    assert sorted(hist_calls) == ["000001", "000003", "600000"]
+    assert daily_calls == []  # empty and complete responses need no second request
+    assert (prices.table, basic.table) == ("prices_daily", "daily_basic")
+    assert sorted(prices.df["ts_code"]) == sorted(basic.df["ts_code"]) == ["000001.SZ", "600000.SH"]
+    row = prices.df.iloc[0]
+    assert row["pre_close"] == pytest.approx(10.2)
+    assert row["volume"] == 120000  # 手 -> 股
+    assert list(basic.df.columns) == a.BASIC_COLUMNS
+    assert basic.df["turnover_rate"].tolist() == [1.25, 1.25]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+
+
+def test_market_summary_missing_day_is_404_and_uncached(market):
+    client = TestClient(app)
+    for _ in range(2):
+        res = client.get("/api/market/summary", params={"date": market[0].isoformat()})
+        assert res.status_code == 404
+        assert res.json()["error"]["code"] == "NotFound"
+        assert "etag" not in res.headers
+    assert routes.response_cache.stats()["entries"] == 0
+
+
+def test_rankings_errors_have_status_and_are_uncached(market):
+    client = TestClient(app)
+    res = client.get("/api/rankings/p_score", params={"top": 0})
+    assert res.status_code == 400
+    assert res.json()["error"]["code"] == "InvalidParam"
+    for _ in range(2):
+        res = client.get("/api/rankings/p_score", params={"date": market[0].isoformat()})
+        assert res.status_code == 404
+        assert "etag" not in res.headers
+    assert routes.response_cache.stats()["entries"] == 0
+
+
+def test_backtest_rejects_unknown_signal(market):
+    client = TestClient(app)
+    body = {"start": market[0].isoformat(), "end": market[-1].isoformat(), "signals": ["no_such_signal"]}
+    res = client.post("/api/backtest", json=body)
+    assert res.status_code == 400
+    assert res.json()["error"]["code"] == "InvalidParam"
+
+
+def test_universe_errors_have_status_and_are_uncached(market):
+    client = TestClient(app)
+    assert client.get("/api/universe").status_code == 404
+    assert client.get("/api/universe", params={"month": "2020-13"}).status_code == 400
+    assert client.get("/api/universe", params={"month": "2020-01", "format": "xml"}).status_code == 400
+    for _ in range(2):
+        res = client.get("/api/universe", params={"month": "2020-01"})
+        assert res.status_code == 404
+        assert "etag" not in res.headers
+    assert routes.response_cache.stats()["entries"] == 0
+
+
+def test_unknown_backtest_run_is_404(data_root):
+    res = TestClient(app).get("/api/backtest/no-such-run")
+    assert res.status_code == 404
+    assert res.json()["error"]["code"] == "NotFound"
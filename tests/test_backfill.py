@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pandas as pd
+
+from app import backfill
+from app.adapters.akshare_adapter import BASIC_COLUMNS, PRICE_COLUMNS, FetchStats
+from app.datasource.sqlite_meta import backfilled_dates
+
+
+DAYS = [date(2021, 3, 1), date(2021, 3, 2)]
+
+
+def _run(monkeypatch, failed: int) -> backfill.BackfillReport:
+    def fetch_range(start, end, codes):
+        prices = pd.DataFrame(
+            [(codes[0], d, 10.0, 10.5, 9.5, 10.0, 10.0, 1000, 10000.0) for d in DAYS],
+            columns=PRICE_COLUMNS,
+        )
+        stats = FetchStats(endpoint="ak.stock_zh_a_hist", symbols=len(codes), ok=len(codes) - failed, failed=failed)
+        return prices, pd.DataFrame(columns=BASIC_COLUMNS), stats
+
+    monkeypatch.setattr(backfill, "trading_days", lambda start, end, provider: list(DAYS))
+    monkeypatch.setattr(backfill, "akshare_codes", lambda: ["000001.SZ", "000002.SZ"])
+    monkeypatch.setattr(backfill, "ak_fetch_daily_and_basic_range", fetch_range)
+    return backfill.run_backfill(DAYS[0], DAYS[-1], provider="akshare", workers=1)
+
+
+def test_unit_with_failed_symbols_is_not_checkpointed(data_root, monkeypatch):
+    report = _run(monkeypatch, failed=1)
+    assert (report.done, report.failed) == (0, len(DAYS))
+    assert backfilled_dates("akshare", DAYS[0], DAYS[-1]) == set()
+
+    report = _run(monkeypatch, failed=0)
+    assert (report.skipped, report.done, report.failed) == (0, len(DAYS), 0)
+    assert backfilled_dates("akshare", DAYS[0], DAYS[-1]) == set(DAYS)
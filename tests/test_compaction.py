@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import threading
+from datetime import date
+
+from app.api.utils import compute_data_snapshot_id
+from app.datasource import compaction, readers
+from app.datasource.compaction import compact_month
+from app.datasource.locks import layout_lock
+from app.datasource.parquet_io import write_parquet_atomic
+from app.datasource.paths import PARQUET_DIR, PartitionPath
+
+
+def test_swap_waits_for_scans_and_moves_snapshot_id(market):
+    january = [d for d in market if d.month == 1]
+    rows = len(readers.read_prices(None, january[0], january[-1]))
+    snapshot = compute_data_snapshot_id()
+    month_dir = PARQUET_DIR / "prices_daily" / "year=2020" / "month=01"
+
+    with layout_lock("prices_daily", shared=True):
+        worker = threading.Thread(target=compact_month, args=("prices_daily", 2020, 1))
+        worker.start()
+        worker.join(timeout=1.0)
+        # staged, but not swapped while a scan holds the layout
+        assert worker.is_alive()
+        assert len(list(month_dir.glob("day=*"))) == len(january)
+    worker.join()
+
+    assert not list(month_dir.glob("day=*"))
+    assert (month_dir / "part-0000.parquet").exists()
+    assert len(readers.read_prices(None, january[0], january[-1])) == rows
+    assert compute_data_snapshot_id() != snapshot
+
+
+def test_day_written_while_staging_is_not_lost(monkeypatch, market):
+    january = [d for d in market if d.month == 1]
+    late = date(2020, 1, 4)  # a Saturday: not in the synthetic calendar
+    row = readers.read_prices(None, january[0], january[0]).head(1).assign(trade_date=late)
+    stage = compaction.write_table
+    calls = []
+
+    def write_then_backfill(*args, **kwargs):
+        stage(*args, **kwargs)
+        if not calls:
+            part = PartitionPath("prices_daily", late)
+            write_parquet_atomic(row, part.tmp_file(), part.final_file())
+        calls.append(args)
+
+    monkeypatch.setattr(compaction, "write_table", write_then_backfill)
+    result = compact_month("prices_daily", 2020, 1)
+
+    assert len(calls) == 2  # the first merge was discarded and redone
+    assert result is not None and result.files_in == len(january) + 1
+    readers.invalidate_datasets()
+    assert len(readers.read_prices(None, late, late)) == 1
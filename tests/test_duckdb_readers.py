@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app.datasource import readers
+from app.datasource.compaction import compact_month
+from app.settings import settings
+
+KEY = ["ts_code", "trade_date"]
+
+
+def _read(monkeypatch, engine, *args, **kwargs) -> pd.DataFrame:
+    monkeypatch.setattr(settings, "query_engine", engine)
+    df = readers.read_prices_and_adj(*args, **kwargs)
+    return df.sort_values(KEY).reset_index(drop=True)[sorted(df.columns)]
+
+
+@pytest.mark.parametrize("codes", [None, 1, 12])
+def test_duckdb_matches_arrow_on_cached_datasets(monkeypatch, market, codes):
+    for table in ("prices_daily", "adj_factor"):
+        compact_month(table, 2020, 1)
+    readers.invalidate_datasets()
+    sel = None if codes is None else sorted(readers.read_prices(None, market[0], market[0])["ts_code"])[:codes]
+    span = (market[10], market[40])
+
+    expected = _read(monkeypatch, "arrow", sel, *span, include_basic=True, tradable_only=True)
+    misses = readers.dataset_cache_stats()["misses"]
+    got = _read(monkeypatch, "duckdb", sel, *span, include_basic=True, tradable_only=True)
+
+    # served from the datasets the arrow engine discovered: no re-glob
+    assert readers.dataset_cache_stats()["misses"] == misses
+    assert len(got) == len(expected) > 0
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
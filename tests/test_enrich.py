@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.datasource.enrich import derive_tradability, enrich_prices, limit_pct, limit_price
+
+
+@pytest.mark.parametrize(
+    "pre, pct, limit",
+    [
+        (10.05, 0.10, 11.06),  # 11.055
+        (1.15, 0.10, 1.27),  # 1.265, binary 1.26499...
+        (1.15, -0.10, 1.04),  # 1.035
+        (1.05, -0.10, 0.95),  # 0.945
+        (1.10, -0.05, 1.05),  # 1.045
+        (12.34, 0.10, 13.57),  # 13.574, rounds down
+    ],
+)
+def test_limit_price_rounds_half_up(pre, pct, limit):
+    assert limit_price(np.array([pre]), np.array([pct]))[0] == pytest.approx(limit, abs=1e-12)
+
+
+def _day(rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["ts_code", "trade_date", "close_raw", "pre_close", "volume"])
+
+
+def test_half_tick_limits_are_flagged_exactly():
+    d = date(2021, 3, 1)
+    flags = derive_tradability(
+        _day([
+            ("600000.SH", d, 1.27, 1.15, 100),  # at limit-up
+            ("600001.SH", d, 1.26, 1.15, 100),  # a cent below it: tradable
+            ("600002.SH", d, 0.95, 1.05, 100),  # at limit-down
+            ("600003.SH", d, 0.96, 1.05, 100),  # a cent above it: tradable
+            ("600004.SH", d, 1.00, 1.00, 0),  # no volume
+            ("600005.SH", d, 1.10, np.nan, 100),  # no pre_close: volume rule only
+        ]),
+        st=set(),
+    )
+    assert flags["mask_untradable"].tolist() == [True, False, True, False, True, False]
+    assert flags["is_trading"].tolist() == [True, True, True, True, False, True]
+
+
+def test_limit_pct_by_board():
+    codes = pd.Series(["600000.SH", "300001.SZ", "300001.SZ", "688001.SH", "830001.BJ", "600003.SH"])
+    dates = pd.Series([date(2021, 1, 4), date(2020, 8, 21), date(2020, 8, 24), date(2020, 1, 2), date(2021, 1, 4), date(2021, 1, 4)])
+    assert limit_pct(codes, dates, st={"600003.SH"}).tolist() == [0.10, 0.10, 0.20, 0.20, 0.30, 0.05]
+
+
+def test_enrich_fills_pre_close_from_the_previous_row(data_root):
+    frame = _day([
+        ("600000.SH", date(2021, 3, 1), 10.0, 9.9, 100),
+        ("600000.SH", date(2021, 3, 2), 11.0, np.nan, 100),
+    ])
+    out = enrich_prices(frame, st=set())
+    assert out["pre_close"].tolist() == [9.9, 10.0]
+    assert out["mask_untradable"].tolist() == [False, True]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from app.api.executor import SingleFlight, run_io
+
+
+def test_concurrent_calls_share_one_execution():
+    sf = SingleFlight()
+    calls = 0
+
+    async def build() -> dict:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"rows": calls}
+
+    async def main() -> list[dict]:
+        return await asyncio.gather(*(sf.do("etag-1", build) for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    assert sf.stats() == {"leaders": 1, "coalesced": 9, "inflight": 0}
+
+
+def test_settled_key_runs_again_and_distinct_keys_do_not_coalesce():
+    sf = SingleFlight()
+    calls: list[str] = []
+
+    async def build(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0)
+        return key
+
+    async def main() -> None:
+        assert await asyncio.gather(sf.do("a", lambda: build("a")), sf.do("b", lambda: build("b"))) == ["a", "b"]
+        assert await sf.do("a", lambda: build("a")) == "a"
+
+    asyncio.run(main())
+    assert calls == ["a", "b", "a"]
+
+
+def test_errors_reach_every_waiter():
+    sf = SingleFlight()
+
+    async def build() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main() -> list:
+        return await asyncio.gather(*(sf.do("k", build) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results] == [ValueError] * 3
+    assert sf.stats()["inflight"] == 0
+
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    sf = SingleFlight()
+
+    async def main() -> tuple[str, bool]:
+        finished = asyncio.Event()
+
+        async def build() -> str:
+            await asyncio.sleep(0.05)
+            finished.set()
+            return "ok"
+
+        leader = asyncio.ensure_future(sf.do("k", build))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(sf.do("k", build))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader, finished.is_set()
+
+    assert asyncio.run(main()) == ("ok", True)
+
+
+def test_run_io_uses_the_api_pool():
+    name = asyncio.run(run_io(lambda: threading.current_thread().name))
+    assert name.startswith("api-io")
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.serialize import ARROW_STREAM_MEDIA_TYPE
+from app.main import app
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/prices", {"ts_code": "000001.SZ,000002.SZ", "adj": "forward"}),
+    ("/api/metrics", {"ts_code": "000001.SZ", "window": 5, "metrics": "ma,vol_ann,turnover"}),
+])
+def test_columnar_and_arrow_carry_the_json_rows(market, path, params):
+    params = {**params, "start": str(market[10]), "end": str(market[30])}
+    with TestClient(app) as client:
+        rows = client.get(path, params=params).json()["rows"]
+        columnar = client.get(path, params={**params, "format": "columnar"}).json()["columns"]
+        arrow = client.get(path, params={**params, "format": "arrow"})
+
+    assert len(rows) > 0
+    assert list(columnar) == list(rows[0])
+    assert [dict(zip(columnar, values)) for values in zip(*columnar.values())] == rows
+
+    assert arrow.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.column_names == list(rows[0])
+    assert table.num_rows == len(rows)
+    for name in table.column_names:
+        values = table.column(name).to_pylist()
+        if name == "trade_date":
+            values = [d.isoformat() for d in values]
+        assert values == [r[name] for r in rows]
+
+def test_unknown_format_is_rejected(market):
+    with TestClient(app) as client:
+        body = client.get("/api/prices", params={"ts_code": "000001.SZ", "format": "csv"}).json()
+    assert body["error"]["code"] == "InvalidParam"
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+
+
+def test_meta_db_is_migrated_at_startup_not_import(data_root):
+    app = create_app()
+    assert not (data_root / "data").exists()
+    with TestClient(app):
+        assert (data_root / "data" / "meta.sqlite").exists()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+from app.datasource import meta_db
+from app.datasource.paths import META_SQLITE
+from app.datasource.sqlite_meta import enqueue_fail, list_fail, list_jobs, upsert_job_status
+
+
+def _run_threads(target, n: int = 8) -> list[BaseException]:
+    errors: list[BaseException] = []
+
+    def run(i: int) -> None:
+        try:
+            target(i)
+        except BaseException as e:  # pragma: no cover - reported by the caller
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+
+def test_migrate_switches_to_wal(data_root):
+    meta_db.migrate()
+    conn = sqlite3.connect(META_SQLITE)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+
+def test_connection_is_reused_per_thread(data_root):
+    assert meta_db.connect() is meta_db.connect()
+    other = []
+    t = threading.Thread(target=lambda: other.append(meta_db.connect()))
+    t.start()
+    t.join()
+    assert other[0] is not meta_db.connect()
+
+
+def test_concurrent_writers_do_not_hit_database_is_locked(data_root):
+    def write(i: int) -> None:
+        for j in range(50):
+            enqueue_fail("daily", f"{i}:{j}", "boom")
+            upsert_job_status(f"job{i}", f"2024-01-{j % 28 + 1:02d}", "ok", None)
+
+    assert _run_threads(write) == []
+    assert len(list_fail(limit=1000)) == 8 * 50
+    assert len(list_jobs()) == 8
+
+
+def test_read_then_write_transactions_serialize(data_root):
+    meta_db.migrate()
+    with meta_db.transaction() as conn:
+        conn.execute("INSERT INTO jobs(id, state) VALUES ('counter', '0')")
+
+    def bump(_: int) -> None:
+        for _ in range(25):
+            with meta_db.transaction() as conn:
+                (value,) = conn.execute("SELECT state FROM jobs WHERE id = 'counter'").fetchone()
+                conn.execute("UPDATE jobs SET state = ? WHERE id = 'counter'", (str(int(value) + 1),))
+
+    assert _run_threads(bump) == []
+    assert meta_db.connect().execute("SELECT state FROM jobs WHERE id = 'counter'").fetchone()[0] == str(8 * 25)
+
+
+def test_legacy_watchlist_row_is_migrated(data_root):
+    META_SQLITE.parent.mkdir(parents=True, exist_ok=True)
+    legacy = sqlite3.connect(META_SQLITE)
+    legacy.execute("CREATE TABLE watchlist (id INTEGER PRIMARY KEY CHECK (id = 1), ts_codes TEXT NOT NULL DEFAULT '')")
+    legacy.execute("INSERT INTO watchlist(id, ts_codes) VALUES (1, '000001.SZ,600000.SH')")
+    legacy.commit()
+    legacy.close()
+
+    rows = meta_db.connect().execute(
+        "SELECT ts_code, position FROM watchlist_items WHERE list_id = 1 ORDER BY position"
+    ).fetchall()
+    assert rows == [("000001.SZ", 1), ("600000.SH", 2)]
+    assert meta_db.connect().execute("SELECT COUNT(*) FROM watchlist").fetchone()[0] == 0
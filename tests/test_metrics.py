@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.api.routes import _metrics_from_signals, _metrics_on_the_fly
+from app.datasource import readers
+from app.signals.core import VOL_WINDOW
+from app.signals.daily import rebuild_signals
+
+
+@pytest.mark.parametrize("offset", [0, 10, 45])
+def test_signals_and_on_the_fly_paths_agree(market, offset):
+    rebuild_signals(market[0], market[-1])
+    readers.invalidate_datasets()
+    start, end = market[offset], market[-1]
+    wanted = {f"ma{VOL_WINDOW}", "vol_ann"}
+
+    stored = _metrics_from_signals("000001.SZ", VOL_WINDOW, wanted, start, end)
+    computed = _metrics_on_the_fly("000001.SZ", VOL_WINDOW, wanted, start, end)
+    assert stored is not None
+    stored, computed = (f.reset_index(drop=True) for f in (stored, computed))
+    assert list(pd.to_datetime(stored["trade_date"])) == list(pd.to_datetime(computed["trade_date"]))
+    for col in sorted(wanted):
+        a, b = stored[col].to_numpy(dtype=float), computed[col].to_numpy(dtype=float)
+        np.testing.assert_array_equal(np.isnan(a), np.isnan(b))
+        np.testing.assert_allclose(a, b, rtol=1e-9, equal_nan=True)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import shutil
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.datasource import readers
+from app.datasource.panel_cache import rebuild_panel_cache
+from app.datasource.parquet_io import write_parquet_atomic
+from app.datasource.paths import PartitionPath
+from app.main import app
+from scripts.synth_market import build_market, trading_days
+
+# SSE closures on weekdays, 2020-01 .. 2021-02
+HOLIDAYS = {
+    date(2020, 1, 24), date(2020, 1, 27), date(2020, 1, 28), date(2020, 1, 29), date(2020, 1, 30), date(2020, 1, 31),
+    date(2020, 4, 6), date(2020, 5, 1), date(2020, 5, 4), date(2020, 5, 5), date(2020, 6, 25), date(2020, 6, 26),
+    date(2020, 10, 1), date(2020, 10, 2), date(2020, 10, 5), date(2020, 10, 6), date(2020, 10, 7), date(2020, 10, 8),
+    date(2021, 1, 1), date(2021, 2, 11), date(2021, 2, 12), date(2021, 2, 15), date(2021, 2, 16), date(2021, 2, 17),
+}
+
+
+@pytest.fixture
+def holiday_market(data_root):
+    build_market(5, 300)
+    for d in HOLIDAYS:
+        for table in ("prices_daily", "adj_factor", "daily_basic"):
+            shutil.rmtree(PartitionPath(table, d).dir(), ignore_errors=True)
+    readers.invalidate_datasets()
+    return [d for d in trading_days(date(2020, 1, 2), 300) if d not in HOLIDAYS]
+
+
+def _rows(client: TestClient, **params) -> list[dict]:
+    body = client.get("/api/metrics/batch", params={"ts_code": "000001.SZ", "metrics": "ma,vol_ann", **params}).json()
+    return body["rows"]
+
+
+@pytest.mark.parametrize("with_panel", [False, True])
+def test_latest_window_250_has_values(holiday_market, with_panel):
+    sessions = holiday_market
+    end = sessions[-1]
+    # fewer than 251 sessions in the previous 371 calendar days
+    assert sum(end - timedelta(days=371) <= d for d in sessions) < 251
+    if with_panel:
+        rebuild_panel_cache()
+
+    with TestClient(app) as client:
+        (latest,) = _rows(client, windows="250", window=250, end=str(end), latest="true")
+        full = _rows(client, windows="250", window=250, start=str(sessions[0]), end=str(end))
+    assert latest["trade_date"] == full[-1]["trade_date"] == end.isoformat()
+    assert latest["ma250"] is not None and latest["vol_ann"] is not None
+    assert latest["amount"] == pytest.approx(full[-1]["amount"])
+    assert latest["ma250"] == pytest.approx(full[-1]["ma250"])
+    assert latest["vol_ann"] == pytest.approx(full[-1]["vol_ann"])
+
+
+def test_batch_matches_single_code_from_mid_history(market):
+    codes = ["000001.SZ", "000002.SZ"]
+    start = market[30]
+    with TestClient(app) as client:
+        batch = client.get(
+            "/api/metrics/batch",
+            params={"ts_code": ",".join(codes), "windows": "20", "window": 20, "metrics": "ma,vol_ann", "start": str(start)},
+        ).json()["rows"]
+        for code in codes:
+            single = client.get(
+                "/api/metrics", params={"ts_code": code, "window": 20, "metrics": "ma,vol_ann", "start": str(start)}
+            ).json()["rows"]
+            rows = [r for r in batch if r["ts_code"] == code]
+            assert [r["trade_date"] for r in rows] == [r["trade_date"] for r in single]
+            assert rows[0]["trade_date"] == start.isoformat()
+            for got, want in zip(rows, single):
+                assert got["ma20"] == pytest.approx(want["ma20"])
+                assert got["vol_ann"] == pytest.approx(want["vol_ann"])
+
+
+def test_latest_keeps_a_suspended_code(market):
+    suspended = "000002.SZ"
+    for d in market[-30:]:
+        for table in ("prices_daily", "adj_factor"):
+            part = PartitionPath(table, d)
+            df = pd.read_parquet(part.final_file())
+            write_parquet_atomic(df[df["ts_code"] != suspended].reset_index(drop=True), part.tmp_file(), part.final_file())
+    readers.invalidate_datasets()
+
+    with TestClient(app) as client:
+        rows = client.get(
+            "/api/metrics/batch",
+            params={"ts_code": f"000001.SZ,{suspended}", "windows": "20", "latest": "true", "end": str(market[-1])},
+        ).json()["rows"]
+    by_code = {r["ts_code"]: r for r in rows}
+    assert by_code["000001.SZ"]["trade_date"] == market[-1].isoformat()
+    assert by_code[suspended]["trade_date"] == market[-31].isoformat()
+    assert by_code[suspended]["ma20"] is not None
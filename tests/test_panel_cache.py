@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+
+from app.datasource import panel_cache
+from app.datasource.locks import file_lock
+from app.datasource.paths import PANEL_CACHE_DIR
+
+
+def test_same_day_rerun_publishes_a_new_generation(market):
+    panel_cache.rebuild_panel_cache()
+    before = panel_cache.open_panel_cache()
+    close = np.array(before.column("close"))
+
+    panel_cache.update_panel_cache(market[-1])
+    after = panel_cache.open_panel_cache()
+    assert after.generation == before.generation + 1
+    assert after.dates == before.dates
+    np.testing.assert_array_equal(after.column("close"), close)
+    # the old mapping is untouched and its generation is kept for late readers
+    np.testing.assert_array_equal(before.column("close"), close)
+
+    panel_cache.update_panel_cache(market[-1])
+    gens = sorted(p.name for p in PANEL_CACHE_DIR.glob("g*"))
+    assert gens == [f"g{after.generation:04d}", f"g{after.generation + 1:04d}"]
+
+
+def test_writers_wait_for_the_file_lock(market):
+    panel_cache.rebuild_panel_cache(end=market[-2])
+    # flock conflicts between open descriptors, as it does between processes
+    with file_lock(PANEL_CACHE_DIR / panel_cache.WRITE_LOCK):
+        worker = threading.Thread(target=panel_cache.update_panel_cache, args=(market[-1],))
+        worker.start()
+        worker.join(timeout=1.0)
+        assert worker.is_alive()
+        assert panel_cache.open_panel_cache().dates[-1] == market[-2]
+    worker.join()
+    assert panel_cache.open_panel_cache().dates[-1] == market[-1]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from app.datasource.parquet_io import WRITER_PROFILES, write_table, writer_profile
+
+
+def _day(n_codes: int = 3000) -> pa.Table:
+    rng = np.random.default_rng(0)
+    codes = [f"{i:06d}.SZ" for i in rng.permutation(n_codes)]
+    return pa.table({"ts_code": codes, "close_raw": rng.uniform(5, 50, n_codes)})
+
+
+def test_lookup_profile_sorts_into_selective_row_groups(tmp_path):
+    table = _day()
+    path = tmp_path / "part-0000.parquet"
+    write_table(table, path, WRITER_PROFILES["lookup"])
+
+    meta = pq.ParquetFile(path).metadata
+    assert meta.num_row_groups == 3
+    ranges = []
+    for i in range(meta.num_row_groups):
+        group = meta.row_group(i)
+        assert group.num_rows <= 1024
+        stats = group.column(0).statistics
+        ranges.append((stats.min, stats.max))
+    # ascending and disjoint, so min/max statistics exclude every other group
+    assert all(a[1] < b[0] for a, b in zip(ranges, ranges[1:]))
+    assert pq.read_table(path).equals(table.sort_by("ts_code"))
+
+    fragment = next(ds.dataset(path, format="parquet").get_fragments())
+    assert len(fragment.split_by_row_group(filter=ds.field("ts_code") == "001500.SZ")) == 1
+
+
+def test_plain_profile_keeps_fetch_order_in_one_group(tmp_path):
+    table = _day()
+    path = tmp_path / "part-0000.parquet"
+    write_table(table, path, WRITER_PROFILES["plain"])
+    assert pq.ParquetFile(path).metadata.num_row_groups == 1
+    assert pq.read_table(path).equals(table)
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        writer_profile("fastest")
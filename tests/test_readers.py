@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pandas as pd
+
+from app.datasource import readers
+from app.datasource.parquet_io import write_parquet_atomic
+from app.datasource.paths import PartitionPath
+from app.datasource.watermark import WatermarkRow, upsert_watermarks
+
+KEY = ["ts_code", "trade_date"]
+
+
+def test_pushed_down_predicates_match_a_pandas_filter(market):
+    codes = ["000003.SZ", "000001.SZ"]
+    start, end = market[10], market[40]
+    everything = readers.read_prices_and_adj(None, None, None, include_basic=True)
+    dates = pd.to_datetime(everything["trade_date"])
+    expected = everything[everything["ts_code"].isin(codes) & (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))]
+
+    got = readers.read_prices_and_adj(codes, start, end, include_basic=True)
+
+    assert len(got) == len(codes) * 31
+    pd.testing.assert_frame_equal(
+        got.sort_values(KEY).reset_index(drop=True)[sorted(got.columns)],
+        expected.sort_values(KEY).reset_index(drop=True)[sorted(got.columns)],
+    )
+    # projected columns only: no hive year/month/day leaking through
+    assert list(readers.read_daily_basic(codes, start, end).columns) == readers.BASIC_COLUMNS
+
+
+def test_partition_keys_prune_fragments_before_reading(market):
+    february = [d for d in market if d.month == 2]
+    dataset = readers._dataset("prices_daily")
+    fragments = list(dataset.get_fragments(filter=readers._build_filter(["000001.SZ"], february[0], february[-1])))
+    assert len(fragments) == len(february)
+
+
+def test_dataset_cache_follows_the_watermark_version(market):
+    readers.invalidate_datasets()
+    before = readers.dataset_cache_stats()
+    readers.read_prices(None, market[0], market[0])
+    readers.read_prices(None, market[1], market[1])
+    stats = readers.dataset_cache_stats()
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["hits"] > before["hits"]
+
+    late = market[-1] + timedelta(days=1)
+    row = readers.read_prices(None, market[-1], market[-1]).head(1).assign(trade_date=late)
+    part = PartitionPath("prices_daily", late)
+    write_parquet_atomic(row, part.tmp_file(), part.final_file())
+    # the cached fragment list does not know the new day until the watermark moves
+    assert readers.read_prices(None, late, late).empty
+    upsert_watermarks([WatermarkRow(table="prices_daily", last_dt=late, rowcount=1, hash="late")])
+    assert len(readers.read_prices(None, late, late)) == 1
+    assert readers.dataset_cache_stats()["misses"] - before["misses"] == 2
+
+
+def test_columns_added_later_are_read_as_nulls_in_older_files(market):
+    late = market[-1] + timedelta(days=1)
+    row = readers.read_prices(None, market[-1], market[-1], columns=readers.PRICE_COLUMNS).head(1)
+    part = PartitionPath("prices_daily", late)
+    write_parquet_atomic(row.assign(trade_date=late, new_col=1.5), part.tmp_file(), part.final_file())
+    readers.invalidate_datasets()
+
+    dataset = readers._dataset("prices_daily")
+    assert "new_col" in dataset.schema.names
+    values = dataset.to_table(columns=["new_col"]).column("new_col").to_pylist()
+    assert values.count(1.5) == 1 and values.count(None) == len(values) - 1
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.response_cache import CachedResponse, ResponseCache
+from app.datasource.watermark import WatermarkRow, upsert_watermarks
+from app.main import app
+
+
+def _entry(body: bytes) -> CachedResponse:
+    return CachedResponse(body=body, media_type="application/json")
+
+
+def test_snapshot_change_drops_both_tiers(tmp_path):
+    cache = ResponseCache(max_bytes=1024, disk_dir=tmp_path)
+    cache.put("s1", "k", _entry(b"old"))
+    assert cache.get("s1", "k").body == b"old"
+
+    assert cache.get("s2", "k") is None
+    assert not (tmp_path / "s1").exists()
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_lru_is_bounded_by_body_bytes():
+    cache = ResponseCache(max_bytes=10)
+    for key in "abc":
+        cache.put("s", key, _entry(b"1234"))
+    assert cache.get("s", "a") is None
+    assert cache.get("s", "c") is not None
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_prices_etag_and_cache_follow_the_snapshot(market):
+    client = TestClient(app)
+    params = {"ts_code": "000001.SZ", "start": market[0].isoformat(), "end": market[-1].isoformat()}
+    first = client.get("/api/prices", params=params)
+    etag = first.headers["etag"]
+    assert client.get("/api/prices", params=params, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/prices", params=params).content == first.content
+    assert routes.response_cache.stats()["hits"] == 1
+
+    upsert_watermarks([WatermarkRow(table="prices_daily", last_dt=market[-1], rowcount=40, hash="new")])
+    after = client.get("/api/prices", params=params, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert routes.response_cache.stats()["invalidations"] == 1
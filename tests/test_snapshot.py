@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.api.response_cache import ResponseCache
+from app.api.utils import compute_data_snapshot_id, compute_etag, etag_matches
+from app.datasource.watermark import WatermarkRow, read_watermarks, upsert_watermarks
+from app.main import app
+
+
+def test_backfill_behind_watermark_moves_snapshot_id(market):
+    upsert_watermarks([WatermarkRow(table="prices_daily", last_dt=market[-1], rowcount=40, hash="latest")])
+    query = {"path": "/api/prices", "ts_code": ["000001.SZ"]}
+    snapshot = compute_data_snapshot_id()
+    etag = compute_etag(query, snapshot)
+
+    # a backfill of older history: the watermark row itself stays as it was
+    upsert_watermarks([WatermarkRow(table="prices_daily", last_dt=market[0], rowcount=40, hash="older")])
+    (row,) = read_watermarks()
+    assert (row.last_dt, row.hash) == (market[-1], "latest")
+
+    assert compute_data_snapshot_id() != snapshot
+    assert compute_etag(query, compute_data_snapshot_id()) != etag
+
+
+@pytest.mark.parametrize("header, hit", [
+    (None, False),
+    ("abc", True),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", W/"abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+])
+def test_etag_matches(header, hit):
+    assert etag_matches(header, "abc") is hit
+
+
+def test_304_is_answered_before_any_read(monkeypatch, market):
+    params = {"ts_code": "000001.SZ", "start": str(market[0]), "end": str(market[5])}
+    with TestClient(app) as client:
+        etag = client.get("/api/prices", params=params).headers["etag"]
+        monkeypatch.setattr(routes, "response_cache", ResponseCache(max_bytes=1 << 20))
+
+        def no_reads(*args, **kwargs):
+            raise AssertionError("parquet read on a conditional hit")
+
+        monkeypatch.setattr(routes, "read_prices", no_reads)
+        monkeypatch.setattr(routes, "read_adj_factor", no_reads)
+        res = client.get("/api/prices", params=params, headers={"If-None-Match": f'W/"{etag}"'})
+    assert res.status_code == 304
+    assert res.content == b""
+    assert res.headers["etag"] == etag
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import stream
+from app.datasource import readers
+from app.datasource.compaction import compact_month
+from app.main import app
+from app.settings import settings
+
+
+@pytest.mark.parametrize("adj", ["none", "forward", "backward"])
+def test_ndjson_rows_match_json(monkeypatch, market, adj):
+    for table in ("prices_daily", "adj_factor", "daily_basic"):
+        compact_month(table, 2020, 1)
+    readers.invalidate_datasets()
+    monkeypatch.setattr(settings, "api_stream_batch_rows", 10)
+    reads = []
+    read_daily_basic = stream.read_daily_basic
+    monkeypatch.setattr(stream, "read_daily_basic", lambda *args: reads.append(args) or read_daily_basic(*args))
+
+    params = {
+        "ts_code": "000001.SZ,000002.SZ,000003.SZ", "start": str(market[5]), "end": str(market[-1]),
+        "adj": adj, "include_basic": "true",
+    }
+    with TestClient(app) as client:
+        buffered = client.get("/api/prices", params=params).json()["rows"]
+        streamed = client.get("/api/prices", params={**params, "format": "ndjson"})
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+
+    key = lambda r: (r["ts_code"], r["trade_date"])  # noqa: E731
+    assert len(lines) == len(buffered) == 3 * (len(market) - 5)
+    for got, want in zip(sorted(lines, key=key), sorted(buffered, key=key)):
+        assert got.keys() == want.keys()
+        for field, value in want.items():
+            assert got[field] == (pytest.approx(value) if isinstance(value, float) else value)
+    # one daily_basic read per calendar month, not per batch
+    assert len(reads) == len({d.strftime("%Y-%m") for d in market[5:]})
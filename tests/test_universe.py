@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.datasource import readers
+from app.datasource.parquet_io import write_parquet_atomic
+from app.datasource.paths import STOCK_BASIC_PARQUET
+from app.universe import monthly
+
+
+def test_stock_basic_is_refetched_once_per_month(monkeypatch, market):
+    refreshes = []
+
+    def refresh() -> int:
+        refreshes.append(True)
+        basic = pd.DataFrame({"ts_code": ["000001.SZ"], "name": ["平安银行"], "industry": ["银行"], "list_date": [date(1991, 4, 3)]})
+        return write_parquet_atomic(basic, STOCK_BASIC_PARQUET.with_name("stock_basic.parquet.tmp"), STOCK_BASIC_PARQUET)
+
+    monkeypatch.setattr(monthly, "refresh_stock_basic", refresh)
+    january = [d for d in market if d.month == 1]
+    monthly.update_universe(january[-1])
+    # Saturday, Sunday, then the first trading day of February
+    for d in (date(2020, 2, 1), date(2020, 2, 2), date(2020, 2, 3)):
+        monthly.update_universe(d)
+    assert len(refreshes) == 1
+
+
+def _snapshot(year: int, month: int) -> pd.DataFrame:
+    return readers.read_universe(year, month)[["ts_code", "rank", "avg_turnover"]].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("skip", [None, date(2020, 2, 26)])
+def test_rolling_snapshot_matches_full_recompute(market, skip):
+    codes = sorted(readers.read_prices(None, market[0], market[0])["ts_code"])
+    basic = pd.DataFrame({
+        "ts_code": codes,
+        "name": ["*ST 样本"] + ["样本"] * (len(codes) - 1),
+        "industry": ["银行"] * len(codes),
+        "list_date": [date(2010, 1, 4)] * (len(codes) - 1) + [date(2020, 1, 20)],
+    })
+    write_parquet_atomic(basic, STOCK_BASIC_PARQUET.with_name("stock_basic.parquet.tmp"), STOCK_BASIC_PARQUET)
+    monthly.update_universe(market[9], refresh_basic=False)
+    for d in market[10:]:
+        if d != skip:
+            monthly.update_universe(d, refresh_basic=False)
+    # re-running an applied day is a no-op
+    assert monthly.update_universe(market[-1], refresh_basic=False) == 0
+
+    rolled = {m: _snapshot(2020, m) for m in (2, 3)}
+    for m in (2, 3):
+        assert monthly.build_universe(2020, m) > 0
+        full = _snapshot(2020, m)
+        assert 0 < len(full) < len(codes)
+        pd.testing.assert_frame_equal(rolled[m][["ts_code", "rank"]], full[["ts_code", "rank"]])
+        np.testing.assert_allclose(rolled[m]["avg_turnover"], full["avg_turnover"])
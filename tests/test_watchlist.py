@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.api import watchlist_store as wl
+from app.main import app
+
+
+def _codes(n: int, suffix: str = "SZ") -> list[str]:
+    return [f"{i:06d}.{suffix}" for i in range(1, n + 1)]
+
+
+def _walk(client: TestClient, name: str, limit: int) -> list[str]:
+    seen: list[str] = []
+    after = None
+    while True:
+        params = {"name": name, "limit": limit}
+        if after is not None:
+            params["after"] = after
+        body = client.get("/api/watchlist", params=params).json()
+        seen.extend(body["items"])
+        after = body["next_cursor"]
+        if after is None:
+            return seen
+
+
+def test_keyset_pages_cover_the_list_once(data_root):
+    codes = _codes(2500)
+    with TestClient(app) as client:
+        assert client.post("/api/watchlist", json={"name": "big", "ts_codes": codes[::-1]}).json() == {"ok": True}
+        assert _walk(client, "big", 1000) == codes
+        assert _walk(client, "big", 97) == codes
+        page3 = client.get("/api/watchlist", params={"name": "big", "page": 3, "limit": 1000}).json()
+        assert page3["total"] == 2500 and page3["items"] == codes[2000:]
+
+
+def test_cursor_is_stable_across_appends_and_removals(data_root):
+    wl.set_watchlist(_codes(100))
+    first = wl.get_watchlist(page=1, limit=40)
+    wl.remove_items(first["items"][:5] + ["000050.SZ"])
+    wl.add_items(["900001.SH", "000010.SZ"])  # 000010.SZ was removed, so it is re-appended
+    rest = wl.get_watchlist(page=1, limit=1000, after=first["next_cursor"])["items"]
+    assert rest == [c for c in _codes(100)[40:] if c != "000050.SZ"] + ["900001.SH"]
+    assert wl.list_all_codes(wl.DEFAULT_LIST)[-1] == "900001.SH"
+
+
+def test_lists_are_isolated(data_root):
+    wl.set_watchlist(_codes(30), name="a")
+    wl.add_items(_codes(5, "SH"), name="b")
+    assert wl.get_watchlist(page=1, limit=100, name="a")["items"] == _codes(30)
+    assert wl.get_watchlist(page=1, limit=100, name="b")["items"] == _codes(5, "SH")
+    assert wl.remove_items(_codes(5, "SH"), name="a") == 0
+    sizes = {w["name"]: w["size"] for w in wl.list_watchlists()}
+    assert sizes == {"default": 0, "a": 30, "b": 5}
+
+
+def test_invalid_paging_is_rejected(data_root):
+    with TestClient(app) as client:
+        assert client.get("/api/watchlist", params={"limit": 1001}).json()["error"]["code"] == "InvalidParam"
+        assert client.get("/api/watchlist", params={"page": 0}).json()["error"]["code"] == "InvalidParam"
+        assert client.get("/api/watchlist", params={"name": "x" * 65}).json()["error"]["code"] == "InvalidParam"
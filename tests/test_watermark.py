@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import random
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.datasource.paths import WATERMARK_PARQUET
+from app.datasource.watermark import WatermarkRow, read_watermarks, upsert_watermarks, watermark_version
+
+
+def test_concurrent_upserts_never_move_a_watermark_back(data_root):
+    base = date(2024, 1, 1)
+    days = [base + timedelta(days=i) for i in range(200)]
+    random.Random(1).shuffle(days)
+    start_version = watermark_version() or 0
+    errors = []
+
+    def writer(chunk: list[date]) -> None:
+        try:
+            for d in chunk:
+                upsert_watermarks([WatermarkRow(table="prices_daily", last_dt=d, rowcount=1, hash=d.isoformat())])
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(days[i::8],)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    (row,) = read_watermarks()
+    assert row.last_dt == max(days)
+    assert row.hash == max(days).isoformat()
+    assert watermark_version() == start_version + len(days)
+    exported = pq.read_table(WATERMARK_PARQUET).to_pandas()
+    assert pd.Timestamp(exported["last_dt"].iloc[0]).date() == max(days)
+
+
+def test_latest_row_per_table_wins_within_one_batch(data_root):
+    upsert_watermarks([
+        WatermarkRow(table="adj_factor", last_dt=date(2024, 3, 1), rowcount=3, hash="new"),
+        WatermarkRow(table="adj_factor", last_dt=date(2024, 2, 1), rowcount=2, hash="old"),
+    ])
+    (row,) = read_watermarks()
+    assert (row.last_dt, row.hash) == (date(2024, 3, 1), "new")
+
+
+def test_legacy_parquet_watermarks_are_imported(data_root):
+    WATERMARK_PARQUET.parent.mkdir(parents=True, exist_ok=True)
+    legacy = pd.DataFrame({"table": ["prices_daily"], "last_dt": [pd.Timestamp("2023-12-29")], "rowcount": [5000], "hash": ["h"]})
+    pq.write_table(pa.Table.from_pandas(legacy, preserve_index=False), WATERMARK_PARQUET)
+    assert read_watermarks() == [WatermarkRow(table="prices_daily", last_dt=date(2023, 12, 29), rowcount=5000, hash="h")]
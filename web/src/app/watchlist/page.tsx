@@ -4,8 +4,18 @@ import Link from "next/link";
 import { useQuery } from "@tanstack/react-query";
 
 type WatchlistResp = { page: number; limit: number; total: number; items: string[] };
-type PriceRow = { ts_code: string; trade_date: string; close: number; volume?: number; amount?: number; turnover_rate?: number | null };
-type PricesResp = { adj: string; rows: PriceRow[] };
+type MetricsRow = {
+  ts_code: string;
+  trade_date: string;
+  close: number;
+  pct_chg?: number | null;
+  volume?: number | null;
+  amount?: number | null;
+  turnover?: number | null;
+  ma20?: number | null;
+  vol_ann?: number | null;
+};
+type MetricsBatchResp = { latest: boolean; rows: MetricsRow[] };
 
 async function fetchWatchlist(page = 1, limit = 100): Promise<WatchlistResp> {
   const res = await fetch(`/api/panda/api/watchlist?page=${page}&limit=${limit}`);
@@ -13,11 +23,11 @@ async function fetchWatchlist(page = 1, limit = 100): Promise<WatchlistResp> {
   return res.json();
 }
 
-async function fetchLatestPrices(tsCodes: string[]): Promise<PricesResp> {
-  if (tsCodes.length === 0) return { adj: "backward", rows: [] } as PricesResp;
+async function fetchLatestMetrics(tsCodes: string[]): Promise<MetricsBatchResp> {
+  if (tsCodes.length === 0) return { latest: true, rows: [] };
   const ts = encodeURIComponent(tsCodes.join(","));
-  // 近两个月区间
-  const url = `/api/panda/api/prices?ts_code=${ts}&start=2025-06-01&end=2025-08-08&include_basic=true`;
+  // 一次请求取整张自选表的最新一行
+  const url = `/api/panda/api/metrics/batch?ts_code=${ts}&windows=20&window=20&metrics=ma,vol_ann,turnover&latest=true`;
   const res = await fetch(url);
   if (!res.ok) throw new Error("failed");
   return res.json();
@@ -27,25 +37,15 @@ export default function WatchlistPage() {
   const wl = useQuery({ queryKey: ["watchlist"], queryFn: () => fetchWatchlist(1, 100) });
   const codes = wl.data?.items ?? [];
   const prices = useQuery({
-    queryKey: ["prices", codes.join(",")],
-    queryFn: () => fetchLatestPrices(codes),
+    queryKey: ["metrics-batch", codes.join(",")],
+    queryFn: () => fetchLatestMetrics(codes),
     enabled: codes.length > 0,
   });
 
-  const { latestMap, prevMap } = useMemo(() => {
-    const lm = new Map<string, PriceRow>();
-    const pm = new Map<string, PriceRow>();
-    const rows = prices.data?.rows ?? [];
-    for (const r of rows) {
-      const cur = lm.get(r.ts_code);
-      if (!cur || r.trade_date > cur.trade_date) {
-        if (cur) pm.set(r.ts_code, cur);
-        lm.set(r.ts_code, r);
-      } else if (!pm.get(r.ts_code) || r.trade_date > (pm.get(r.ts_code)!.trade_date)) {
-        pm.set(r.ts_code, r);
-      }
-    }
-    return { latestMap: lm, prevMap: pm };
+  const latestMap = useMemo(() => {
+    const lm = new Map<string, MetricsRow>();
+    for (const r of prices.data?.rows ?? []) lm.set(r.ts_code, r);
+    return lm;
   }, [prices.data]);
 
   const fmt = (v: number | null | undefined, digits = 2) => (v ?? v === 0 ? Number(v).toFixed(digits) : "-");
@@ -68,13 +68,14 @@ export default function WatchlistPage() {
               <th className="py-2 px-3">成交量</th>
               <th className="py-2 px-3">成交额</th>
               <th className="py-2 px-3">换手率(%)</th>
+              <th className="py-2 px-3">MA20</th>
+              <th className="py-2 px-3">年化波动</th>
             </tr>
           </thead>
           <tbody>
             {codes.map((c) => {
               const r = latestMap.get(c);
-              const p = prevMap.get(c);
-              const pct = r?.close != null && p?.close != null ? ((r.close / p.close - 1) * 100) : null;
+              const pct = r?.pct_chg != null ? r.pct_chg * 100 : null;
               const pctClass = pct == null ? "" : pct >= 0 ? "text-green-600" : "text-red-600";
               return (
                 <tr key={c} className="border-b hover:bg-gray-50">
@@ -84,7 +85,9 @@ export default function WatchlistPage() {
                   <td className={`py-2 px-3 ${pctClass}`}>{pct == null ? "-" : fmtPct(pct)}</td>
                   <td className="py-2 px-3">{r?.volume ?? "-"}</td>
                   <td className="py-2 px-3">{r?.amount ?? "-"}</td>
-                  <td className="py-2 px-3">{fmt(r?.turnover_rate)}</td>
+                  <td className="py-2 px-3">{fmt(r?.turnover)}</td>
+                  <td className="py-2 px-3">{fmt(r?.ma20)}</td>
+                  <td className="py-2 px-3">{fmt(r?.vol_ann, 3)}</td>
                 </tr>
               );
             })}